@@ -1,4 +1,6 @@
 # app/__init__.py
+import os
+
 from flask import Flask
 from .extension import db, cors, migrate
 from config.config import Config  # import Config dari root
@@ -7,14 +9,54 @@ def create_app():
     app = Flask(__name__, template_folder='templates', static_folder='static')
     app.config.from_object(Config)  # load config dari config.py
 
+    # jsonify lewat encoder cepat (orjson bila ada) yang paham AyatDTO / fragmen RawJSON
+    from .serialization import init_app as init_json
+    init_json(app)
+
+    # profil DB: opsi pool (Postgres/MySQL) & bind replika read-only, sebelum engine dibuat
+    from .database import configure as configure_db, init_engines
+    configure_db(app)
+
     # Initialize extensions
     db.init_app(app)
-    migrate.init_app(app, db)  # <- inisialisasi Flask-Migrate
+    # <- inisialisasi Flask-Migrate; migrations/ di root repo apa pun cwd-nya, batch mode untuk ALTER di SQLite
+    migrate.init_app(app, db, directory=os.path.join(os.path.dirname(app.root_path), 'migrations'), render_as_batch=True)
 
     from app import models
 
     with app.app_context():
-        db.create_all()
+        # pragma SQLite (WAL, synchronous, mmap, cache) di tiap koneksi baru
+        init_engines(db.engines)
+
+        from .services.SearchServices import SearchService
+        SearchService.init_engine()
+
+        # metrics: latency per route + jumlah/durasi SQL via engine events (sebelum query pertama)
+        from .metrics import init_app as init_metrics
+        init_metrics(app, db.engines)
+
+        # skema lewat migrasi Alembic (migrations/versions), bukan db.create_all()
+        if app.config.get("DB_UPGRADE_ON_STARTUP"):
+            from .models.schema import upgrade_schema
+            upgrade_schema()
+
+        # blob audio JSON per ayat (skema lama) -> template reciter; idempotent, murah bila sudah bersih
+        try:
+            from .services.IngestServices import IngestService
+            IngestService.migrate_audio()
+        except Exception:
+            app.logger.exception("Failed to migrate ayat audio to reciter templates")
+
+        # FTS index ayat (SQLite FTS5), dibuat/di-rebuild bila belum sinkron
+        try:
+            SearchService.ensure_index()
+        except Exception:
+            app.logger.exception("Failed to prepare ayat full-text index")
+
+        # DB kosong + bundle tersedia -> isi korpus tanpa menyentuh upstream
+        if app.config.get("BUNDLE_IMPORT_ON_STARTUP"):
+            from .services.BundleServices import BundleService
+            BundleService.import_on_startup(app.config.get("BUNDLE_PATH"))
 
     cors.init_app(app, resources={r"/*": {"origins": "*"}})
 
@@ -24,4 +66,13 @@ def create_app():
     app.register_blueprint(main)
     app.register_blueprint(api, url_prefix='/api')
 
+    # CLI: flask quran ...
+    from .commands import quran_cli
+    app.cli.add_command(quran_cli)
+
+    if app.config.get("WARMUP_ON_STARTUP"):
+        # mulai saat request pertama (bukan di CLI), satu crawl per host lewat file lock
+        from .services.WarmupServices import WarmupService
+        WarmupService.start_on_first_request(app)
+
     return app
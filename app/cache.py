@@ -0,0 +1,313 @@
+# app/cache.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from config.config import Config
+from app.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class CacheBackend(ABC):
+    """
+    Minimal key/value interface shared by all cache tiers.
+
+    Nilai berupa bytes; TTL dalam detik (None = tanpa kedaluwarsa). Versi namespace adalah counter
+    integer terpisah yang hanya bisa naik, dipakai untuk invalidasi lintas worker.
+    Backend yang belum mengimplementasi semua method gagal saat dibuat (TypeError), bukan saat dipakai.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def get(self, key):
+        """Stored bytes, or None when missing or expired."""
+
+    @abstractmethod
+    def set(self, key, value, ttl=None):
+        """Store bytes under `key`, expiring after `ttl` seconds (None = never)."""
+
+    @abstractmethod
+    def delete(self, key):
+        """Remove `key` if present."""
+
+    @abstractmethod
+    def get_version(self, namespace):
+        """Current version counter of `namespace` (0 when never bumped)."""
+
+    @abstractmethod
+    def bump_version(self, namespace):
+        """Increment the version of `namespace` and return the new value."""
+
+
+class MemoryBackend(CacheBackend):
+    """Per-process LRU dict. Dipakai sebagai L1, atau sebagai L2 saat hanya ada satu worker."""
+
+    name = "memory"
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+        self._versions = {}
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl if ttl else None)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def get_version(self, namespace):
+        with self._lock:
+            return self._versions.get(namespace, 0)
+
+    def bump_version(self, namespace):
+        with self._lock:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+            return self._versions[namespace]
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Shared tier in a local SQLite file (WAL), visible to every worker on the same host.
+
+    Satu koneksi per thread; tulis jarang (payload upstream & bump versi), baca dilindungi L1 di atasnya.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path, busy_timeout_ms=5000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._purged_at = 0.0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_kv (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS cache_version (namespace TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute("SELECT value, expires_at FROM cache_kv WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            return None
+        return bytes(value)
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT INTO cache_kv (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+            (key, sqlite3.Binary(value), now + ttl if ttl else None)
+        )
+        if now - self._purged_at > 300:
+            self._purged_at = now
+            conn.execute("DELETE FROM cache_kv WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+
+    def delete(self, key):
+        self._conn().execute("DELETE FROM cache_kv WHERE key = ?", (key,))
+
+    def get_version(self, namespace):
+        row = self._conn().execute("SELECT version FROM cache_version WHERE namespace = ?", (namespace,)).fetchone()
+        return row[0] if row else 0
+
+    def bump_version(self, namespace):
+        conn = self._conn()
+        conn.execute(
+            "INSERT INTO cache_version (namespace, version) VALUES (?, 1) "
+            "ON CONFLICT(namespace) DO UPDATE SET version = version + 1",
+            (namespace,)
+        )
+        return self.get_version(namespace)
+
+
+class RedisBackend(CacheBackend):
+    """Shared tier in Redis (optional dependency `redis`), for workers spread over several hosts."""
+
+    name = "redis"
+
+    def __init__(self, url, prefix="qalmi:"):
+        import redis  # optional, hanya saat CACHE_BACKEND=redis
+
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        return self._client.get(self.prefix + key)
+
+    def set(self, key, value, ttl=None):
+        self._client.set(self.prefix + key, value, ex=int(ttl) if ttl else None)
+
+    def delete(self, key):
+        self._client.delete(self.prefix + key)
+
+    def get_version(self, namespace):
+        value = self._client.get(f"{self.prefix}v:{namespace}")
+        return int(value) if value else 0
+
+    def bump_version(self, namespace):
+        return int(self._client.incr(f"{self.prefix}v:{namespace}"))
+
+
+class TieredCache:
+    """
+    L1 (memory, per process) in front of a shared L2 backend, with versioned namespaces.
+
+    Key fisik = "{namespace}:{versi}:{key}". invalidate(namespace) menaikkan versi di L2, jadi entry lama
+    di semua worker (L1 maupun L2) otomatis tidak terpakai lagi. Versi dibaca ulang dari L2 paling sering
+    tiap `version_check_interval` detik, sehingga clear di satu worker sampai ke worker lain dalam selang itu.
+    """
+
+    def __init__(self, shared, local=None, version_check_interval=1.0, l1_ttl=60.0):
+        self.shared = shared
+        self.local = local or MemoryBackend()
+        self.version_check_interval = version_check_interval
+        self.l1_ttl = l1_ttl
+        self._lock = threading.Lock()
+        self._versions = {}
+        self._stats = {"l1_hits": 0, "l2_hits": 0, "misses": 0, "sets": 0, "invalidations": 0, "errors": 0}
+
+    def _incr(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def version(self, namespace, fresh=False):
+        """Current version of `namespace`; re-read from the shared tier at most every version_check_interval (fresh: selalu)."""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._versions.get(namespace)
+        if not fresh and cached is not None and now - cached[1] < self.version_check_interval:
+            return cached[0]
+        try:
+            version = self.shared.get_version(namespace)
+        except Exception:
+            self._incr("errors")
+            logger.warning("Cache: cannot read version of %s from %s", namespace, self.shared.name, exc_info=True)
+            return cached[0] if cached else 0
+        with self._lock:
+            self._versions[namespace] = (version, now)
+        return version
+
+    def _key(self, namespace, key):
+        return f"{namespace}:{self.version(namespace)}:{key}"
+
+    def get(self, namespace, key):
+        """Return the decoded JSON value or None."""
+        full_key = self._key(namespace, key)
+        value = self.local.get(full_key)
+        if value is not None:
+            self._incr("l1_hits")
+            return value
+        try:
+            raw = self.shared.get(full_key)
+        except Exception:
+            self._incr("errors")
+            logger.warning("Cache: %s get failed for %s", self.shared.name, full_key, exc_info=True)
+            raw = None
+        if raw is None:
+            self._incr("misses")
+            return None
+        self._incr("l2_hits")
+        value = json.loads(raw)
+        self.local.set(full_key, value, ttl=self.l1_ttl)
+        return value
+
+    def set(self, namespace, key, value, ttl=None):
+        full_key = self._key(namespace, key)
+        self.local.set(full_key, value, ttl=min(ttl, self.l1_ttl) if ttl else self.l1_ttl)
+        try:
+            self.shared.set(full_key, json.dumps(value, ensure_ascii=False).encode("utf-8"), ttl=ttl)
+            self._incr("sets")
+        except Exception:
+            self._incr("errors")
+            logger.warning("Cache: %s set failed for %s", self.shared.name, full_key, exc_info=True)
+
+    def invalidate(self, namespace):
+        """Bump the namespace version so every worker drops its entries."""
+        try:
+            version = self.shared.bump_version(namespace)
+        except Exception:
+            self._incr("errors")
+            logger.warning("Cache: cannot bump version of %s on %s", namespace, self.shared.name, exc_info=True)
+            return None
+        with self._lock:
+            self._versions[namespace] = (version, time.monotonic())
+        self._incr("invalidations")
+        logger.info("Cache namespace %s invalidated (version %s)", namespace, version)
+        return version
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": self.shared.name,
+                "versions": {ns: v for ns, (v, _) in self._versions.items()},
+                **self._stats
+            }
+
+
+def build_shared_backend(kind=None):
+    kind = (kind or Config.CACHE_BACKEND or "sqlite").lower()
+    if kind == "redis":
+        if Config.REDIS_URL:
+            try:
+                return RedisBackend(Config.REDIS_URL)
+            except ImportError:
+                logger.warning("CACHE_BACKEND=redis but the redis package is not installed, using sqlite")
+        else:
+            logger.warning("CACHE_BACKEND=redis but REDIS_URL is empty, using sqlite")
+        kind = "sqlite"
+    if kind == "sqlite":
+        try:
+            return SQLiteBackend(Config.CACHE_SQLITE_PATH)
+        except sqlite3.Error:
+            logger.warning("Shared cache file %s unusable, using memory", Config.CACHE_SQLITE_PATH, exc_info=True)
+    return MemoryBackend()
+
+
+shared_cache = TieredCache(
+    build_shared_backend(),
+    local=MemoryBackend(max_entries=Config.CACHE_L1_MAX_ENTRIES),
+    version_check_interval=Config.CACHE_VERSION_CHECK_INTERVAL,
+    l1_ttl=Config.CACHE_L1_TTL
+)
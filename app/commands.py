@@ -0,0 +1,136 @@
+# app/commands.py
+import json
+
+import click
+from flask.cli import AppGroup
+
+quran_cli = AppGroup("quran", help="Perintah pengelolaan korpus Al-Quran lokal.")
+
+
+@quran_cli.command("warmup")
+@click.option("--workers", type=int, default=None, help="Jumlah thread fetch paralel (default: WARMUP_WORKERS).")
+@click.option("--surah", "surah", type=int, multiple=True, help="Hanya surah tertentu (bisa diulang).")
+@click.option("--no-tafsir", is_flag=True, help="Lewati tafsir.")
+@click.option("--restart", is_flag=True, help="Abaikan checkpoint dan mulai dari awal.")
+@click.option("--json", "as_json", is_flag=True, help="Cetak laporan lengkap sebagai JSON.")
+def warmup(workers, surah, no_tafsir, restart, as_json):
+    """Preload semua surah dan tafsir dari upstream ke DB lokal."""
+    from app.services.WarmupServices import WarmupService
+
+    report = WarmupService.run(
+        workers=workers,
+        surah_numbers=list(surah) or None,
+        include_tafsir=not no_tafsir,
+        resume=not restart
+    )
+
+    if as_json:
+        click.echo(json.dumps(report, indent=2))
+    else:
+        for item in report["surah"]:
+            if item["status"] == "failed":
+                click.echo(f"  surah {item['nomor']:>3}: FAILED - {item.get('error')}")
+        click.echo(
+            f"Warmup selesai dalam {report['wall_time']}s: "
+            f"{report['completed']} surah ditulis, {report['skipped']} dilewati, {report['failed']} gagal, "
+            f"{report['ayat_rows']} ayat + {report['tafsir_rows']} tafsir."
+        )
+
+    if report["failed"]:
+        raise SystemExit(1)
+
+
+@quran_cli.command("compress-tafsir")
+@click.option("--batch-size", type=int, default=None, help="Baris per batch (default: INGEST_BATCH_SIZE).")
+@click.option("--vacuum", is_flag=True, help="VACUUM SQLite setelahnya supaya ukuran file benar-benar turun.")
+@click.option("--json", "as_json", is_flag=True, help="Cetak laporan sebagai JSON.")
+def compress_tafsir(batch_size, vacuum, as_json):
+    """Kompres ulang baris tafsir lama (teks polos) ke format zlib."""
+    from app.services.IngestServices import IngestService
+
+    report = IngestService.compress_tafsir(batch_size=batch_size, vacuum=vacuum)
+    if as_json:
+        click.echo(json.dumps(report, indent=2))
+        return
+
+    click.echo(
+        f"Tafsir: {report['rows_compressed']} dari {report['rows_scanned']} baris dikompres dalam {report['seconds']}s, "
+        f"isi kolom {report['bytes_before']:,} -> {report['bytes_after']:,} bytes."
+    )
+    if report["db_bytes_before"] is not None:
+        click.echo(f"File DB: {report['db_bytes_before']:,} -> {report['db_bytes_after']:,} bytes.")
+
+
+@quran_cli.command("migrate-audio")
+@click.option("--batch-size", type=int, default=None, help="Baris per batch (default: INGEST_BATCH_SIZE).")
+@click.option("--vacuum", is_flag=True, help="VACUUM SQLite setelahnya supaya ukuran file benar-benar turun.")
+@click.option("--json", "as_json", is_flag=True, help="Cetak laporan sebagai JSON.")
+def migrate_audio(batch_size, vacuum, as_json):
+    """Pindahkan blob audio JSON per ayat ke template URL di tabel reciter."""
+    from app.services.IngestServices import IngestService
+
+    report = IngestService.migrate_audio(batch_size=batch_size, vacuum=vacuum)
+    if as_json:
+        click.echo(json.dumps(report, indent=2))
+        return
+
+    click.echo(
+        f"Audio: {report['rows_rewritten']} dari {report['rows_scanned']} baris ditulis ulang dalam {report['seconds']}s "
+        f"({report['rows_override']} dengan pengecualian), isi kolom {report['bytes_before']:,} -> "
+        f"{report['bytes_after']:,} bytes."
+    )
+    if report["db_bytes_before"] is not None:
+        click.echo(f"File DB: {report['db_bytes_before']:,} -> {report['db_bytes_after']:,} bytes.")
+
+
+@quran_cli.command("export-bundle")
+@click.argument("path", type=click.Path(dir_okay=False))
+@click.option("--json", "as_json", is_flag=True, help="Cetak laporan sebagai JSON.")
+def export_bundle(path, as_json):
+    """Ekspor surah, ayat & tafsir ke satu file bundle terkompresi."""
+    from app.services.BundleServices import BundleService
+
+    report = BundleService.export_bundle(path)
+    if as_json:
+        click.echo(json.dumps(report, indent=2))
+        return
+    counts = report["counts"]
+    click.echo(
+        f"Bundle {report['path']} ditulis dalam {report['seconds']}s: {counts['surah']} surah, "
+        f"{counts['ayat']} ayat, {counts['tafsir']} tafsir, {report['bytes']:,} bytes."
+    )
+
+
+@quran_cli.command("import-bundle")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--batch-size", type=int, default=None, help="Baris per batch insert (default: INGEST_BATCH_SIZE).")
+@click.option("--json", "as_json", is_flag=True, help="Cetak laporan sebagai JSON.")
+def import_bundle(path, batch_size, as_json):
+    """Isi DB kosong dari file bundle (tanpa akses jaringan)."""
+    from app.services.BundleServices import BundleService, BundleError
+
+    try:
+        report = BundleService.import_bundle(path, batch_size=batch_size)
+    except BundleError as e:
+        raise click.ClickException(str(e))
+    if as_json:
+        click.echo(json.dumps(report, indent=2))
+        return
+    counts, seconds = report["counts"], report["seconds"]
+    click.echo(
+        f"Import selesai dalam {seconds['total']}s (verifikasi {seconds['verify']}s, load {seconds['load']}s, "
+        f"index {seconds['index']}s): {counts['surah']} surah, {counts['ayat']} ayat, {counts['tafsir']} tafsir "
+        f"dari bundle {report['bytes']:,} bytes."
+    )
+
+
+@quran_cli.command("user-token")
+@click.argument("user_id", type=int)
+def user_token(user_id):
+    """Buat token Bearer untuk endpoint bookmark/note (butuh USER_TOKEN_SECRET)."""
+    from app.services.AuthServices import AuthService
+
+    try:
+        click.echo(AuthService.issue_token(user_id))
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
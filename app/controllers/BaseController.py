@@ -1,4 +1,5 @@
-from flask import render_template, url_for
+from flask import render_template, url_for, Response, abort
+from app.metrics import metrics
 
 class BaseController:
     @staticmethod
@@ -15,3 +16,10 @@ class BaseController:
     
 
     
+
+    @staticmethod
+    def metrics():
+        # Prometheus text format, dijumlah dari semua worker
+        if not metrics.enabled:
+            abort(404)
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
@@ -1,7 +1,16 @@
-import json
-from flask import jsonify, request, g, Response
-from app.services.EquranServices import EQuranService
-from app.logger import logger  # Import logger
+from flask import jsonify, request, g, Response, stream_with_context, send_file, redirect
+from config.config import Config
+from app.services.EquranServices import EQuranService, NotFoundError
+from app.services.EquranClient import EQuranAPIError
+from app.services.SearchServices import SearchService
+from app.services.BookmarkServices import BookmarkService
+from app.services.NoteServices import NoteService
+from app.services.ReciterServices import ReciterService
+from app.services.AuthServices import AuthService
+from app.services.NavigationServices import NavigationService
+from app.logger import get_logger, logging_status
+
+logger = get_logger(__name__)
 
 class QuranController:
 
@@ -15,9 +24,9 @@ class QuranController:
             limit = int(request.args.get("limit", 114))
             search = request.args.get("search")
 
-            logger.debug(f"Listing surah - page: {page}, limit: {limit}, search: {search}")
+            logger.debug("Listing surah - page: %s, limit: %s, search: %s", page, limit, search)
             result = EQuranService.get_all_surah(page=page, limit=limit, search=search)
-            logger.info(f"Returned {len(result.get('items', []))} surah(s)")
+            logger.info("Returned %s surah(s)", len(result.get('items', [])))
 
             return jsonify({
                 "status": "success",
@@ -35,56 +44,33 @@ class QuranController:
         try:
             page = int(request.args.get("page", 1))
             limit = int(request.args.get("limit", 20))
-            logger.debug(f"Fetching detail for surah {nomor} - page {page}, limit {limit}")
+            after = request.args.get("after")
+            qari = request.args.get("qari") or None
+            logger.debug("Fetching detail for surah %s - page %s, limit %s, after %s, qari %s", nomor, page, limit, after, qari)
 
-            result = EQuranService.get_surah_detail(nomor=nomor, page=page, limit=limit)
+            try:
+                result = EQuranService.get_surah_detail(nomor=nomor, page=page, limit=limit, after=after, qari=qari)
+            except NotFoundError as e:
+                return jsonify({"status": "error", "message": str(e)}), 404
+            except ValueError as e:
+                return jsonify({"status": "error", "message": str(e)}), 400
+            except EQuranAPIError as e:
+                logger.warning("Surah %s unavailable from upstream: %s", nomor, e)
+                return jsonify({"status": "error", "message": str(e)}), 502
             if not result:
-                logger.warning(f"No result from service for surah {nomor}")
+                logger.warning("No result from service for surah %s", nomor)
                 return jsonify({"status": "error", "message": "Surah tidak ditemukan"}), 404
 
-            ayat_list = result.get("ayat", []) or []
-            normalized = []
-
-            for a in ayat_list:
-                # hanya normalisasi ringan — jangan ubah struktur yang valid
-                if isinstance(a, dict):
-                    # ambil audio dari beberapa kemungkinan key dan parse bila perlu
-                    audio_raw = a.get("audio") or a.get("audio_url") or a.get("audioUrl") or {}
-                    if isinstance(audio_raw, str):
-                        try:
-                            audio_obj = json.loads(audio_raw)
-                        except Exception:
-                            logger.debug(f"audio JSON parse failed for surah {nomor}, ayat {a.get('nomor')}", exc_info=True)
-                            audio_obj = {}
-                    elif isinstance(audio_raw, dict):
-                        audio_obj = audio_raw
-                    else:
-                        audio_obj = {}
-
-                    normalized.append({
-                        "nomor": a.get("nomor") or a.get("nomorAyat") or a.get("number"),
-                        "arab": a.get("arab") or a.get("teksArab") or a.get("text") or "",
-                        "latin": a.get("latin") or a.get("teksLatin") or a.get("transliteration") or "",
-                        "indonesia": a.get("indonesia") or a.get("teksIndonesia") or a.get("translation") or "",
-                        "audio": audio_obj
-                    })
-                else:
-                    # jika bukan dict (tak terduga), teruskan apa adanya
-                    normalized.append(a)
-
-            result["ayat"] = normalized
-
-            # pastikan ada meta.total_ayat
-            meta = result.get("meta") or {}
-            if "total_ayat" not in meta:
-                meta["total_ayat"] = len(normalized)
-            result["meta"] = meta
+            # ayat sudah AyatDTO dari service (satu kali normalisasi); encoder app.json menulisnya langsung
+            ayat_list = result.get("ayat") or []
+            result["ayat"] = ayat_list
+            result.setdefault("meta", {}).setdefault("total_ayat", len(ayat_list))
 
-            logger.info(f"Returned detail for surah {nomor} with {len(normalized)} ayat")
+            logger.info("Returned detail for surah %s with %s ayat", nomor, len(ayat_list))
             return jsonify({"status": "success", "data": result})
 
         except Exception as e:
-            logger.error(f"Error in detail_surah for surah {nomor}", exc_info=True)
+            logger.error("Error in detail_surah for surah %s", nomor, exc_info=True)
             return jsonify({"status": "error", "message": str(e)}), 500
 
     # =========================================================
@@ -94,25 +80,174 @@ class QuranController:
     def tafsir_surah(nomor):
         try:
             ayat = request.args.get("ayat")
-            logger.debug(f"Fetching tafsir for surah {nomor}, ayat {ayat}")
-            result = EQuranService.get_tafsir(nomor=nomor, ayat=ayat)
-            logger.info(f"Returned tafsir for surah {nomor}")
+            page = request.args.get("page", type=int)
+            limit = request.args.get("limit", type=int)
+            after = request.args.get("after")
+            excerpt = request.args.get("excerpt", type=int)
+            logger.debug("Fetching tafsir for surah %s, ayat %s, page %s, limit %s, after %s", nomor, ayat, page, limit, after)
+            try:
+                result = EQuranService.get_tafsir(
+                    nomor=nomor, ayat=ayat, page=page, limit=limit, after=after,
+                    excerpt=excerpt if excerpt and excerpt > 0 else None
+                )
+            except NotFoundError as e:
+                return jsonify({"status": "error", "message": str(e)}), 404
+            except ValueError as e:
+                return jsonify({"status": "error", "message": str(e)}), 400
+            except EQuranAPIError as e:
+                logger.warning("Tafsir %s unavailable from upstream: %s", nomor, e)
+                return jsonify({"status": "error", "message": str(e)}), 502
+            logger.info("Returned tafsir for surah %s", nomor)
+            return jsonify({"status": "success", "data": result})
+        except Exception as e:
+            logger.error("Error in tafsir_surah for surah %s", nomor, exc_info=True)
+            return jsonify({"status": "error", "message": str(e)}), 500
+
+    # =========================================================
+    # BATCH AYAT LOOKUP ("2:255,3:1-10,112")
+    # =========================================================
+    @staticmethod
+    def batch_ayat():
+        try:
+            refs = request.args.get("ref")
+            qari = request.args.get("qari") or None
+            logger.debug("Batch ayat lookup - ref: %s, qari: %s", refs, qari)
+            try:
+                result = EQuranService.get_ayat_batch(refs, qari=qari)
+            except ValueError as e:
+                return jsonify({"status": "error", "message": str(e)}), 400
+            return jsonify({"status": "success", "data": result})
+        except Exception as e:
+            logger.error("Error in batch_ayat", exc_info=True)
+            return jsonify({"status": "error", "message": str(e)}), 500
+
+    # =========================================================
+    # NAVIGATION (juz / hizb / rubu' / halaman mushaf)
+    # =========================================================
+    @staticmethod
+    def navigation_unit(kind, nomor):
+        try:
+            qari = request.args.get("qari") or None
+            logger.debug("Fetching %s %s, qari %s", kind, nomor, qari)
+            try:
+                result = NavigationService.get_unit(kind, nomor, qari=qari)
+            except ValueError as e:
+                return jsonify({"status": "error", "message": str(e)}), 400
+            return jsonify({"status": "success", "data": result})
+        except Exception as e:
+            logger.error("Error in navigation_unit for %s %s", kind, nomor, exc_info=True)
+            return jsonify({"status": "error", "message": str(e)}), 500
+
+    @staticmethod
+    def navigation_index():
+        """Rentang semua unit navigasi (?kind=juz|hizb|rub|page), atau lokasi satu ayat (?ref=2:255)."""
+        try:
+            ref = request.args.get("ref")
+            kind = request.args.get("kind") or None
+            try:
+                if ref:
+                    surah, ayat = EQuranService.parse_ayat_ref(ref)
+                    result = {"ref": ref, **NavigationService.locate(surah, ayat or 1)}
+                else:
+                    result = NavigationService.list_units(kind)
+            except ValueError as e:
+                return jsonify({"status": "error", "message": str(e)}), 400
+            return jsonify({"status": "success", "data": result})
+        except Exception as e:
+            logger.error("Error in navigation_index", exc_info=True)
+            return jsonify({"status": "error", "message": str(e)}), 500
+
+    # =========================================================
+    # EXPORT (streaming NDJSON)
+    # =========================================================
+    @staticmethod
+    def export_ayat():
+        try:
+            surah = request.args.get("surah")
+            start = request.args.get("from")
+            end = request.args.get("to")
+            qari = request.args.get("qari") or None
+            try:
+                if surah:
+                    start = end = EQuranService.parse_ayat_ref(surah)
+                else:
+                    start = EQuranService.parse_ayat_ref(start) if start else None
+                    end = EQuranService.parse_ayat_ref(end) if end else None
+            except ValueError:
+                return jsonify({"status": "error", "message": "Parameter surah/from/to tidak valid"}), 400
+
+            if surah:
+                # pastikan surah tersimpan di DB (fetch dari API bila belum)
+                try:
+                    EQuranService.get_surah_detail(nomor=start[0], page=1, limit=1)
+                except NotFoundError as e:
+                    return jsonify({"status": "error", "message": str(e)}), 404
+            try:
+                ReciterService.require(qari)
+            except ValueError as e:
+                return jsonify({"status": "error", "message": str(e)}), 400
+
+            logger.debug("Exporting ayat as NDJSON - from: %s, to: %s, qari: %s", start, end, qari)
+            return Response(
+                stream_with_context(EQuranService.iter_ayat_ndjson(start=start, end=end, qari=qari)),
+                mimetype="application/x-ndjson"
+            )
+        except Exception as e:
+            logger.error("Error in export_ayat", exc_info=True)
+            return jsonify({"status": "error", "message": str(e)}), 500
+
+    # =========================================================
+    # SEARCH (full-text ayat)
+    # =========================================================
+    @staticmethod
+    def search_ayat():
+        try:
+            q = (request.args.get("q") or "").strip()
+            if not q:
+                return jsonify({"status": "error", "message": "Parameter q wajib diisi"}), 400
+            page = int(request.args.get("page", 1))
+            limit = int(request.args.get("limit", 20))
+            fields = request.args.get("field")
+            fields = [f.strip() for f in fields.split(",")] if fields else None
+
+            logger.debug("Searching ayat - q: %s, page: %s, limit: %s, field: %s", q, page, limit, fields)
+            result = SearchService.search(q, page=page, limit=limit, fields=fields)
             return jsonify({"status": "success", "data": result})
         except Exception as e:
-            logger.error(f"Error in tafsir_surah for surah {nomor}", exc_info=True)
+            logger.error("Error in search_ayat", exc_info=True)
             return jsonify({"status": "error", "message": str(e)}), 500
 
     # =========================================================
     # BOOKMARK SYSTEM (User Required)
     # =========================================================
+    @staticmethod
+    def _user_required():
+        """Error response when the request has no verified user (None bila ada)."""
+        if not AuthService.enabled():
+            return jsonify({"status": "error",
+                            "message": "Endpoint user nonaktif: set USER_TOKEN_SECRET atau USER_GATEWAY_SECRET"}), 503
+        if g.get("user_id") is None:
+            return jsonify({"status": "error", "message": "Token user (Authorization: Bearer) wajib diisi"}), 401
+        return None
+
+    @staticmethod
+    def _bookmark_write(action, message):
+        error = QuranController._user_required()
+        if error:
+            return error
+        user_id = g.user_id
+        try:
+            items = BookmarkService.parse_items(request.get_json(silent=True))
+            logger.debug("User %s %s %s bookmark(s)", user_id, action.__name__, len(items))
+            result = action(user_id, items)
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        return jsonify({"status": "success", "message": message, "data": result})
+
     @staticmethod
     def add_bookmark():
         try:
-            user_id = g.user_id
-            payload = request.json
-            logger.debug(f"User {user_id} adding bookmark: {payload}")
-            result = EQuranService.add_bookmark(user_id=user_id, surah=payload.get("surah"), ayat=payload.get("ayat"))
-            return jsonify({"status": "success", "message": "Bookmark added", "data": result})
+            return QuranController._bookmark_write(BookmarkService.add, "Bookmark added")
         except Exception as e:
             logger.error("Error in add_bookmark", exc_info=True)
             return jsonify({"status": "error", "message": str(e)}), 500
@@ -120,11 +255,7 @@ class QuranController:
     @staticmethod
     def remove_bookmark():
         try:
-            user_id = g.user_id
-            payload = request.json
-            logger.debug(f"User {user_id} removing bookmark: {payload}")
-            EQuranService.remove_bookmark(user_id=user_id, surah=payload.get("surah"), ayat=payload.get("ayat"))
-            return jsonify({"status": "success", "message": "Bookmark removed"})
+            return QuranController._bookmark_write(BookmarkService.remove, "Bookmark removed")
         except Exception as e:
             logger.error("Error in remove_bookmark", exc_info=True)
             return jsonify({"status": "error", "message": str(e)}), 500
@@ -132,42 +263,94 @@ class QuranController:
     @staticmethod
     def list_bookmark():
         try:
+            error = QuranController._user_required()
+            if error:
+                return error
             user_id = g.user_id
-            logger.debug(f"Listing bookmarks for user {user_id}")
-            result = EQuranService.get_user_bookmarks(user_id)
+            limit = int(request.args.get("limit", 20))
+            after = request.args.get("after")
+            logger.debug("Listing bookmarks for user %s - limit %s, after %s", user_id, limit, after)
+            try:
+                result = BookmarkService.list_bookmarks(user_id, limit=limit, after=after)
+            except ValueError as e:
+                return jsonify({"status": "error", "message": str(e)}), 400
             return jsonify({"status": "success", "data": result})
         except Exception as e:
             logger.error("Error in list_bookmark", exc_info=True)
             return jsonify({"status": "error", "message": str(e)}), 500
 
     # =========================================================
-    # NOTES SYSTEM
+    # NOTES SYSTEM (User Required, offline-first sync)
     # =========================================================
+    @staticmethod
+    def _note_write(message, delete=False):
+        error = QuranController._user_required()
+        if error:
+            return error
+        user_id = g.user_id
+        try:
+            items = NoteService.parse_items(request.get_json(silent=True), delete=delete)
+            logger.debug("User %s writing %s note(s), delete=%s", user_id, len(items), delete)
+            result = NoteService.save(user_id, items)
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        return jsonify({"status": "success", "message": message, "data": result})
+
     @staticmethod
     def save_note():
         try:
-            user_id = g.user_id
-            payload = request.json
-            logger.debug(f"User {user_id} saving note: {payload}")
-            result = EQuranService.save_note(user_id=user_id, surah=payload.get("surah"), ayat=payload.get("ayat"), content=payload.get("content"))
-            return jsonify({"status": "success", "message": "Note saved", "data": result})
+            return QuranController._note_write("Note saved")
         except Exception as e:
             logger.error("Error in save_note", exc_info=True)
             return jsonify({"status": "error", "message": str(e)}), 500
 
+    @staticmethod
+    def delete_note():
+        try:
+            return QuranController._note_write("Note deleted", delete=True)
+        except Exception as e:
+            logger.error("Error in delete_note", exc_info=True)
+            return jsonify({"status": "error", "message": str(e)}), 500
+
     @staticmethod
     def get_note():
         try:
+            error = QuranController._user_required()
+            if error:
+                return error
             user_id = g.user_id
-            surah = request.args.get("surah")
-            ayat = request.args.get("ayat")
-            logger.debug(f"User {user_id} fetching note - surah: {surah}, ayat: {ayat}")
-            result = EQuranService.get_note(user_id=user_id, surah=surah, ayat=ayat)
+            surah = request.args.get("surah", type=int)
+            ayat = request.args.get("ayat", type=int)
+            if not surah or not ayat or surah < 1 or ayat < 1:
+                return jsonify({"status": "error", "message": "Parameter surah/ayat tidak valid"}), 400
+            logger.debug("User %s fetching note - surah: %s, ayat: %s", user_id, surah, ayat)
+            result = NoteService.get_note(user_id=user_id, surah=surah, ayat=ayat)
+            if result is None:
+                return jsonify({"status": "error", "message": "Note tidak ditemukan"}), 404
             return jsonify({"status": "success", "data": result})
         except Exception as e:
             logger.error("Error in get_note", exc_info=True)
             return jsonify({"status": "error", "message": str(e)}), 500
 
+    @staticmethod
+    def note_changes():
+        try:
+            error = QuranController._user_required()
+            if error:
+                return error
+            user_id = g.user_id
+            since = request.args.get("since")
+            limit = request.args.get("limit", type=int)
+            logger.debug("Note changes for user %s - since %s, limit %s", user_id, since, limit)
+            try:
+                result = NoteService.changes(user_id, since=since, limit=limit)
+            except ValueError as e:
+                return jsonify({"status": "error", "message": str(e)}), 400
+            return jsonify({"status": "success", "data": result})
+        except Exception as e:
+            logger.error("Error in note_changes", exc_info=True)
+            return jsonify({"status": "error", "message": str(e)}), 500
+
     # =========================================================
     # AUDIO ACCESS (Optional: Signed URL)
     # =========================================================
@@ -176,13 +359,51 @@ class QuranController:
         try:
             surah = request.args.get("surah")
             ayat = request.args.get("ayat")
-            logger.debug(f"Generating audio URL for surah {surah}, ayat {ayat}")
+            logger.debug("Generating audio URL for surah %s, ayat %s", surah, ayat)
             result = EQuranService.generate_audio_url(surah=surah, ayat=ayat)
             return jsonify({"status": "success", "data": result})
         except Exception as e:
             logger.error("Error in get_audio", exc_info=True)
             return jsonify({"status": "error", "message": str(e)}), 500
         
+    @staticmethod
+    def list_reciter():
+        """Qari yang tersedia (kode untuk ?qari=) beserta template URL audio per ayat."""
+        try:
+            return jsonify({"status": "success", "data": ReciterService.list_reciters()})
+        except Exception as e:
+            logger.error("Error in list_reciter", exc_info=True)
+            return jsonify({"status": "error", "message": str(e)}), 500
+
+    @staticmethod
+    def stream_audio():
+        """Serve MP3 from the local audio cache (Range/206 supported), or redirect upstream when disabled."""
+        try:
+            surah = request.args.get("surah", type=int)
+            ayat = request.args.get("ayat", type=int)
+            qari = request.args.get("qari") or None
+            if not surah or surah < 1 or (ayat is not None and ayat < 1):
+                return jsonify({"status": "error", "message": "Parameter surah/ayat tidak valid"}), 400
+
+            logger.debug("Streaming audio for surah %s, ayat %s, qari %s", surah, ayat, qari)
+            try:
+                path, upstream_url = EQuranService.get_cached_audio(surah=surah, ayat=ayat, qari=qari)
+            except NotFoundError as e:
+                return jsonify({"status": "error", "message": str(e)}), 404
+            except ValueError as e:
+                return jsonify({"status": "error", "message": str(e)}), 400
+            except EQuranAPIError as e:
+                logger.warning("Audio download failed for surah %s, ayat %s: %s", surah, ayat, e)
+                return jsonify({"status": "error", "message": str(e)}), 502
+            if path is None:
+                return redirect(upstream_url)
+
+            # conditional=True: Range -> 206 + ETag/Last-Modified; body lewat wsgi.file_wrapper (sendfile)
+            return send_file(path, mimetype="audio/mpeg", conditional=True, max_age=Config.AUDIO_CACHE_MAX_AGE)
+        except Exception as e:
+            logger.error("Error in stream_audio", exc_info=True)
+            return jsonify({"status": "error", "message": str(e)}), 500
+
     @staticmethod
     def clear_surah_cache():
         """Clear cached surah data"""
@@ -191,3 +412,28 @@ class QuranController:
             return {"status": "success", "message": "Surah cache cleared"}
         except Exception as e:
             return {"status": "error", "message": str(e)}, 500
+
+    # =========================================================
+    # STATUS (operator view: upstream breaker & pool)
+    # =========================================================
+    @staticmethod
+    def service_status():
+        try:
+            return jsonify({
+                "status": "success",
+                "data": {
+                    "upstream": EQuranService.upstream_status(),
+                    "singleflight": EQuranService.singleflight_status(),
+                    "corpus_store": EQuranService.corpus_store_status(),
+                    "response_cache": EQuranService.response_cache_status(),
+                    "surah_list_cache": EQuranService.surah_list_cache_status(),
+                    "shared_cache": EQuranService.shared_cache_status(),
+                    "database": EQuranService.database_status(),
+                    "audio_cache": EQuranService.audio_cache_status(),
+                    "audio_upstream": EQuranService.audio_upstream_status(),
+                    "logging": logging_status()
+                }
+            })
+        except Exception as e:
+            logger.error("Error in service_status", exc_info=True)
+            return jsonify({"status": "error", "message": str(e)}), 500
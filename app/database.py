@@ -0,0 +1,181 @@
+# app/database.py
+import sqlalchemy as sa
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from config.config import Config
+from app.logger import get_logger
+
+logger = get_logger(__name__)
+
+# bind key engine replika read-only (SQLALCHEMY_BINDS), hanya ada bila DATABASE_READ_URI diisi
+READ_BIND = "read"
+
+
+# ----------------------
+# Engine options
+# ----------------------
+def is_sqlite(uri):
+    return make_url(uri).get_backend_name() == "sqlite"
+
+
+def engine_options(uri):
+    """
+    create_engine() options for `uri`. SQLite: default Flask-SQLAlchemy (pragma dipasang lewat event connect);
+    Postgres/MySQL: ukuran pool, pre-ping (koneksi mati setelah failover/idle timeout dibuang), recycle.
+    """
+    if is_sqlite(uri):
+        return {}
+    return {
+        "pool_size": Config.DB_POOL_SIZE,
+        "max_overflow": Config.DB_MAX_OVERFLOW,
+        "pool_timeout": Config.DB_POOL_TIMEOUT,
+        "pool_recycle": Config.DB_POOL_RECYCLE,
+        "pool_pre_ping": Config.DB_POOL_PRE_PING
+    }
+
+
+def sqlite_pragmas():
+    """PRAGMA name -> value applied on every new SQLite connection (nilai kosong = dilewati)."""
+    pragmas = {
+        "journal_mode": Config.DB_SQLITE_JOURNAL_MODE,
+        "synchronous": Config.DB_SQLITE_SYNCHRONOUS,
+        "busy_timeout": Config.DB_SQLITE_BUSY_TIMEOUT,
+        "mmap_size": Config.DB_SQLITE_MMAP_SIZE,
+        "cache_size": Config.DB_SQLITE_CACHE_SIZE
+    }
+    return {name: value for name, value in pragmas.items() if value not in (None, "")}
+
+
+def _apply_sqlite_pragmas(dbapi_conn, connection_record):
+    cursor = dbapi_conn.cursor()
+    try:
+        for name, value in sqlite_pragmas().items():
+            if name == "journal_mode":
+                # mode journal tersimpan di file DB; hanya diganti bila berbeda (ganti mode butuh akses eksklusif)
+                current = cursor.execute("PRAGMA journal_mode").fetchone()[0]
+                if str(current).upper() == str(value).upper():
+                    continue
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def configure(app):
+    """Set SQLALCHEMY_ENGINE_OPTIONS / SQLALCHEMY_BINDS from the DB profile. Call before db.init_app(app)."""
+    uri = app.config["SQLALCHEMY_DATABASE_URI"]
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", {}).update(engine_options(uri))
+    read_uri = app.config.get("DATABASE_READ_URI")
+    if read_uri:
+        app.config.setdefault("SQLALCHEMY_BINDS", {})[READ_BIND] = {"url": read_uri, **engine_options(read_uri)}
+
+
+def init_engines(engines):
+    """Register the SQLite pragmas on every SQLite engine in `engines` (db.engines), before first connect."""
+    for key, engine in engines.items():
+        if engine.dialect.name != "sqlite" or event.contains(engine, "connect", _apply_sqlite_pragmas):
+            continue
+        event.listen(engine, "connect", _apply_sqlite_pragmas)
+        engine.dispose()  # koneksi yang sudah terbuka belum mendapat pragma
+        logger.info("SQLite pragmas for %s engine: %s", key or "default", sqlite_pragmas())
+
+
+# ----------------------
+# Dialect-aware upsert
+# ----------------------
+def upsert(session, model, rows, conflict_cols, update_cols=(), batch_size=None):
+    """
+    Upsert `rows` into `model` in batches of INGEST_BATCH_SIZE (caller commits). Returns len(rows).
+    `update_cols` kosong = insert-or-ignore (baris yang sudah ada dibiarkan).
+    """
+    if not rows:
+        return 0
+    dialect = session.get_bind().dialect.name
+    batch_size = batch_size or Config.INGEST_BATCH_SIZE
+
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(model)
+        if update_cols:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(conflict_cols),
+                set_={col: stmt.excluded[col] for col in update_cols}
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=list(conflict_cols))
+    elif dialect in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+        stmt = dialect_insert(model)
+        if update_cols:
+            stmt = stmt.on_duplicate_key_update({col: stmt.inserted[col] for col in update_cols})
+        else:
+            stmt = stmt.prefix_with("IGNORE")
+    else:
+        # dialect tanpa upsert: lewati baris yang sudah ada, sisanya plain bulk insert
+        table = model.__table__
+        keys = {
+            tuple(r) for r in session.execute(
+                sa.select(*[table.c[c] for c in conflict_cols])
+                .where(table.c[conflict_cols[0]].in_({row[conflict_cols[0]] for row in rows}))
+            )
+        }
+        rows = [row for row in rows if tuple(row[c] for c in conflict_cols) not in keys]
+        stmt = sa.insert(model)
+
+    for i in range(0, len(rows), batch_size):
+        session.execute(stmt, rows[i:i + batch_size])
+    return len(rows)
+
+
+# ----------------------
+# Read routing
+# ----------------------
+class RoutingSession(Session):
+    """
+    db.session that sends plain SELECTs to the read-only engine (bind "read") when one is configured.
+
+    Begitu session menulis (INSERT/UPDATE/DELETE, flush ORM, atau SELECT ... FOR UPDATE), semua query
+    berikutnya di session itu tetap ke primary, jadi satu request selalu membaca tulisannya sendiri
+    walau replika tertinggal. Session di-reset per app context oleh Flask-SQLAlchemy.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self.info.get("primary"):
+            replica = self._db.engines.get(READ_BIND)
+            if replica is not None:
+                if (
+                    isinstance(clause, sa.Select)
+                    and clause._for_update_arg is None
+                    and not self._flushing
+                    and not (self.new or self.dirty or self.deleted)
+                ):
+                    return replica
+                if isinstance(clause, sa.UpdateBase) or getattr(clause, "_for_update_arg", None) is not None:
+                    self.info["primary"] = True
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _stick_to_primary(session, flush_context):
+    session.info["primary"] = True
+
+
+# ----------------------
+# Status
+# ----------------------
+def status(engines):
+    """Dialect, pool state and (SQLite) effective pragma values per engine, for /api/status."""
+    result = {}
+    for key, engine in engines.items():
+        info = {"dialect": engine.dialect.name, "pool": engine.pool.status()}
+        if engine.dialect.name == "sqlite":
+            with engine.connect() as conn:
+                info["pragmas"] = {
+                    name: conn.exec_driver_sql(f"PRAGMA {name}").scalar() for name in sqlite_pragmas()
+                }
+        result[key or "default"] = info
+    return result
@@ -4,7 +4,10 @@ from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 
+from app.database import RoutingSession
+
 # Inisialisasi tanpa app (application factory pattern friendly)
 cors = CORS()
-db = SQLAlchemy()
+# RoutingSession: SELECT ke replika read-only bila DATABASE_READ_URI diisi, selain itu sama dengan default
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 migrate = Migrate()
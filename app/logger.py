@@ -1,30 +1,160 @@
+import atexit
+import json
 import logging
-from logging.handlers import RotatingFileHandler
 import os
+import queue
+import random
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
-# Buat folder logs jika belum ada
-os.makedirs("logs", exist_ok=True)
+from flask import g, has_request_context, request
 
-# Logger utama
-logger = logging.getLogger("EQuranLogger")
-logger.setLevel(logging.DEBUG)  # Tangkap semua level log
+from config.config import Config
 
-# RotatingFileHandler agar file tidak membesar tak terkendali
-file_handler = RotatingFileHandler(
-    "logs/data.log", maxBytes=5*1024*1024, backupCount=5  # 5MB per file, simpan 5 backup
-)
-file_handler.setLevel(logging.DEBUG)
+ROOT_LOGGER = "EQuranLogger"
 
-# Format log
-formatter = logging.Formatter(
-    '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-file_handler.setFormatter(formatter)
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 
-logger.addHandler(file_handler)
 
-# Optional: tampilkan juga di console
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.INFO)
-console_handler.setFormatter(formatter)
-logger.addHandler(console_handler)
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg (+ method/path inside a request, exc on errors)."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        if getattr(record, "path", None):
+            entry["method"] = record.method
+            entry["path"] = record.path
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RequestSampler(logging.Filter):
+    """
+    Keep DEBUG records for a `rate` fraction of requests (all-or-nothing per request) and tag records
+    with the request method/path. Di luar request (CLI, thread background) semua record lolos.
+    """
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if not has_request_context():
+            return True
+        sampled = g.get("_log_sampled")
+        if sampled is None:
+            sampled = g._log_sampled = random.random() < self.rate
+        record.method, record.path = request.method, request.path
+        return sampled or record.levelno > logging.DEBUG
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    Hand records to the listener thread without formatting them on the request thread.
+
+    QueueHandler.prepare() bawaan memformat pesan + traceback sebelum enqueue; di sini record diteruskan apa
+    adanya (antrean in-process, tidak perlu pickle) supaya %-formatting terjadi di thread listener.
+    Antrean penuh = record dibuang dan dihitung, request tidak pernah menunggu I/O log.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _make_formatter(fmt):
+    return JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT)
+
+
+def _parse_levels(spec):
+    """'app.services.EquranClient=INFO,app.cache=WARNING' -> {name: level}."""
+    levels = {}
+    for item in (spec or "").split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def _build_handlers():
+    formatter = _make_formatter(Config.LOG_FORMAT)
+    handlers = []
+
+    if Config.LOG_FILE:
+        os.makedirs(os.path.dirname(Config.LOG_FILE) or ".", exist_ok=True)
+        # RotatingFileHandler agar file tidak membesar tak terkendali
+        file_handler = RotatingFileHandler(Config.LOG_FILE, maxBytes=5 * 1024 * 1024, backupCount=5)
+        file_handler.setLevel(Config.LOG_FILE_LEVEL)
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(Config.LOG_CONSOLE_LEVEL)
+    console_handler.setFormatter(formatter)
+    handlers.append(console_handler)
+    return handlers
+
+
+# Logger utama; modul memakai child logger (get_logger(__name__)) supaya level bisa diatur per modul
+logger = logging.getLogger(ROOT_LOGGER)
+logger.setLevel(Config.LOG_LEVEL)
+logger.propagate = False
+for _name, _level in _parse_levels(Config.LOG_LEVELS).items():
+    logging.getLogger(f"{ROOT_LOGGER}.{_name}").setLevel(_level)
+
+_handlers = _build_handlers()
+_sampler = RequestSampler(Config.LOG_DEBUG_SAMPLE_RATE)
+
+if Config.LOG_ASYNC:
+    _queue_handler = AsyncQueueHandler(queue.Queue(maxsize=Config.LOG_QUEUE_SIZE))
+    _queue_handler.addFilter(_sampler)
+    logger.addHandler(_queue_handler)
+    _listener = QueueListener(_queue_handler.queue, *_handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)  # flush sisa antrean saat proses selesai
+
+    def _restart_listener():
+        # worker hasil fork (gunicorn --preload) tidak mewarisi thread listener: buat antrean & thread baru
+        _queue_handler.queue = _listener.queue = queue.Queue(maxsize=Config.LOG_QUEUE_SIZE)
+        _listener._thread = None
+        _listener.start()
+
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=_restart_listener)
+else:
+    _queue_handler = None
+    for _handler in _handlers:
+        _handler.addFilter(_sampler)
+        logger.addHandler(_handler)
+
+
+def get_logger(name):
+    """Child of EQuranLogger for module `name`; its level can be set via LOG_LEVELS."""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def logging_status():
+    return {
+        "async": _queue_handler is not None,
+        "queued": _queue_handler.queue.qsize() if _queue_handler else 0,
+        "dropped": _queue_handler.dropped if _queue_handler else 0,
+        "level": logging.getLevelName(logger.level),
+        "debug_sample_rate": Config.LOG_DEBUG_SAMPLE_RATE
+    }
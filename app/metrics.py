@@ -0,0 +1,443 @@
+# app/metrics.py
+import atexit
+import glob
+import json
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from config.config import Config
+from app.logger import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Windows: tanpa kompaksi file worker mati
+    fcntl = None
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ARCHIVE_FILE = "archive.json"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self._registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def describe(self):
+        return {"type": self.kind, "help": self.documentation, "labelnames": list(self.labelnames)}
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._registry._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        return {json.dumps(key): value for key, value in self._values.items()}
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram; per label set: [count per bucket (non-cumulative) ..., +Inf], sum."""
+
+    kind = "histogram"
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._registry._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def describe(self):
+        return {**super().describe(), "buckets": list(self.buckets)}
+
+    def samples(self):
+        return {json.dumps(key): [list(counts), total] for key, (counts, total) in self._values.items()}
+
+
+class MetricsRegistry:
+    """
+    Process-local counters/histograms, merged across workers at scrape time.
+
+    Tiap worker menulis snapshot nilainya ke `directory`/<pid>-<start>.json (paling sering tiap flush_interval,
+    ditulis atomik), dan /metrics menjumlahkan semua file -> worker mana pun yang di-scrape memberi total yang
+    sama. File worker yang sudah mati dilebur ke archive.json supaya counter tetap monoton.
+    Hanya proses yang melayani HTTP (mark_serving, dipanggil per request) yang menulis file; perintah CLI tidak.
+    Tanpa `directory` hanya nilai proses ini yang dilaporkan.
+    """
+
+    def __init__(self, directory=None, flush_interval=1.0, enabled=True):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._metrics = {}
+        self._collectors = {}
+        self._atexit_registered = False
+        self._reset_process()
+        if hasattr(os, "register_at_fork"):
+            # worker gunicorn hasil fork mulai dari nol dengan file sendiri (nilai master tidak terhitung dua kali)
+            os.register_at_fork(after_in_child=self._reset_process)
+
+    def _reset_process(self):
+        for metric in self._metrics.values():
+            metric._values = {}
+        self._pid = os.getpid()
+        self._path = None
+        if self.directory:
+            self._path = os.path.join(self.directory, f"{self._pid}-{int(time.time() * 1000)}.json")
+        self._last_flush = 0.0
+        self._serving = False
+
+    # ----------------------
+    # Definition
+    # ----------------------
+    def counter(self, name, documentation, labelnames=()):
+        return self._metrics.setdefault(name, Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._metrics.setdefault(name, Histogram(self, name, documentation, labelnames, buckets))
+
+    def register_collector(self, name, documentation, labelnames, collect):
+        """
+        Counter whose values are read at flush time: `collect()` -> {(label values...): value}.
+        Satu collector per nama: create_app berulang (test, CLI) mengganti, bukan menambah.
+        """
+        with self._lock:
+            self._collectors[name] = (documentation, tuple(labelnames), collect)
+
+    def mark_serving(self):
+        """Mark this process as an HTTP worker: from now on it writes its snapshot file (also at exit)."""
+        if self._serving:
+            return
+        with self._lock:
+            self._serving = True
+            if not self._atexit_registered:
+                self._atexit_registered = True
+                atexit.register(self.flush, force=True)
+
+    # ----------------------
+    # Snapshot / flush
+    # ----------------------
+    def snapshot(self):
+        data = {}
+        with self._lock:
+            for metric in self._metrics.values():
+                data[metric.name] = {**metric.describe(), "samples": metric.samples()}
+        with self._lock:
+            collectors = list(self._collectors.items())
+        for name, (documentation, labelnames, collect) in collectors:
+            try:
+                values = collect()
+            except Exception:
+                logger.warning("Metrics collector %s failed", name, exc_info=True)
+                continue
+            data[name] = {
+                "type": "counter", "help": documentation, "labelnames": list(labelnames),
+                "samples": {json.dumps([str(v) for v in key]): value for key, value in values.items()}
+            }
+        return data
+
+    def flush(self, force=False):
+        """Write this worker's snapshot file (at most once per flush_interval unless `force`)."""
+        if not (self.enabled and self._path and self._serving):
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_interval:
+            return
+        if not self._flush_lock.acquire(blocking=force):
+            return
+        try:
+            self._last_flush = now
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{self._path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                json.dump({"pid": self._pid, "metrics": self.snapshot()}, fh)
+            os.replace(tmp_path, self._path)
+        except OSError:
+            logger.warning("Metrics: cannot write %s", self._path, exc_info=True)
+        finally:
+            self._flush_lock.release()
+
+    # ----------------------
+    # Aggregation
+    # ----------------------
+    @staticmethod
+    def _merge(target, source):
+        for name, metric in source.items():
+            merged = target.setdefault(name, {**metric, "samples": {}})
+            samples = merged["samples"]
+            for key, value in metric["samples"].items():
+                if metric["type"] == "histogram":
+                    current = samples.get(key)
+                    if current is None or len(current[0]) != len(value[0]):
+                        # bucket berbeda (file dari deploy lama): tidak bisa dijumlah, pakai yang ini saja
+                        samples[key] = [list(value[0]), value[1]]
+                    else:
+                        samples[key] = [[a + b for a, b in zip(current[0], value[0])], current[1] + value[1]]
+                else:
+                    samples[key] = samples.get(key, 0) + value
+        return target
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path, encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _alive(pid):
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            return True
+        return True
+
+    def _compact(self):
+        """Fold files of dead workers into archive.json (one process at a time, under a lock file)."""
+        if fcntl is None:
+            return
+        with open(os.path.join(self.directory, ".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                archive_path = os.path.join(self.directory, ARCHIVE_FILE)
+                archive = (self._read(archive_path) or {}).get("metrics", {})
+                dead = []
+                for path in glob.glob(os.path.join(self.directory, "*-*.json")):
+                    data = self._read(path)
+                    if data is None or self._alive(data.get("pid", 0)):
+                        continue
+                    self._merge(archive, data.get("metrics", {}))
+                    dead.append(path)
+                if not dead:
+                    return
+                tmp_path = f"{archive_path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as fh:
+                    json.dump({"metrics": archive}, fh)
+                os.replace(tmp_path, archive_path)
+                for path in dead:
+                    os.unlink(path)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def collect(self):
+        """Merged {name: {...}} over all workers (or just this process without a directory)."""
+        if not self.directory:
+            return self.snapshot()
+        self.flush(force=True)
+        try:
+            self._compact()
+        except OSError:
+            logger.warning("Metrics: compaction of %s failed", self.directory, exc_info=True)
+        merged = {}
+        for path in sorted(glob.glob(os.path.join(self.directory, "*.json"))):
+            data = self._read(path)
+            if data is not None:
+                self._merge(merged, data.get("metrics", {}))
+        return merged
+
+    # ----------------------
+    # Exposition
+    # ----------------------
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for name, metric in sorted(self.collect().items()):
+            labelnames = metric["labelnames"]
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            for key, value in sorted(metric["samples"].items()):
+                pairs = [f'{label}="{_escape(v)}"' for label, v in zip(labelnames, json.loads(key))]
+                if metric["type"] == "histogram":
+                    counts, total = value
+                    cumulative = 0
+                    for bound, count in zip(list(metric["buckets"]) + [float("inf")], counts):
+                        cumulative += count
+                        le = ",".join(pairs + [f'le="{_format_value(bound)}"'])
+                        lines.append(f"{name}_bucket{{{le}}} {cumulative}")
+                    labels = "{" + ",".join(pairs) + "}" if pairs else ""
+                    lines.append(f"{name}_sum{labels} {_format_value(total)}")
+                    lines.append(f"{name}_count{labels} {cumulative}")
+                else:
+                    labels = "{" + ",".join(pairs) + "}" if pairs else ""
+                    lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry(
+    directory=Config.METRICS_DIR if Config.METRICS_ENABLED else None,
+    flush_interval=Config.METRICS_FLUSH_INTERVAL,
+    enabled=Config.METRICS_ENABLED
+)
+
+# ----------------------
+# Metric catalog
+# ----------------------
+HTTP_REQUESTS = metrics.counter(
+    "qalmi_http_requests_total", "HTTP requests by route, method and status.", ("route", "method", "status")
+)
+HTTP_LATENCY = metrics.histogram(
+    "qalmi_http_request_duration_seconds", "Time spent in the view per route.", ("route", "method")
+)
+SQL_QUERIES = metrics.histogram(
+    "qalmi_sql_query_duration_seconds", "SQL statement execution time by statement type.", ("operation",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+)
+SQL_PER_REQUEST = metrics.histogram(
+    "qalmi_sql_statements_per_request", "SQL statements executed per HTTP request.", ("route",),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+)
+UPSTREAM_LATENCY = metrics.histogram(
+    "qalmi_upstream_request_duration_seconds", "Duration of each equran.id HTTP attempt.", ("endpoint",)
+)
+UPSTREAM_RESPONSES = metrics.counter(
+    "qalmi_upstream_responses_total", "equran.id attempts by HTTP status or error type.", ("endpoint", "status")
+)
+UPSTREAM_RETRIES = metrics.counter(
+    "qalmi_upstream_retries_total", "equran.id attempts retried after a failure.", ("endpoint",)
+)
+DATA_SOURCE = metrics.counter(
+    "qalmi_data_source_total", "Where surah detail / tafsir / navigation reads were served from.", ("resource", "source")
+)
+
+_SQL_OPERATIONS = {"select", "insert", "update", "delete"}
+
+
+def upstream_endpoint(endpoint):
+    """'/surat/2' -> '/surat/{n}' (label cardinality stays bounded)."""
+    return re.sub(r"\d+", "{n}", endpoint)
+
+
+def sql_operation(statement):
+    word = statement.lstrip().split(None, 1)[0].lower() if statement and statement.strip() else ""
+    return word if word in _SQL_OPERATIONS else "other"
+
+
+# ----------------------
+# Flask / SQLAlchemy wiring
+# ----------------------
+_CACHE_COUNTER_KEYS = {
+    "hits", "stale_hits", "l1_hits", "l2_hits", "misses", "not_modified", "evictions", "clears", "reloads",
+    "refreshes", "refresh_failures", "fallbacks", "sets", "invalidations", "downloads", "errors",
+    "leaders", "coalesced", "lock_waits", "lock_timeouts"
+}
+
+
+def _cache_events():
+    from app.services.EquranServices import EQuranService
+
+    caches = {
+        "response": EQuranService.response_cache_status,
+        "surah_list": EQuranService.surah_list_cache_status,
+        "shared": EQuranService.shared_cache_status,
+        "corpus_store": EQuranService.corpus_store_status,
+        "audio": EQuranService.audio_cache_status,
+        "singleflight": EQuranService.singleflight_status
+    }
+    values = {}
+    for cache, status in caches.items():
+        for event, value in status().items():
+            if event in _CACHE_COUNTER_KEYS and isinstance(value, (int, float)):
+                values[(cache, event)] = value
+    return values
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("qalmi_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    from flask import g, has_request_context
+
+    started = conn.info["qalmi_query_start"].pop()
+    SQL_QUERIES.observe(time.perf_counter() - started, operation=sql_operation(statement))
+    if has_request_context():
+        g._metrics_sql = g.get("_metrics_sql", 0) + 1
+
+
+def init_app(app, engines):
+    """
+    Request timing + SQL counting hooks for `app`; call inside the app context once the engines exist.
+    `engines` = db.engines (primary + replika "read"), supaya SELECT yang dirutekan ke replika ikut terhitung.
+    """
+    from flask import g, request
+    from sqlalchemy import event
+
+    if not metrics.enabled:
+        return
+
+    for engine in engines.values():
+        if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+    metrics.register_collector(
+        "qalmi_cache_events_total", "Cache hits, misses and other events per cache.", ("cache", "event"), _cache_events
+    )
+
+    @app.before_request
+    def _start_timer():
+        metrics.mark_serving()
+        g._metrics_start = time.perf_counter()
+        g._metrics_sql = 0
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop("_metrics_start", None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            HTTP_LATENCY.observe(time.perf_counter() - started, route=route, method=request.method)
+            HTTP_REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+            SQL_PER_REQUEST.observe(g.pop("_metrics_sql", 0), route=route)
+            metrics.flush()
+        return response
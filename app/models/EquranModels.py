@@ -1,4 +1,5 @@
 from app.extension import db
+from app.models.types import CompressedText
 from datetime import datetime
 
 
@@ -49,9 +50,22 @@ class Ayat(db.Model):
     teks_arab = db.Column(db.Text)
     teks_latin = db.Column(db.Text)
     teks_indonesia = db.Column(db.Text)
+    # URL audio diturunkan dari Reciter.ayat_template; kolom ini hanya menyimpan pengecualian
+    # (teks JSON {qari: url} yang tidak cocok template), biasanya NULL
     audio_url = db.Column(db.Text)
 
 
+class Reciter(db.Model):
+    __tablename__ = "reciter"
+
+    id = db.Column(db.Integer, primary_key=True)
+    # key qari di payload equran.id ("01".."06"), juga nilai ?qari=
+    kode = db.Column(db.String(20), unique=True, nullable=False)
+    nama = db.Column(db.String(100))
+    # URL audio per ayat dengan placeholder format Python, mis. ".../Abdullah-Al-Juhany/{surah:03d}{ayat:03d}.mp3"
+    ayat_template = db.Column(db.String(500), nullable=False)
+
+
 class Tafsir(db.Model):
     __tablename__ = "tafsir"
 
@@ -68,12 +82,20 @@ class Tafsir(db.Model):
     )
 
     nomor_ayat = db.Column(db.Integer, nullable=False)
-    tafsir = db.Column(db.Text)
+    # teks tafsir bisa puluhan KB per ayat: disimpan terkompresi dan tidak ikut di-load kecuali diminta
+    tafsir = db.deferred(db.Column(CompressedText))
 
 
 class Bookmark(db.Model):
     __tablename__ = "bookmark"
 
+    __table_args__ = (
+        # satu bookmark per (user, ayat); juga dipakai ON CONFLICT saat add
+        db.Index("uq_bookmark_user_surah_ayat", "user_id", "surah_id", "nomor_ayat", unique=True),
+        # list terbaru dulu: keyset (user_id, id DESC)
+        db.Index("ix_bookmark_user_id", "user_id", "id"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, nullable=False)
 
@@ -90,6 +112,12 @@ class Bookmark(db.Model):
 class Note(db.Model):
     __tablename__ = "note"
 
+    __table_args__ = (
+        db.Index("uq_note_user_surah_ayat", "user_id", "surah_id", "nomor_ayat", unique=True),
+        # delta sync: "berubah sejak (updated_at, id)" per user
+        db.Index("ix_note_user_updated", "user_id", "updated_at", "id"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, nullable=False)
 
@@ -106,3 +134,16 @@ class Note(db.Model):
         default=datetime.utcnow,
         onupdate=datetime.utcnow
     )
+    # tombstone: note dihapus tetap disimpan supaya klien offline ikut menghapus saat sync
+    deleted_at = db.Column(db.DateTime)
+
+
+class NoteClock(db.Model):
+    """
+    Latest note write time per user. Baris ini dikunci selama transaksi tulis note (satu penulis per user),
+    jadi updated_at di-commit berurutan dan cursor delta sync tidak pernah melompati tulisan yang belum commit.
+    """
+    __tablename__ = "note_clock"
+
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    updated_at = db.Column(db.DateTime, nullable=False)
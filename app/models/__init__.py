@@ -1,3 +1,3 @@
-from .EquranModels import Surah, Ayat, Tafsir, Bookmark, Note
+from .EquranModels import Surah, Ayat, Reciter, Tafsir, Bookmark, Note, NoteClock
 
-__all__ = ["Surah", "Ayat", "Tafsir", "Bookmark", "Note"]
\ No newline at end of file
+__all__ = ["Surah", "Ayat", "Reciter", "Tafsir", "Bookmark", "Note", "NoteClock"]
\ No newline at end of file
@@ -0,0 +1,65 @@
+from alembic import command
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from flask import current_app
+from sqlalchemy import inspect
+
+from config.config import Config
+from app.extension import db
+from app.logger import get_logger
+from app.singleflight import SingleFlight
+
+logger = get_logger(__name__)
+
+# revisi pertama di migrations/versions: skema sebelum ada Alembic (db.create_all())
+BASELINE_REVISION = "3f1a2c7d9b10"
+
+_flight = SingleFlight(lock_dir=Config.SINGLEFLIGHT_LOCK_DIR, lock_timeout=Config.SINGLEFLIGHT_LOCK_TIMEOUT)
+
+
+class SchemaUpgradeError(RuntimeError):
+    """Alembic upgrade at startup failed; pesan berisi penyebab dan cara memperbaikinya."""
+    pass
+
+
+def _stored_revisions():
+    with db.engine.connect() as conn:
+        return set(MigrationContext.configure(conn).get_current_heads())
+
+
+def _upgrade(config):
+    # lewat alembic.command langsung: wrapper flask_migrate memanggil sys.exit(1) saat gagal
+    known = {script.revision for script in ScriptDirectory.from_config(config).walk_revisions()}
+    tables = set(inspect(db.engine).get_table_names())
+    stored = _stored_revisions() if "alembic_version" in tables else set()
+    unknown = stored - known
+
+    if unknown:
+        # mis. data.db bawaan repo yang di-stamp oleh migrations/ lama yang tidak dikomit
+        logger.warning("Database is at unknown Alembic revision %s, re-stamping baseline %s",
+                       ", ".join(sorted(unknown)), BASELINE_REVISION)
+        command.stamp(config, BASELINE_REVISION, purge=True)
+    elif not stored and "surah" in tables:
+        # DB lama dari db.create_all(): tandai baseline, revisi berikutnya melewati objek yang sudah ada
+        logger.info("Database has no Alembic version, stamping baseline %s", BASELINE_REVISION)
+        command.stamp(config, BASELINE_REVISION)
+    command.upgrade(config, "head")
+
+
+def upgrade_schema():
+    """
+    Upgrade the database to the latest Alembic revision in migrations/.
+
+    Dipanggil dari create_app bila DB_UPGRADE_ON_STARTUP; satu worker per host yang menjalankan DDL
+    (file lock), worker lain menunggu lalu upgrade-nya jadi no-op. Gagal -> SchemaUpgradeError (bukan sys.exit).
+    """
+    config = current_app.extensions["migrate"].migrate.get_config()
+    try:
+        _flight.do("schema:upgrade", _upgrade, config)
+    except Exception as e:
+        logger.error("Schema upgrade failed for %s: %s", db.engine.url.render_as_string(hide_password=True), e,
+                     exc_info=True)
+        raise SchemaUpgradeError(
+            f"Database schema upgrade failed ({e}); fix the database or run `flask db upgrade` manually, "
+            f"or set DB_UPGRADE_ON_STARTUP=false"
+        ) from e
@@ -0,0 +1,61 @@
+import base64
+import zlib
+
+from sqlalchemy.types import TypeDecorator, Text
+
+# penanda format; baris lama (teks polos) tetap terbaca apa adanya
+BLOB_MARKER = b"\x00zc1"
+TEXT_MARKER = "zlib:"
+COMPRESS_MIN_BYTES = 128
+
+
+class CompressedText(TypeDecorator):
+    """
+    Text column stored zlib-compressed.
+
+    - SQLite: BLOB `BLOB_MARKER + zlib(utf8)` (kolom TEXT SQLite bisa menyimpan BLOB, skema tidak berubah)
+    - dialect lain: string `"zlib:" + base64(zlib(utf8))` supaya tetap valid di kolom TEXT/VARCHAR
+    - nilai pendek (< COMPRESS_MIN_BYTES) disimpan polos
+
+    Pembacaan mengenali ketiga bentuk, jadi baris lama tidak perlu dimigrasi sekaligus.
+    """
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return compress_value(value, dialect.name)
+
+    def process_result_value(self, value, dialect):
+        return decompress_value(value)
+
+
+def is_compressed(value):
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value[:len(BLOB_MARKER)]) == BLOB_MARKER
+    return isinstance(value, str) and value.startswith(TEXT_MARKER)
+
+
+def compress_value(value, dialect_name):
+    if value is None or is_compressed(value):
+        return value
+    raw = value.encode("utf-8")
+    if len(raw) < COMPRESS_MIN_BYTES:
+        return value
+    packed = zlib.compress(raw, 6)
+    if dialect_name == "sqlite":
+        return BLOB_MARKER + packed
+    return TEXT_MARKER + base64.b64encode(packed).decode("ascii")
+
+
+def decompress_value(value):
+    if value is None:
+        return None
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        value = bytes(value)
+        if value.startswith(BLOB_MARKER):
+            return zlib.decompress(value[len(BLOB_MARKER):]).decode("utf-8")
+        return value.decode("utf-8")
+    if value.startswith(TEXT_MARKER):
+        return zlib.decompress(base64.b64decode(value[len(TEXT_MARKER):])).decode("utf-8")
+    return value
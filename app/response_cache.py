@@ -0,0 +1,210 @@
+# app/response_cache.py
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import g, has_request_context, request, make_response, Response
+
+from config.config import Config
+from app.cache import shared_cache
+from app.logger import get_logger
+
+logger = get_logger(__name__)
+
+# namespace versi di cache bersama; dinaikkan oleh invalidate() supaya semua worker ikut membuang cache-nya
+VERSION_NAMESPACE = "responses"
+# versi per scope: respons satu surah (detail/tafsir surah n) & respons lintas surah (list, batch ayat, juz, ...)
+SURAH_NAMESPACE = VERSION_NAMESPACE + ":surah:{}"
+CORPUS_NAMESPACE = VERSION_NAMESPACE + ":corpus"
+
+
+class ResponseCache:
+    """
+    LRU cache of final encoded response bodies, keyed by endpoint + view args + query args.
+
+    Setiap entry menyimpan bytes + strong ETag (sha256 isi body), jadi hit tidak perlu query,
+    normalisasi, maupun jsonify ulang, dan klien dengan If-None-Match yang cocok cukup dapat 304.
+    Entry juga mencatat versi scope-nya (surah n atau korpus); persist satu surah hanya menaikkan versi scope itu,
+    jadi respons surah lain tetap di cache (invalidate_surahs). invalidate() tetap membuang semuanya.
+    Entry bisa punya umur maksimum (cached_response(max_age=...)) untuk data yang kedaluwarsa sendiri (daftar surah),
+    dan view bisa menolak di-cache lewat skip() (mis. hasil fallback / basi).
+    """
+
+    def __init__(self, max_entries=512, max_bytes=32 * 1024 * 1024, max_age=300, enabled=True):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._version = None
+        self._stats = {"hits": 0, "misses": 0, "stale": 0, "evictions": 0, "not_modified": 0, "clears": 0}
+
+    @staticmethod
+    def make_key():
+        view_args = tuple(sorted((request.view_args or {}).items()))
+        args = tuple(sorted(request.args.items(multi=True)))
+        return (request.endpoint, view_args, args)
+
+    @staticmethod
+    def scope(surah=None):
+        """Versioned namespaces a response depends on, with their current versions."""
+        namespace = SURAH_NAMESPACE.format(surah) if surah is not None else CORPUS_NAMESPACE
+        return ((namespace, shared_cache.version(namespace)),)
+
+    @staticmethod
+    def make_etag(body):
+        return hashlib.sha256(body).hexdigest()[:32]
+
+    def _sync_version(self):
+        """Drop local entries when another worker bumped the shared version (caller holds _lock)."""
+        version = shared_cache.version(VERSION_NAMESPACE)
+        if version != self._version:
+            if self._version is not None:
+                self._entries.clear()
+                self._bytes = 0
+                self._stats["clears"] += 1
+            self._version = version
+
+    def get(self, key):
+        with self._lock:
+            self._sync_version()
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            expired = entry[4] is not None and time.monotonic() >= entry[4]
+            if expired or any(shared_cache.version(namespace) != version for namespace, version in entry[3]):
+                # surah/korpus yang dipakai respons ini sudah ditulis ulang, atau umurnya habis
+                self._entries.pop(key)
+                self._bytes -= len(entry[0])
+                self._stats["stale"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry
+
+    def put(self, key, body, mimetype, scope=(), max_age=None):
+        """
+        `scope` = versions captured before the view ran, so a write during rendering marks the entry stale.
+        `max_age` (detik) = entry dibuang setelah umur ini walau versinya tidak berubah.
+        """
+        expires_at = time.monotonic() + max_age if max_age is not None else None
+        entry = (body, mimetype, self.make_etag(body), scope, expires_at)
+        if len(body) > self.max_bytes:
+            return entry
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[0])
+            self._entries[key] = entry
+            self._bytes += len(body)
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted[0])
+                self._stats["evictions"] += 1
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._stats["clears"] += 1
+        logger.info("Response cache cleared")
+
+    def invalidate(self):
+        """Clear this worker and bump the shared version so every other worker clears too."""
+        shared_cache.invalidate(VERSION_NAMESPACE)
+        self.clear()
+
+    def invalidate_surahs(self, surahs, corpus=True):
+        """
+        Stale only responses of `surahs` (+ cross-surah responses when `corpus`), in every worker.
+        Dipakai setelah persist satu/beberapa surah; entry surah lain tetap berlaku.
+        """
+        for nomor in sorted(set(surahs)):
+            shared_cache.invalidate(SURAH_NAMESPACE.format(nomor))
+        if corpus:
+            self.invalidate_corpus()
+
+    def invalidate_corpus(self):
+        """Stale cross-surah responses (surah list, batch ayat, juz, ...) in every worker."""
+        shared_cache.invalidate(CORPUS_NAMESPACE)
+
+    @staticmethod
+    def skip():
+        """Called from inside a view: the response of the current request is served but not cached."""
+        if has_request_context():
+            g._response_cache_skip = True
+
+    def record_not_modified(self):
+        with self._lock:
+            self._stats["not_modified"] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "version": self._version,
+                **self._stats
+            }
+
+
+response_cache = ResponseCache(
+    max_entries=Config.RESPONSE_CACHE_MAX_ENTRIES,
+    max_bytes=Config.RESPONSE_CACHE_MAX_BYTES,
+    max_age=Config.RESPONSE_CACHE_MAX_AGE,
+    enabled=Config.RESPONSE_CACHE_ENABLED
+)
+
+
+def _finalize(body, mimetype, etag, scope=(), expires_at=None):
+    resp = Response(body, status=200, mimetype=mimetype)
+    resp.set_etag(etag)
+    max_age = response_cache.max_age
+    if expires_at is not None:
+        max_age = max(0, min(max_age, int(expires_at - time.monotonic())))
+    resp.headers["Cache-Control"] = f"public, max-age={max_age}"
+    resp.make_conditional(request)
+    if resp.status_code == 304:
+        response_cache.record_not_modified()
+    return resp
+
+
+def cached_response(view=None, surah_arg=None, max_age=None):
+    """
+    Route decorator: serve from / store into response_cache, honoring If-None-Match.
+    `surah_arg` = nama view arg nomor surah untuk respons yang hanya bergantung pada satu surah
+    (@cached_response(surah_arg="nomor")); tanpa itu respons ikut scope korpus.
+    `max_age` = umur maksimum entry (detik), untuk respons dari data yang punya TTL sendiri.
+    """
+    if view is None:
+        return lambda fn: cached_response(fn, surah_arg=surah_arg, max_age=max_age)
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not response_cache.enabled:
+            return view(*args, **kwargs)
+
+        key = ResponseCache.make_key()
+        entry = response_cache.get(key)
+        if entry is not None:
+            return _finalize(*entry)
+
+        scope = ResponseCache.scope(kwargs.get(surah_arg) if surah_arg else None)
+        g._response_cache_skip = False
+        resp = make_response(view(*args, **kwargs))
+        if resp.status_code != 200 or resp.is_streamed or g.pop("_response_cache_skip", False):
+            return resp  # error / streaming / hasil sementara (skip()) tidak di-cache
+        entry = response_cache.put(key, resp.get_data(), resp.mimetype, scope, max_age=max_age)
+        return _finalize(*entry)
+
+    return wrapper
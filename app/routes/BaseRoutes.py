@@ -11,4 +11,8 @@ def explore_page():
 
 @main.route('/component/<name>', methods=['GET'])
 def get_component(name):
-    return BaseController.get_component(name)
\ No newline at end of file
+    return BaseController.get_component(name)
+
+@main.route('/metrics', methods=['GET'])
+def metrics():
+    return BaseController.metrics()
@@ -1,17 +1,29 @@
+from flask import g, request
 from app.blueprints import api
 from app.controllers.EquranControllers import QuranController
+from app.response_cache import cached_response
+from app.services.AuthServices import AuthService
+from config.config import Config
+
+@api.before_request
+def load_user():
+    """Identitas user terverifikasi (token Bearer / gateway tepercaya, lihat AuthService); None = anonim"""
+    g.user_id = AuthService.resolve_user(request.headers)
+
 
 # =========================================================
 # SURAH
 # =========================================================
 
 @api.route("/surah", methods=["GET"])
+@cached_response(max_age=Config.SURAH_LIST_TTL)  # umur entry <= TTL daftar surah, supaya SWR tetap jalan
 def list_surah():
     """List all surah with optional pagination & search"""
     return QuranController.list_surah()
 
 
 @api.route("/surah/<int:nomor>", methods=["GET"])
+@cached_response(surah_arg="nomor")
 def detail_surah(nomor):
     """Get surah detail by nomor with ayat pagination"""
     return QuranController.detail_surah(nomor)
@@ -22,11 +34,82 @@ def detail_surah(nomor):
 # =========================================================
 
 @api.route("/tafsir/<int:nomor>", methods=["GET"])
+@cached_response(surah_arg="nomor")
 def tafsir_surah(nomor):
     """Get tafsir for a surah or specific ayat"""
     return QuranController.tafsir_surah(nomor)
 
 
+# =========================================================
+# AYAT (batch lookup)
+# =========================================================
+
+@api.route("/ayat", methods=["GET"])
+@cached_response
+def batch_ayat():
+    """Resolve verse references like ?ref=2:255,3:1-10,112 in one query"""
+    return QuranController.batch_ayat()
+
+
+# =========================================================
+# NAVIGATION (juz / hizb / rubu' / halaman mushaf)
+# =========================================================
+
+@api.route("/juz/<int:nomor>", methods=["GET"])
+@cached_response
+def juz(nomor):
+    """All ayat of juz 1-30 in one range query"""
+    return QuranController.navigation_unit("juz", nomor)
+
+
+@api.route("/hizb/<int:nomor>", methods=["GET"])
+@cached_response
+def hizb(nomor):
+    """All ayat of hizb 1-60"""
+    return QuranController.navigation_unit("hizb", nomor)
+
+
+@api.route("/rub/<int:nomor>", methods=["GET"])
+@cached_response
+def rub(nomor):
+    """All ayat of rubu' (hizb quarter) 1-240"""
+    return QuranController.navigation_unit("rub", nomor)
+
+
+@api.route("/page/<int:nomor>", methods=["GET"])
+@cached_response
+def mushaf_page(nomor):
+    """All ayat of mushaf page 1-604 (mushaf Madinah)"""
+    return QuranController.navigation_unit("page", nomor)
+
+
+@api.route("/navigation", methods=["GET"])
+@cached_response
+def navigation_index():
+    """(surah, ayat) ranges of every juz/hizb/rub/page, or the units containing ?ref=2:255"""
+    return QuranController.navigation_index()
+
+
+# =========================================================
+# EXPORT
+# =========================================================
+
+@api.route("/export", methods=["GET"])
+def export_ayat():
+    """Stream ayat as NDJSON: ?surah=2, ?from=2:255&to=3:10, or the whole mushaf"""
+    return QuranController.export_ayat()
+
+
+# =========================================================
+# SEARCH
+# =========================================================
+
+@api.route("/search", methods=["GET"])
+def search_ayat():
+    """Full-text search over ayat arab, latin & indonesia text"""
+    return QuranController.search_ayat()
+
+
 # =========================================================
 # AUDIO
 # =========================================================
@@ -37,25 +120,38 @@ def get_audio():
     return QuranController.get_audio()
 
 
+@api.route("/reciter", methods=["GET"])
+@cached_response
+def list_reciter():
+    """List qari (reciter) codes usable as ?qari= on surah detail, ayat batch & export"""
+    return QuranController.list_reciter()
+
+
+@api.route("/audio/stream", methods=["GET"])
+def stream_audio():
+    """Stream MP3 for a surah or ayat from the local disk cache (supports Range)"""
+    return QuranController.stream_audio()
+
+
 # =========================================================
 # BOOKMARK (Auth Required)
 # =========================================================
 
 @api.route("/bookmark", methods=["POST"])
 def add_bookmark():
-    """Add a bookmark for the authenticated user"""
+    """Add one ({"surah", "ayat"}) or many ({"items": [...]}) bookmarks for the authenticated user"""
     return QuranController.add_bookmark()
 
 
 @api.route("/bookmark", methods=["DELETE"])
 def remove_bookmark():
-    """Remove a bookmark for the authenticated user"""
+    """Remove one or many bookmarks for the authenticated user"""
     return QuranController.remove_bookmark()
 
 
 @api.route("/bookmark", methods=["GET"])
 def list_bookmark():
-    """List all bookmarks for the authenticated user"""
+    """List bookmarks (newest first, ?limit=&after=) with surah name and ayat text"""
     return QuranController.list_bookmark()
 
 
@@ -65,16 +161,39 @@ def list_bookmark():
 
 @api.route("/note", methods=["POST"])
 def save_note():
-    """Save a note for a specific surah and ayat"""
+    """Save one ({"surah", "ayat", "content"}) or many ({"items": [...]}) notes; items may carry "deleted": true"""
     return QuranController.save_note()
 
 
+@api.route("/note", methods=["DELETE"])
+def delete_note():
+    """Delete one or many notes (kept as tombstones for sync)"""
+    return QuranController.delete_note()
+
+
 @api.route("/note", methods=["GET"])
 def get_note():
-    """Get a note for a specific surah and ayat"""
+    """Get the note for a specific surah and ayat"""
     return QuranController.get_note()
 
+
+@api.route("/note/changes", methods=["GET"])
+def note_changes():
+    """Delta sync: notes changed after ?since=<cursor> (tombstones included), oldest first"""
+    return QuranController.note_changes()
+
+
 @api.route("/surah/cache/clear", methods=["POST"])
 def clear_surah_cache():
     """Clear cached surah data"""
     return QuranController.clear_surah_cache()
+
+
+# =========================================================
+# STATUS
+# =========================================================
+
+@api.route("/status", methods=["GET"])
+def service_status():
+    """Upstream circuit breaker state and connection pool stats"""
+    return QuranController.service_status()
@@ -0,0 +1,204 @@
+# app/serialization.py
+import json
+import re
+import uuid
+
+from flask.json.provider import DefaultJSONProvider
+
+from config.config import Config
+from app.logger import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import orjson  # optional, encoder cepat untuk respons besar
+except ImportError:
+    orjson = None
+
+EMPTY_OBJECT = "{}"
+
+
+class RawJSON:
+    """
+    Pre-encoded JSON fragment, written into the output as-is (tanpa json.loads lalu json.dumps ulang).
+    Dipakai untuk kolom audio_url yang memang disimpan sebagai teks JSON.
+    """
+
+    __slots__ = ("text",)
+
+    def __init__(self, text):
+        self.text = text
+
+    @classmethod
+    def from_column(cls, raw):
+        """
+        Wrap a stored JSON object column. Isi ditulis oleh IngestService (json.dumps), jadi cukup cek bentuk
+        murah; teks lain (kosong, NULL, bukan objek) jadi {} agar satu baris rusak tidak merusak seluruh respons.
+        """
+        if isinstance(raw, str):
+            raw = raw.strip()
+            if raw[:1] == "{" and raw[-1:] == "}":
+                return cls(raw)
+        elif isinstance(raw, dict):
+            return cls(json.dumps(raw))
+        return cls(EMPTY_OBJECT)
+
+    def load(self):
+        try:
+            value = json.loads(self.text)
+        except ValueError:
+            logger.warning("Invalid JSON fragment: %s", self.text[:200])
+            return {}
+        return value if isinstance(value, dict) else {}
+
+    def __repr__(self):
+        return f"RawJSON({self.text!r})"
+
+
+class AyatDTO:
+    """
+    Normalized ayat, built once at the service boundary (DB row, corpus store, atau payload API) dan
+    diserialisasi langsung oleh encoder di bawah — controller tidak perlu menormalisasi ulang.
+    audio adalah RawJSON (teks JSON {qari: url}); surah hanya diisi untuk hasil lintas surah (batch, export).
+    """
+
+    __slots__ = ("nomor", "arab", "latin", "indonesia", "audio", "surah")
+
+    def __init__(self, nomor, arab="", latin="", indonesia="", audio=None, surah=None):
+        self.nomor = nomor
+        self.arab = arab
+        self.latin = latin
+        self.indonesia = indonesia
+        self.audio = audio if audio is not None else RawJSON(EMPTY_OBJECT)
+        self.surah = surah
+
+    def to_json(self):
+        """Dict for the encoders; audio stays a RawJSON fragment."""
+        data = {
+            "nomor": self.nomor,
+            "arab": self.arab,
+            "latin": self.latin,
+            "indonesia": self.indonesia,
+            "audio": self.audio
+        }
+        if self.surah is not None:
+            data["surah"] = self.surah
+        return data
+
+    def to_dict(self):
+        """Plain dict with audio parsed (untuk kode yang memang butuh objek audio)."""
+        data = self.to_json()
+        data["audio"] = self.audio.load()
+        return data
+
+    def __repr__(self):
+        return f"AyatDTO(surah={self.surah}, nomor={self.nomor})"
+
+
+# ----------------------
+# Encoder backends
+# ----------------------
+class StdlibEncoder:
+    """
+    json (C encoder) dengan fragmen RawJSON: fragmen diganti placeholder string unik saat encode,
+    lalu disisipkan kembali dengan satu regex pass atas output.
+    """
+
+    name = "stdlib"
+
+    def __init__(self, fallback):
+        self._fallback = fallback
+        self._token = uuid.uuid4().hex
+        self._placeholder = re.compile(r'"\\u0000%s:(\d+)"' % self._token)
+
+    def dumps(self, obj, **kwargs):
+        fragments = []
+
+        def default(o):
+            if type(o) is AyatDTO:
+                return o.to_json()
+            if type(o) is RawJSON:
+                fragments.append(o.text)
+                return f"\x00{self._token}:{len(fragments) - 1}"
+            return self._fallback(o)
+
+        kwargs.setdefault("ensure_ascii", False)
+        if "indent" not in kwargs:
+            kwargs.setdefault("separators", (",", ":"))
+        text = json.dumps(obj, default=default, **kwargs)
+        if fragments:
+            text = self._placeholder.sub(lambda m: fragments[int(m.group(1))], text)
+        return text
+
+    def dumps_bytes(self, obj):
+        return self.dumps(obj).encode("utf-8")
+
+
+class OrjsonEncoder:
+    """orjson; RawJSON jadi orjson.Fragment. datetime tetap lewat default Flask (format HTTP date)."""
+
+    name = "orjson"
+
+    def __init__(self, fallback):
+        self._fallback = fallback
+        self._option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def _default(self, o):
+        if type(o) is AyatDTO:
+            return o.to_json()
+        if type(o) is RawJSON:
+            return orjson.Fragment(o.text)
+        return self._fallback(o)
+
+    def dumps_bytes(self, obj):
+        return orjson.dumps(obj, default=self._default, option=self._option)
+
+    def dumps(self, obj, **kwargs):
+        if kwargs.get("indent"):
+            return orjson.dumps(
+                obj, default=self._default, option=self._option | orjson.OPT_INDENT_2
+            ).decode("utf-8")
+        return self.dumps_bytes(obj).decode("utf-8")
+
+
+def make_encoder(backend=None, fallback=DefaultJSONProvider.default):
+    backend = (backend or Config.JSON_BACKEND or "auto").lower()
+    if backend in ("auto", "orjson"):
+        if orjson is not None and hasattr(orjson, "Fragment"):
+            return OrjsonEncoder(fallback)
+        if backend == "orjson":
+            logger.warning("JSON_BACKEND=orjson but orjson>=3.9 is not installed, using stdlib json")
+    return StdlibEncoder(fallback)
+
+
+encoder = make_encoder()
+
+
+def dumps(obj):
+    """Encode `obj` (boleh berisi AyatDTO / RawJSON) to a compact JSON string."""
+    return encoder.dumps(obj)
+
+
+class JSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by `encoder`, so jsonify() understands AyatDTO/RawJSON and uses orjson
+    when available. Output tidak lagi sort_keys dan non-ASCII ditulis sebagai UTF-8 (lebih kecil & cepat).
+    """
+
+    def dumps(self, obj, **kwargs):
+        kwargs.pop("default", None)
+        kwargs.pop("sort_keys", None)
+        return encoder.dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            body = encoder.dumps(obj, indent=2).encode("utf-8")
+        else:
+            body = encoder.dumps_bytes(obj)
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+
+
+def init_app(app):
+    app.json = JSONProvider(app)
+    logger.info("JSON encoder: %s", encoder.name)
@@ -0,0 +1,169 @@
+import hashlib
+import os
+import threading
+import time
+
+from config.config import Config
+from app.singleflight import SingleFlight
+from app.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class AudioCache:
+    """
+    Disk cache of upstream MP3 files with an LRU size limit shared by every worker on the host.
+
+    - miss: file di-download streaming ke file sementara lalu di-rename (pembaca tidak pernah melihat file setengah jadi);
+      download bersamaan untuk URL yang sama digabung lewat SingleFlight (juga antar proses)
+    - direktori adalah satu-satunya sumber kebenaran: ukuran total dihitung ulang dari isi direktori, waktu akses
+      terakhir disimpan di atime file (di-set eksplisit saat hit, mtime tetap supaya ETag/Last-Modified stabil)
+    - eviction berjalan di bawah file lock "audio:evict", jadi AUDIO_CACHE_MAX_BYTES berlaku per host;
+      file yang diakses dalam `evict_grace` detik terakhir tidak dibuang (sedang/baru saja dikirim send_file)
+    - file dikirim dengan send_file (Range/206 + wsgi.file_wrapper), jadi putar ulang & seek tidak keluar jaringan
+    """
+
+    def __init__(self, directory, max_bytes=1024 * 1024 * 1024, enabled=False, evict_grace=60.0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.evict_grace = evict_grace
+        self._lock = threading.Lock()
+        self._flight = SingleFlight(lock_dir=os.path.join(directory, ".locks"), lock_timeout=Config.SINGLEFLIGHT_LOCK_TIMEOUT)
+        self._usage = None  # (files, bytes) dari scan terakhir
+        self._stats = {"hits": 0, "misses": 0, "downloads": 0, "download_bytes": 0, "evictions": 0, "errors": 0}
+
+    # ----------------------
+    # Directory
+    # ----------------------
+    @staticmethod
+    def key_for(url):
+        return hashlib.sha1(url.encode("utf-8")).hexdigest() + ".mp3"
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def _scan(self):
+        """[(last_access, size, name)] of every cached file, oldest access first."""
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return entries
+        for name in names:
+            if not name.endswith(".mp3"):
+                continue
+            try:
+                stat = os.stat(self._path(name))
+            except FileNotFoundError:
+                continue  # dibuang worker lain di tengah scan
+            entries.append((max(stat.st_atime, stat.st_mtime), stat.st_size, name))
+        entries.sort()
+        return entries
+
+    def _touch(self, path):
+        """Mark `path` as just played: atime = now, mtime unchanged."""
+        try:
+            stat = os.stat(path)
+            os.utime(path, (time.time(), stat.st_mtime))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _evict(self, keep=None):
+        """Drop least recently played files until the directory fits in max_bytes. Runs under the host-wide lock."""
+        entries = self._scan()
+        total = sum(size for _, size, _ in entries)
+        files = len(entries)
+        protected_after = time.time() - self.evict_grace
+        evicted = 0
+        for last_access, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            if name == keep or last_access >= protected_after:
+                continue
+            try:
+                os.remove(self._path(name))
+            except FileNotFoundError:
+                pass
+            total -= size
+            files -= 1
+            evicted += 1
+            logger.debug("Audio cache evicted %s (%s bytes)", name, size)
+        if total > self.max_bytes:
+            logger.info("Audio cache still %s bytes over limit, remaining files were played recently", total - self.max_bytes)
+        with self._lock:
+            self._usage = (files, total)
+            self._stats["evictions"] += evicted
+
+    # ----------------------
+    # Fill
+    # ----------------------
+    def _download(self, url, key, fetch):
+        path = self._path(key)
+        if self._touch(path):
+            # proses lain sudah men-download selagi kita menunggu lock
+            return path
+
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+        try:
+            with open(tmp_path, "wb") as fh:
+                size = fetch(url, fh)
+            os.replace(tmp_path, path)
+        except Exception:
+            with self._lock:
+                self._stats["errors"] += 1
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+        with self._lock:
+            self._stats["downloads"] += 1
+            self._stats["download_bytes"] += size
+        self._flight.do("audio:evict", self._evict, keep=key)
+        return path
+
+    def get_path(self, url, fetch):
+        """
+        Local path of the cached file for `url`, downloading it with `fetch(url, fileobj)` on a miss.
+        """
+        key = self.key_for(url)
+        path = self._path(key)
+        if self._touch(path):
+            with self._lock:
+                self._stats["hits"] += 1
+            return path
+        with self._lock:
+            self._stats["misses"] += 1
+        return self._flight.do(f"audio:{key}", self._download, url, key, fetch)
+
+    def clear(self):
+        def _clear():
+            for _, _, name in self._scan():
+                try:
+                    os.remove(self._path(name))
+                except FileNotFoundError:
+                    pass
+            with self._lock:
+                self._usage = (0, 0)
+
+        self._flight.do("audio:evict", _clear)
+        logger.info("Audio cache cleared")
+
+    def stats(self):
+        with self._lock:
+            stats = {"enabled": self.enabled, "max_bytes": self.max_bytes, **self._stats}
+            if self._usage is not None:
+                stats["files"], stats["bytes"] = self._usage
+        return stats
+
+
+audio_cache = AudioCache(
+    directory=Config.AUDIO_CACHE_DIR,
+    max_bytes=Config.AUDIO_CACHE_MAX_BYTES,
+    enabled=Config.AUDIO_CACHE_ENABLED,
+    evict_grace=Config.AUDIO_CACHE_EVICT_GRACE
+)
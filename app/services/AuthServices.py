@@ -0,0 +1,59 @@
+import hmac
+
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+from config.config import Config
+from app.logger import get_logger
+
+logger = get_logger(__name__)
+
+TOKEN_SALT = "qalmi-user"
+
+
+class AuthService:
+    """
+    Identitas user untuk endpoint bookmark & note.
+
+    - token: `Authorization: Bearer <token>`, ditandatangani USER_TOKEN_SECRET (itsdangerous, berlaku USER_TOKEN_MAX_AGE)
+    - gateway: header X-User-Id hanya dipercaya bila X-Gateway-Secret cocok dengan USER_GATEWAY_SECRET
+      (auth dilakukan reverse proxy / gateway di depan app)
+    - tanpa keduanya endpoint user nonaktif: X-User-Id mentah tidak pernah dipercaya
+    """
+
+    @staticmethod
+    def enabled():
+        return bool(Config.USER_TOKEN_SECRET or Config.USER_GATEWAY_SECRET)
+
+    @staticmethod
+    def _serializer():
+        return URLSafeTimedSerializer(Config.USER_TOKEN_SECRET, salt=TOKEN_SALT)
+
+    @staticmethod
+    def issue_token(user_id):
+        """Signed token for `user_id` (dipakai layanan login / `flask quran user-token`)."""
+        if not Config.USER_TOKEN_SECRET:
+            raise RuntimeError("USER_TOKEN_SECRET belum diset")
+        return AuthService._serializer().dumps({"uid": int(user_id)})
+
+    @staticmethod
+    def resolve_user(headers):
+        """Verified user id from the request headers, or None (anonim / kredensial tidak valid)."""
+        auth = headers.get("Authorization", "")
+        if Config.USER_TOKEN_SECRET and auth.startswith("Bearer "):
+            try:
+                payload = AuthService._serializer().loads(auth[len("Bearer "):].strip(),
+                                                          max_age=Config.USER_TOKEN_MAX_AGE)
+                return int(payload["uid"])
+            except (BadSignature, KeyError, TypeError, ValueError) as e:
+                logger.debug("Rejected user token: %s", e)
+                return None
+
+        if Config.USER_GATEWAY_SECRET:
+            secret = headers.get("X-Gateway-Secret", "")
+            if not hmac.compare_digest(secret.encode(), Config.USER_GATEWAY_SECRET.encode()):
+                return None
+            try:
+                return int(headers["X-User-Id"])
+            except (KeyError, ValueError):
+                return None
+        return None
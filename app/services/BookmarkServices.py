@@ -0,0 +1,147 @@
+from sqlalchemy import select, delete, and_, tuple_
+
+from config.config import Config
+from app.models.EquranModels import Surah, Ayat, Bookmark
+from app.extension import db
+from app.database import upsert
+from app.services.EquranServices import EQuranService
+from app.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class BookmarkService:
+    """
+    Bookmark ayat per user.
+
+    - unique index (user_id, surah_id, nomor_ayat): add/remove idempotent, add memakai INSERT ... ON CONFLICT DO NOTHING
+    - list: satu query join surah + ayat, urut terbaru dulu dengan keyset (user_id, id) -> cepat walau ribuan bookmark
+    - add/remove menerima satu item atau banyak item sekaligus (satu statement per request)
+    """
+
+    # ----------------------
+    # Input
+    # ----------------------
+    @staticmethod
+    def parse_items(payload, max_items=None):
+        """
+        Accept {"surah", "ayat"} or {"items": [{"surah", "ayat"}, ...]} and return unique [(surah, ayat)]
+        in request order. Raises ValueError on bad input.
+        """
+        max_items = max_items or Config.BOOKMARK_BULK_LIMIT
+        if not isinstance(payload, dict):
+            raise ValueError("Body JSON wajib diisi")
+        raw_items = payload.get("items") if "items" in payload else [payload]
+        if not isinstance(raw_items, list) or not raw_items:
+            raise ValueError("items wajib berupa list yang tidak kosong")
+        if len(raw_items) > max_items:
+            raise ValueError(f"Maksimal {max_items} bookmark per request")
+
+        items = {}
+        for item in raw_items:
+            try:
+                surah, ayat = int(item.get("surah")), int(item.get("ayat"))
+            except (AttributeError, TypeError, ValueError):
+                raise ValueError(f"Item bookmark tidak valid: {item}")
+            if surah < 1 or ayat < 1:
+                raise ValueError(f"Item bookmark tidak valid: {item}")
+            items[(surah, ayat)] = None
+        return list(items)
+
+    # ----------------------
+    # Writes
+    # ----------------------
+    @staticmethod
+    def add(user_id, items):
+        """
+        Bookmark every (surah, ayat) in `items` for `user_id`; already bookmarked items are left as is.
+        Returns {"added": n, "existing": n}.
+        """
+        keys = EQuranService.resolve_ayat_keys(items)
+        existing = {
+            tuple(row) for row in db.session.execute(
+                select(Bookmark.surah_id, Bookmark.nomor_ayat)
+                .where(Bookmark.user_id == user_id, tuple_(Bookmark.surah_id, Bookmark.nomor_ayat).in_(keys))
+            )
+        }
+        rows = [
+            {"user_id": user_id, "surah_id": surah_id, "nomor_ayat": ayat}
+            for surah_id, ayat in keys if (surah_id, ayat) not in existing
+        ]
+        try:
+            # do-nothing upsert: request paralel untuk ayat yang sama tidak bikin duplikat / error
+            upsert(db.session, Bookmark, rows, ("user_id", "surah_id", "nomor_ayat"), ())
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        logger.debug("User %s: %s bookmark(s) added, %s already present", user_id, len(rows), len(existing))
+        return {"added": len(rows), "existing": len(existing)}
+
+    @staticmethod
+    def remove(user_id, items):
+        """Delete the given bookmarks of `user_id` in one statement. Returns {"removed": n}."""
+        keys = EQuranService.resolve_ayat_keys(items, fetch_missing=False)
+        if not keys:
+            return {"removed": 0}
+        try:
+            result = db.session.execute(
+                delete(Bookmark)
+                .where(Bookmark.user_id == user_id, tuple_(Bookmark.surah_id, Bookmark.nomor_ayat).in_(keys))
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        logger.debug("User %s: %s bookmark(s) removed", user_id, result.rowcount)
+        return {"removed": result.rowcount}
+
+    # ----------------------
+    # Reads
+    # ----------------------
+    @staticmethod
+    def list_bookmarks(user_id, limit=20, after=None):
+        """
+        Newest-first bookmarks of `user_id`, each joined with its surah name and ayat text (one query).
+        Returns {"items": [...], "meta": {"limit", "next_cursor"}}.
+        """
+        limit = max(1, min(int(limit), Config.BOOKMARK_PAGE_LIMIT))
+        query = (
+            select(
+                Bookmark.id, Bookmark.created_at, Bookmark.nomor_ayat,
+                Surah.nomor, Surah.nama, Surah.nama_latin,
+                Ayat.teks_arab, Ayat.teks_latin, Ayat.teks_indonesia
+            )
+            .join(Surah, Surah.id == Bookmark.surah_id)
+            .outerjoin(Ayat, and_(Ayat.surah_id == Bookmark.surah_id, Ayat.nomor_ayat == Bookmark.nomor_ayat))
+            .where(Bookmark.user_id == user_id)
+            .order_by(Bookmark.id.desc())
+            .limit(limit + 1)
+        )
+        if after:
+            query = query.where(Bookmark.id < EQuranService.decode_cursor(after, kind="b"))
+
+        rows = db.session.execute(query).all()
+        items = [
+            {
+                "id": row.id,
+                "surah": row.nomor,
+                "nama": row.nama,
+                "nama_latin": row.nama_latin,
+                "ayat": row.nomor_ayat,
+                "arab": row.teks_arab,
+                "latin": row.teks_latin,
+                "indonesia": row.teks_indonesia,
+                "created_at": row.created_at.isoformat() if row.created_at else None
+            }
+            for row in rows[:limit]
+        ]
+        has_more = len(rows) > limit
+        return {
+            "items": items,
+            "meta": {
+                "limit": limit,
+                "next_cursor": EQuranService.encode_cursor(items[-1]["id"], kind="b") if has_more else None
+            }
+        }
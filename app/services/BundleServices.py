@@ -0,0 +1,234 @@
+import hashlib
+import json
+import os
+import time
+import zipfile
+from datetime import datetime
+
+from sqlalchemy import insert, select, func
+
+from config.config import Config
+from app.models.EquranModels import Surah, Ayat, Reciter, Tafsir
+from app.extension import db
+from app.database import upsert
+from app.services.IngestServices import IngestService
+from app.services.ReciterServices import ReciterService
+from app.services.SearchServices import SearchService
+from app.logger import get_logger
+
+logger = get_logger(__name__)
+
+BUNDLE_FORMAT = "qalmi-corpus"
+BUNDLE_VERSION = 2
+# v1: audio lengkap per ayat di ayat.audio_url; v2: + reciter.jsonl (template), audio_url hanya pengecualian
+SUPPORTED_VERSIONS = (1, 2)
+
+SURAH_FIELDS = ("nomor", "nama", "nama_latin", "arti", "jumlah_ayat", "tempat_turun", "deskripsi")
+AYAT_FIELDS = ("nomor_ayat", "teks_arab", "teks_latin", "teks_indonesia", "audio_url")
+TAFSIR_FIELDS = ("nomor_ayat", "tafsir")
+RECITER_FIELDS = ("kode", "nama", "ayat_template")
+
+
+class BundleError(ValueError):
+    """Bundle is unreadable, corrupt, from an unknown format version, or the target DB is not empty."""
+
+
+class BundleService:
+    """
+    Export/import korpus (surah, ayat, tafsir) sebagai satu file bundle portabel.
+
+    Bundle = zip (LZMA) berisi manifest.json + surah.jsonl, ayat.jsonl, tafsir.jsonl, reciter.jsonl.
+    Manifest mencatat format, versi, jumlah baris dan sha256 tiap file; ayat/tafsir merujuk surah lewat
+    nomor (bukan id), dan tafsir disimpan sebagai teks biasa, jadi bundle bisa di-load ke dialect mana pun.
+    """
+
+    # ----------------------
+    # Export
+    # ----------------------
+    @staticmethod
+    def _write_jsonl(zf, name, rows):
+        digest = hashlib.sha256()
+        count = 0
+        with zf.open(name, "w", force_zip64=True) as fh:
+            for row in rows:
+                line = (json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+                digest.update(line)
+                fh.write(line)
+                count += 1
+        return {"rows": count, "sha256": digest.hexdigest()}
+
+    @staticmethod
+    def _iter_rows(query, fields, batch_size):
+        for row in db.session.execute(query.execution_options(yield_per=batch_size)):
+            yield dict(zip(fields, row))
+
+    @staticmethod
+    def export_bundle(path, batch_size=1000):
+        """Write the stored corpus to `path`. Returns report {"path", "bytes", "counts", "seconds"}."""
+        started = time.perf_counter()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+
+        surah_q = select(*[getattr(Surah, f) for f in SURAH_FIELDS]).order_by(Surah.nomor)
+        ayat_q = (
+            select(Surah.nomor, *[getattr(Ayat, f) for f in AYAT_FIELDS])
+            .join(Surah, Surah.id == Ayat.surah_id)
+            .order_by(Surah.nomor, Ayat.nomor_ayat)
+        )
+        reciter_q = select(*[getattr(Reciter, f) for f in RECITER_FIELDS]).order_by(Reciter.kode)
+        tafsir_q = (
+            select(Surah.nomor, *[getattr(Tafsir, f) for f in TAFSIR_FIELDS])
+            .join(Surah, Surah.id == Tafsir.surah_id)
+            .order_by(Surah.nomor, Tafsir.nomor_ayat)
+        )
+
+        with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_LZMA) as zf:
+            files = {
+                "surah.jsonl": BundleService._write_jsonl(
+                    zf, "surah.jsonl", BundleService._iter_rows(surah_q, SURAH_FIELDS, batch_size)),
+                "ayat.jsonl": BundleService._write_jsonl(
+                    zf, "ayat.jsonl", BundleService._iter_rows(ayat_q, ("surah",) + AYAT_FIELDS, batch_size)),
+                "tafsir.jsonl": BundleService._write_jsonl(
+                    zf, "tafsir.jsonl", BundleService._iter_rows(tafsir_q, ("surah",) + TAFSIR_FIELDS, batch_size)),
+                "reciter.jsonl": BundleService._write_jsonl(
+                    zf, "reciter.jsonl", BundleService._iter_rows(reciter_q, RECITER_FIELDS, batch_size)),
+            }
+            manifest = {
+                "format": BUNDLE_FORMAT,
+                "version": BUNDLE_VERSION,
+                "created_at": datetime.utcnow().isoformat(),
+                "files": files
+            }
+            zf.writestr("manifest.json", json.dumps(manifest, indent=2))
+        os.replace(tmp_path, path)
+
+        report = {
+            "path": path,
+            "bytes": os.path.getsize(path),
+            "counts": {name.split(".")[0]: meta["rows"] for name, meta in files.items()},
+            "seconds": round(time.perf_counter() - started, 3)
+        }
+        logger.info("Corpus bundle exported to %s: %s (%s bytes)", path, report['counts'], report['bytes'])
+        return report
+
+    # ----------------------
+    # Import
+    # ----------------------
+    @staticmethod
+    def read_manifest(zf):
+        try:
+            manifest = json.loads(zf.read("manifest.json"))
+        except KeyError:
+            raise BundleError("Bundle has no manifest.json")
+        if manifest.get("format") != BUNDLE_FORMAT:
+            raise BundleError(f"Not a corpus bundle (format={manifest.get('format')!r})")
+        if manifest.get("version") not in SUPPORTED_VERSIONS:
+            raise BundleError(f"Unsupported bundle version {manifest.get('version')} (expected {BUNDLE_VERSION})")
+        return manifest
+
+    @staticmethod
+    def _read_jsonl(zf, name, meta):
+        """Return parsed rows of `name` after checking its sha256 and row count against the manifest."""
+        data = zf.read(name)
+        if hashlib.sha256(data).hexdigest() != meta["sha256"]:
+            raise BundleError(f"Checksum mismatch for {name}")
+        rows = [json.loads(line) for line in data.decode("utf-8").splitlines() if line]
+        if len(rows) != meta["rows"]:
+            raise BundleError(f"{name}: expected {meta['rows']} rows, found {len(rows)}")
+        return rows
+
+    @staticmethod
+    def _bulk_insert(model, rows, batch_size):
+        for i in range(0, len(rows), batch_size):
+            db.session.execute(insert(model), rows[i:i + batch_size])
+
+    @staticmethod
+    def import_bundle(path, batch_size=None):
+        """
+        Load a bundle into an empty corpus (surah table kosong). Must be called inside an app context.
+        FTS trigger & index sekunder dilepas selama load lalu dibangun sekali di akhir.
+        Returns report {"bytes", "counts", "seconds": {"verify", "load", "index", "total"}}.
+        """
+        started = time.perf_counter()
+        batch_size = batch_size or Config.INGEST_BATCH_SIZE
+        if not os.path.exists(path):
+            raise BundleError(f"Bundle {path} not found")
+        if db.session.execute(select(func.count(Surah.id))).scalar():
+            raise BundleError("Corpus tables are not empty, refusing to import")
+        db.session.commit()  # lepas transaksi baca sebelum DDL di koneksi lain
+
+        try:
+            zf = zipfile.ZipFile(path)
+        except zipfile.BadZipFile as e:
+            raise BundleError(f"Bundle {path} is not readable: {e}")
+        with zf:
+            manifest = BundleService.read_manifest(zf)
+            files = manifest["files"]
+            surah_rows = BundleService._read_jsonl(zf, "surah.jsonl", files["surah.jsonl"])
+            ayat_rows = BundleService._read_jsonl(zf, "ayat.jsonl", files["ayat.jsonl"])
+            tafsir_rows = BundleService._read_jsonl(zf, "tafsir.jsonl", files["tafsir.jsonl"])
+            reciter_rows = (
+                BundleService._read_jsonl(zf, "reciter.jsonl", files["reciter.jsonl"]) if "reciter.jsonl" in files else []
+            )
+        verified = time.perf_counter()
+
+        tables = [Surah.__table__, Ayat.__table__, Tafsir.__table__]
+        SearchService.drop_index()
+        for table in tables:
+            for index in table.indexes:
+                index.drop(db.engine, checkfirst=True)
+
+        try:
+            upsert(db.session, Reciter, reciter_rows, ("kode",), ())
+            BundleService._bulk_insert(Surah, surah_rows, batch_size)
+            surah_ids = dict(db.session.execute(select(Surah.nomor, Surah.id)).all())
+            for row in ayat_rows:
+                row["surah_id"] = surah_ids[row.pop("surah")]
+            for row in tafsir_rows:
+                row["surah_id"] = surah_ids[row.pop("surah")]
+            BundleService._bulk_insert(Ayat, ayat_rows, batch_size)
+            BundleService._bulk_insert(Tafsir, tafsir_rows, batch_size)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            loaded = time.perf_counter()
+            for table in tables:
+                for index in table.indexes:
+                    index.create(db.engine, checkfirst=True)
+            SearchService.ensure_index()
+
+        ReciterService.invalidate()
+        with IngestService.deferred_notifications():
+            # bundle v1 membawa blob audio lengkap: pindahkan ke template reciter
+            IngestService.migrate_audio(batch_size=batch_size)
+            IngestService._notify_persisted(surah_changed=True)
+        finished = time.perf_counter()
+        report = {
+            "bytes": os.path.getsize(path),
+            "counts": {
+                "surah": len(surah_rows), "ayat": len(ayat_rows), "tafsir": len(tafsir_rows), "reciter": len(reciter_rows)
+            },
+            "seconds": {
+                "verify": round(verified - started, 3),
+                "load": round(loaded - verified, 3),
+                "index": round(finished - loaded, 3),
+                "total": round(finished - started, 3)
+            }
+        }
+        logger.info("Corpus bundle %s imported: %s in %ss", path, report['counts'], report['seconds']['total'])
+        return report
+
+    @staticmethod
+    def import_on_startup(path):
+        """Boot hook: populate an empty DB from `path` if the bundle exists. Never raises."""
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            if db.session.execute(select(func.count(Surah.id))).scalar():
+                return None
+            return BundleService.import_bundle(path)
+        except Exception:
+            logger.error("Startup import of corpus bundle %s failed", path, exc_info=True)
+            return None
@@ -0,0 +1,265 @@
+import operator
+import sys
+import threading
+import time
+from bisect import bisect_right
+
+from sqlalchemy import select, func
+
+from config.config import Config
+from app.models.EquranModels import Surah, Ayat
+from app.extension import db
+from app.cache import shared_cache
+from app.serialization import AyatDTO, RawJSON
+from app.services.QuranIndex import quran_index
+from app.services.ReciterServices import ReciterService
+from app.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+VERSION_NAMESPACE = "corpus"
+# FULL: dinaikkan oleh invalidate() tanpa daftar surah (baca ulang semuanya); SURAH: versi per surah
+FULL_NAMESPACE = VERSION_NAMESPACE + ":full"
+SURAH_NAMESPACE = VERSION_NAMESPACE + ":surah:{}"
+
+_nomor = operator.attrgetter("nomor")
+
+_NO_OVERRIDE = RawJSON("{}")
+
+
+class _Snapshot:
+    """
+    records: satu list AyatDTO untuk seluruh korpus, urut (surah, ayat); audio = pengecualian audio_url saja,
+             URL lengkap dibangun dari template reciter saat dibaca
+    index:   {nomor_surah: (start, end, nama, nama_latin)} -> offset ke records
+    versions: (versi "corpus", versi "corpus:full", {nomor: versi "corpus:surah:n"}) saat data dibaca
+    """
+
+    __slots__ = ("records", "index", "signature", "version", "versions", "built_at", "build_seconds", "memory_bytes")
+
+    def __init__(self, records, index, signature, versions, build_seconds):
+        self.records = records
+        self.index = index
+        self.signature = signature
+        self.version = versions[0]
+        self.versions = versions
+        self.built_at = time.time()
+        self.build_seconds = build_seconds
+        self.memory_bytes = _footprint(records, index)
+
+
+def _footprint(records, index):
+    """Approximate deep size in bytes (shared objects counted once)."""
+    seen = set()
+
+    def size(obj):
+        if id(obj) in seen:
+            return 0
+        seen.add(id(obj))
+        total = sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            total += sum(size(k) + size(v) for k, v in obj.items())
+        elif isinstance(obj, (tuple, list)):
+            total += sum(size(v) for v in obj)
+        elif isinstance(obj, (AyatDTO, RawJSON)):
+            total += sum(size(getattr(obj, slot)) for slot in obj.__slots__)
+        return total
+
+    return size(records) + size(index)
+
+
+class CorpusStore:
+    """
+    Optional read-through in-memory copy of surah + ayat, built once from the DB.
+
+    Halaman surah dilayani dengan slice list (tanpa ORM, SQL, atau json.loads). Snapshot baru dibangun
+    di belakang lalu di-swap atomik; pembaca selalu melihat snapshot lama atau baru, tidak pernah setengah jadi.
+    Snapshot di-reload saat invalidate() dipanggil (persist di proses ini atau, lewat versi bersama, proses lain)
+    atau saat signature DB berubah (dicek paling sering tiap `check_interval` detik). invalidate(surahs) hanya
+    membaca ulang surah itu dan memakai ulang record surah lain; tanpa daftar surah seluruh korpus dibaca ulang.
+    """
+
+    def __init__(self, enabled=False, check_interval=30.0):
+        self.enabled = enabled
+        self.check_interval = check_interval
+        self._snapshot = None
+        self._dirty = False
+        self._checked_at = 0.0
+        self._build_lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "reloads": 0}
+
+    # ----------------------
+    # Build / reload
+    # ----------------------
+    @staticmethod
+    def _signature():
+        count, max_id = db.session.execute(select(func.count(Ayat.id), func.max(Ayat.id))).one()
+        surah_count = db.session.execute(select(func.count(Surah.id))).scalar()
+        return (count, max_id, surah_count)
+
+    @staticmethod
+    def _versions():
+        """Shared versions read fresh (tanpa throttle), diambil sebelum data dibaca."""
+        return (
+            shared_cache.version(VERSION_NAMESPACE, fresh=True),
+            shared_cache.version(FULL_NAMESPACE, fresh=True),
+            {
+                nomor: shared_cache.version(SURAH_NAMESPACE.format(nomor), fresh=True)
+                for nomor in range(1, len(quran_index.surah_ayat) + 1)
+            }
+        )
+
+    @staticmethod
+    def _read(surahs=None):
+        """{nomor: (nama, nama_latin, [AyatDTO])} for `surahs` (None = seluruh korpus)."""
+        if surahs is not None and not surahs:
+            return {}
+        query = (
+            select(
+                Surah.nomor, Surah.nama, Surah.nama_latin,
+                Ayat.nomor_ayat, Ayat.teks_arab, Ayat.teks_latin, Ayat.teks_indonesia, Ayat.audio_url
+            )
+            .join(Ayat, Ayat.surah_id == Surah.id)
+            .order_by(Surah.nomor, Ayat.nomor_ayat)
+        )
+        if surahs is not None:
+            query = query.where(Surah.nomor.in_(sorted(surahs)))
+        surah = {}
+        for nomor, nama, nama_latin, nomor_ayat, arab, latin, indo, audio_raw in db.session.execute(query):
+            entry = surah.get(nomor)
+            if entry is None:
+                entry = surah[nomor] = (nama or "", nama_latin or "", [])
+            override = RawJSON(audio_raw) if audio_raw else _NO_OVERRIDE
+            entry[2].append(AyatDTO(nomor_ayat, arab or "", latin or "", indo or "", override))
+        return surah
+
+    @staticmethod
+    def _assemble(surah):
+        records = []
+        index = {}
+        for nomor in sorted(surah):
+            nama, nama_latin, items = surah[nomor]
+            index[nomor] = (len(records), len(records) + len(items), nama, nama_latin)
+            records.extend(items)
+        return records, index
+
+    def _build(self, previous=None, changed=None):
+        """Full build, or (previous + changed) re-reading only the `changed` surah."""
+        started = time.perf_counter()
+        versions = self._versions()
+        signature = self._signature()
+        if previous is None:
+            surah = self._read()
+        else:
+            surah = {
+                nomor: (nama, nama_latin, previous.records[start:end])
+                for nomor, (start, end, nama, nama_latin) in previous.index.items()
+                if nomor not in changed
+            }
+            surah.update(self._read(changed))
+        records, index = self._assemble(surah)
+
+        snapshot = _Snapshot(records, index, signature, versions, round(time.perf_counter() - started, 4))
+        if previous is None:
+            logger.info(
+                "Corpus store built: %s surah, %s ayat, ~%s KiB in %ss",
+                len(index), len(records), snapshot.memory_bytes // 1024, snapshot.build_seconds
+            )
+        else:
+            logger.info("Corpus store patched %s surah in %ss", len(changed), snapshot.build_seconds)
+        return snapshot
+
+    def _changed(self, snapshot):
+        """Surah changed since `snapshot`, or None when it must be rebuilt from scratch."""
+        if snapshot is None or self._dirty:
+            return None
+        _, full, surah = self._versions()
+        if full != snapshot.versions[1]:
+            return None
+        return {nomor for nomor, version in surah.items() if version != snapshot.versions[2].get(nomor)}
+
+    def _current(self):
+        now = time.monotonic()
+        snapshot = self._snapshot
+        # versi "corpus" dinaikkan worker mana pun yang baru menyimpan surah
+        stale = snapshot is None or self._dirty or snapshot.version != shared_cache.version(VERSION_NAMESPACE)
+        if not stale and now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            if self._signature() != snapshot.signature:
+                # DB berubah di luar invalidate() (mis. diedit manual): baca ulang semuanya
+                self._dirty = stale = True
+
+        if stale:
+            with self._build_lock:
+                # cek lagi: thread lain mungkin sudah membangun ulang selagi kita menunggu lock
+                if self._snapshot is snapshot:
+                    changed = self._changed(snapshot)
+                    self._dirty = False
+                    self._snapshot = self._build(snapshot if changed is not None else None, changed)
+                    self._checked_at = time.monotonic()
+                    self._stats["reloads"] += 1
+                snapshot = self._snapshot
+        return snapshot
+
+    def invalidate(self, surahs=None):
+        """
+        Reload on next read, here and (via the shared versions) in every other worker.
+        `surahs`: hanya surah ini yang dibaca ulang; None = seluruh korpus.
+        """
+        if surahs is None:
+            self._dirty = True
+        if not self.enabled:
+            return
+        namespaces = [FULL_NAMESPACE] if surahs is None else [SURAH_NAMESPACE.format(n) for n in sorted(set(surahs))]
+        # versi "corpus" terakhir: pembaca yang melihatnya pasti juga melihat versi per surah di atas
+        namespaces.append(VERSION_NAMESPACE)
+        if None in [shared_cache.invalidate(namespace) for namespace in namespaces]:
+            self._dirty = True  # cache bersama tidak bisa ditulis: minimal proses ini membaca ulang semuanya
+
+    # ----------------------
+    # Read
+    # ----------------------
+    def get_surah_page(self, nomor, after_ayat=0, limit=20, qari=None):
+        """
+        Ayat with nomor > after_ayat (keyset), same shape as EQuranService.get_surah_detail's DB path,
+        or None if the surah is not stored.
+        """
+        snapshot = self._current()
+        entry = snapshot.index.get(nomor)
+        if entry is None:
+            self._stats["misses"] += 1
+            return None
+        self._stats["hits"] += 1
+
+        start, end, nama, nama_latin = entry
+        ReciterService.require(qari)
+        lo = bisect_right(snapshot.records, after_ayat, lo=start, hi=end, key=_nomor)
+        hi = min(lo + limit, end)
+        audio = ReciterService.audio
+        return {
+            "nomor": nomor,
+            "nama": nama,
+            "nama_latin": nama_latin,
+            "ayat": [
+                AyatDTO(r.nomor, r.arab, r.latin, r.indonesia, audio(nomor, r.nomor, qari, r.audio.text))
+                for r in snapshot.records[lo:hi]
+            ],
+            "meta": {"total_ayat": end - start}
+        }
+
+    def stats(self):
+        snapshot = self._snapshot
+        stats = {"enabled": self.enabled, **self._stats}
+        if snapshot is not None:
+            stats.update({
+                "surah": len(snapshot.index),
+                "ayat": len(snapshot.records),
+                "memory_bytes": snapshot.memory_bytes,
+                "built_at": snapshot.built_at,
+                "build_seconds": snapshot.build_seconds
+            })
+        return stats
+
+
+corpus_store = CorpusStore(enabled=Config.CORPUS_STORE_ENABLED, check_interval=Config.CORPUS_STORE_CHECK_INTERVAL)
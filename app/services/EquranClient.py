@@ -0,0 +1,306 @@
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.config import Config
+from app.logger import get_logger
+from app.metrics import UPSTREAM_LATENCY, UPSTREAM_RESPONSES, UPSTREAM_RETRIES, upstream_endpoint
+
+logger = get_logger(__name__)
+
+
+class EQuranAPIError(Exception):
+    pass
+
+
+class UpstreamUnavailable(EQuranAPIError):
+    """Raised without touching the network: breaker open or deadline budget exhausted."""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed    -> request jalan normal, gagal beruntun >= failure_threshold membuka breaker
+    open      -> semua request langsung ditolak sampai reset_timeout lewat
+    half_open -> satu request percobaan diizinkan; sukses menutup, gagal membuka lagi
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, name="upstream"):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._times_opened = 0
+        self._rejected = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow(self):
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("%s circuit breaker closed", self.name)
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._times_opened += 1
+                    logger.warning("%s circuit breaker opened after %s consecutive failure(s)", self.name, self._failures)
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def snapshot(self):
+        with self._lock:
+            state = self._current_state()
+            retry_in = 0.0
+            if state == self.OPEN:
+                retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout": self.reset_timeout,
+                "retry_in": round(retry_in, 3),
+                "times_opened": self._times_opened,
+                "rejected": self._rejected
+            }
+
+
+class EQuranClient:
+    """
+    Shared keep-alive HTTP client for the equran.id API.
+
+    - satu requests.Session + HTTPAdapter dengan connection pool berukuran tetap
+    - retry hanya untuk error jaringan / 5xx / 429, dengan exponential backoff + full jitter
+    - deadline budget per panggilan: total waktu (termasuk backoff) tidak pernah melebihi `deadline`
+    - circuit breaker supaya worker tidak tertahan saat upstream mati
+    """
+
+    RETRY_STATUS = {429, 500, 502, 503, 504}
+
+    def __init__(self, base_url, pool_size=10, connect_timeout=3.0, read_timeout=10.0,
+                 retries=3, backoff_base=0.2, backoff_max=2.0, deadline=8.0, breaker=None, pool_hosts=1):
+        self.base_url = base_url.rstrip("/")
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.deadline = deadline
+        self.breaker = breaker or CircuitBreaker()
+
+        # pool_hosts = jumlah host yang pool keep-alive-nya disimpan (API: 1 host; audio: beberapa CDN)
+        self._adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_size, max_retries=0, pool_block=False)
+        self.session = requests.Session()
+        self.session.mount("http://", self._adapter)
+        self.session.mount("https://", self._adapter)
+        self.session.headers.update({"Accept": "application/json", "User-Agent": "Qalmi/1.0"})
+
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "attempts": 0, "retries": 0, "failures": 0, "rejected": 0, "in_flight": 0}
+
+    @classmethod
+    def from_config(cls, base_url, name="upstream", pool_hosts=1):
+        return cls(
+            base_url,
+            pool_size=Config.UPSTREAM_POOL_SIZE,
+            connect_timeout=Config.UPSTREAM_CONNECT_TIMEOUT,
+            read_timeout=Config.UPSTREAM_TIMEOUT,
+            retries=Config.UPSTREAM_RETRIES,
+            backoff_base=Config.UPSTREAM_BACKOFF_BASE,
+            backoff_max=Config.UPSTREAM_BACKOFF_MAX,
+            deadline=Config.UPSTREAM_DEADLINE,
+            breaker=CircuitBreaker(
+                failure_threshold=Config.BREAKER_FAILURE_THRESHOLD,
+                reset_timeout=Config.BREAKER_RESET_TIMEOUT,
+                name=name
+            ),
+            pool_hosts=pool_hosts
+        )
+
+    def _incr(self, key, amount=1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _backoff(self, attempt):
+        # full jitter: sleep ~ U(0, min(max, base * 2^attempt))
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def get(self, endpoint, retry=None, deadline=None):
+        """GET `endpoint` and return decoded JSON, raising EQuranAPIError on failure."""
+        if not endpoint.startswith("/"):
+            endpoint = "/" + endpoint
+        url = f"{self.base_url}{endpoint}"
+        retry = self.retries if retry is None else max(1, retry)
+        budget_end = time.monotonic() + (deadline or self.deadline)
+        label = upstream_endpoint(endpoint)
+
+        self._incr("requests")
+        if not self.breaker.allow():
+            self._incr("rejected")
+            UPSTREAM_RESPONSES.inc(endpoint=label, status="rejected")
+            logger.warning("Circuit breaker open, not calling %s", url)
+            raise UpstreamUnavailable(f"Upstream unavailable (circuit open): {url}")
+
+        self._incr("in_flight")
+        try:
+            last_exc = None
+            for attempt in range(retry):
+                remaining = budget_end - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    logger.debug("Fetching URL: %s, attempt %s", url, attempt + 1)
+                    self._incr("attempts")
+                    started = time.perf_counter()
+                    try:
+                        resp = self.session.get(
+                            url, timeout=(min(self.connect_timeout, remaining), min(self.read_timeout, remaining))
+                        )
+                    except requests.exceptions.RequestException as e:
+                        UPSTREAM_RESPONSES.inc(endpoint=label, status=type(e).__name__)
+                        raise
+                    finally:
+                        UPSTREAM_LATENCY.observe(time.perf_counter() - started, endpoint=label)
+                    UPSTREAM_RESPONSES.inc(endpoint=label, status=resp.status_code)
+                    if resp.status_code in self.RETRY_STATUS:
+                        resp.raise_for_status()
+                    if resp.status_code >= 400:
+                        # 4xx: upstream sehat, request-nya yang salah -> jangan retry / jangan buka breaker
+                        self.breaker.record_success()
+                        raise EQuranAPIError(f"Failed to fetch {url}: HTTP {resp.status_code}")
+                    json_data = resp.json()
+                    self.breaker.record_success()
+                    if not json_data:
+                        logger.error("No data returned from %s", url)
+                        raise EQuranAPIError(f"No data returned from {url}")
+                    logger.info("Successfully fetched data from %s", url)
+                    return json_data
+                except (requests.exceptions.RequestException, ValueError) as e:
+                    last_exc = e
+                    self.breaker.record_failure()
+                    logger.warning("Attempt %s failed for %s: %s", attempt + 1, url, e)
+                    if attempt >= retry - 1 or self.breaker.state == CircuitBreaker.OPEN:
+                        break
+                    sleep_for = self._backoff(attempt)
+                    if time.monotonic() + sleep_for >= budget_end:
+                        break
+                    self._incr("retries")
+                    UPSTREAM_RETRIES.inc(endpoint=label)
+                    time.sleep(sleep_for)
+
+            self._incr("failures")
+            logger.error("All attempts failed for %s: %s", url, last_exc)
+            if last_exc is None:
+                raise UpstreamUnavailable(f"Deadline exceeded before fetching {url}")
+            raise EQuranAPIError(f"Failed to fetch {url}: {last_exc}") from last_exc
+        finally:
+            self._incr("in_flight", -1)
+
+    def download(self, url, fileobj, chunk_size=64 * 1024):
+        """
+        Stream an absolute `url` (e.g. an MP3 on the CDN) into `fileobj` without buffering it in memory.
+        Satu attempt saja (file setengah jadi tidak bisa di-retry dengan aman); timeout read berlaku per chunk.
+        Returns jumlah byte yang ditulis.
+        """
+        self._incr("requests")
+        if not self.breaker.allow():
+            self._incr("rejected")
+            raise UpstreamUnavailable(f"Upstream unavailable (circuit open): {url}")
+
+        self._incr("in_flight")
+        self._incr("attempts")
+        started = time.perf_counter()
+        try:
+            with self.session.get(
+                url, stream=True, timeout=(self.connect_timeout, self.read_timeout), headers={"Accept": "*/*"}
+            ) as resp:
+                UPSTREAM_RESPONSES.inc(endpoint="audio", status=resp.status_code)
+                if resp.status_code >= 400:
+                    self._incr("failures")
+                    if resp.status_code in self.RETRY_STATUS:
+                        self.breaker.record_failure()
+                    else:
+                        self.breaker.record_success()
+                    raise EQuranAPIError(f"Failed to download {url}: HTTP {resp.status_code}")
+                written = 0
+                for chunk in resp.iter_content(chunk_size=chunk_size):
+                    fileobj.write(chunk)
+                    written += len(chunk)
+            self.breaker.record_success()
+            logger.info("Downloaded %s bytes from %s", written, url)
+            return written
+        except requests.exceptions.RequestException as e:
+            self.breaker.record_failure()
+            self._incr("failures")
+            UPSTREAM_RESPONSES.inc(endpoint="audio", status=type(e).__name__)
+            raise EQuranAPIError(f"Failed to download {url}: {e}") from e
+        finally:
+            UPSTREAM_LATENCY.observe(time.perf_counter() - started, endpoint="audio")
+            self._incr("in_flight", -1)
+
+    def pool_stats(self):
+        pools = []
+        manager = getattr(self._adapter, "poolmanager", None)
+        if manager is not None:
+            for key in list(manager.pools.keys()):
+                pool = manager.pools.get(key)
+                if pool is None:
+                    continue
+                pools.append({
+                    "host": f"{pool.scheme}://{pool.host}:{pool.port}",
+                    "maxsize": self.pool_size,
+                    "idle": pool.pool.qsize() if pool.pool is not None else 0,
+                    "connections_opened": pool.num_connections,
+                    "requests": pool.num_requests
+                })
+        return pools
+
+    def stats(self):
+        with self._stats_lock:
+            counters = dict(self._stats)
+        return {
+            "base_url": self.base_url,
+            "breaker": self.breaker.snapshot(),
+            "pool": self.pool_stats(),
+            "counters": counters
+        }
@@ -1,56 +1,136 @@
-import time
-import requests
+import base64
+import binascii
 import json
-from functools import lru_cache
+from sqlalchemy import select, and_, or_
 from urllib.parse import quote
 from config.config import Config
 from app.models.EquranModels import Surah, Ayat, Tafsir
 from app.extension import db
-
-from app.logger import logger
+from app.services.EquranClient import EQuranClient, EQuranAPIError, UpstreamUnavailable
+
+from app.services.AudioCache import audio_cache
+from app.services.CorpusStore import corpus_store
+from app.services.IngestServices import IngestService
+from app.services.QuranIndex import quran_index
+from app.services.ReciterServices import ReciterService
+from app.cache import shared_cache
+from app.database import status as database_status
+from app.metrics import DATA_SOURCE
+from app.response_cache import response_cache
+from app.serialization import AyatDTO, RawJSON, dumps
+from app.singleflight import SingleFlight
+from app.swr_cache import SWRCache
+from app.logger import get_logger
+
+logger = get_logger(__name__)
 
 BASE_URL = (Config.API_URL or "https://equran.id/api/v2").rstrip('/')
-DEFAULT_TIMEOUT = 10
 
-class EQuranAPIError(Exception):
+# satu client (Session + connection pool + circuit breaker) dipakai bersama semua thread
+equran_client = EQuranClient.from_config(BASE_URL)
+# download MP3 (CDN) lewat Session, pool & breaker sendiri: ganti host tidak membuang koneksi keep-alive API,
+# dan CDN yang lambat/gagal tidak membuka breaker API JSON (atau sebaliknya)
+audio_client = EQuranClient.from_config(BASE_URL, name="audio", pool_hosts=4)
+
+# namespace cache bersama untuk fetch upstream yang gagal (negative cache, TTL NEGATIVE_CACHE_TTL)
+NEGATIVE_NAMESPACE = "negative"
+
+
+class NotFoundError(LookupError):
+    """Surah/ayat di luar tabel statis 114 surah; ditolak tanpa menyentuh DB maupun upstream (HTTP 404)."""
     pass
 
+
 class EQuranService:
 
+    # cache miss yang bersamaan untuk surah/tafsir yang sama digabung jadi satu fetch
+    _flight = SingleFlight(lock_dir=Config.SINGLEFLIGHT_LOCK_DIR, lock_timeout=Config.SINGLEFLIGHT_LOCK_TIMEOUT)
+
     # ----------------------
     # Low level fetch util
     # ----------------------
     @staticmethod
     def _get(endpoint: str, retry: int = 3):
-        if not endpoint.startswith("/"):
-            endpoint = "/" + endpoint
-        url = f"{BASE_URL}{endpoint}"
-        for attempt in range(retry):
-            try:
-                logger.debug(f"Fetching URL: {url}, attempt {attempt + 1}")
-                resp = requests.get(url, timeout=DEFAULT_TIMEOUT)
-                resp.raise_for_status()
-                json_data = resp.json()
-                if not json_data:
-                    logger.error(f"No data returned from {url}")
-                    raise EQuranAPIError(f"No data returned from {url}")
-                logger.info(f"Successfully fetched data from {url}")
-                return json_data
-            except requests.exceptions.RequestException as e:
-                logger.warning(f"Attempt {attempt + 1} failed for {url}: {e}")
-                if attempt < retry - 1:
-                    time.sleep(1)
-                    continue
-                logger.error(f"All attempts failed for {url}", exc_info=True)
-                raise EQuranAPIError(f"Failed to fetch {url}: {e}") from e
+        return equran_client.get(endpoint, retry=retry)
 
-    # cache daftar surah
     @staticmethod
-    @lru_cache(maxsize=1)
-    def _fetch_all_surah_raw():
+    def _fetch_once(key, fn, nomor):
+        """
+        Single-flight fetch for `key` with negative caching: kegagalan upstream diingat NEGATIVE_CACHE_TTL detik
+        di cache bersama, jadi miss berulang untuk surah/tafsir yang sama langsung gagal tanpa keluar proses.
+        UpstreamUnavailable (breaker terbuka) tidak disimpan karena memang sudah tidak menyentuh jaringan.
+        """
+        failure = shared_cache.get(NEGATIVE_NAMESPACE, key)
+        if failure is not None:
+            DATA_SOURCE.inc(resource=key.partition(":")[0], source="negative_cache")
+            raise EQuranAPIError(failure)
+        try:
+            return EQuranService._flight.do(key, fn, nomor)
+        except UpstreamUnavailable:
+            raise
+        except EQuranAPIError as e:
+            if Config.NEGATIVE_CACHE_TTL > 0:
+                shared_cache.set(NEGATIVE_NAMESPACE, key, str(e) or key, ttl=Config.NEGATIVE_CACHE_TTL)
+            raise
+
+    @staticmethod
+    def check_ref(surah, ayat=None):
+        """Raise NotFoundError unless surah (and ayat) exist in the static 114-surah table."""
+        jumlah = quran_index.jumlah_ayat(surah)
+        if jumlah is None:
+            raise NotFoundError(f"Surah {surah} tidak ditemukan")
+        if ayat is not None and not 1 <= ayat <= jumlah:
+            raise NotFoundError(f"Ayat {surah}:{ayat} tidak ada (surah {surah} memiliki {jumlah} ayat)")
+
+    # cache daftar surah: TTL + stale-while-revalidate, fallback ke tabel surah, snapshot di disk
+    _surah_list_cache = SWRCache(
+        "surah_list",
+        ttl=Config.SURAH_LIST_TTL,
+        max_stale=Config.SURAH_LIST_MAX_STALE,
+        retry_interval=Config.SURAH_LIST_RETRY_INTERVAL,
+        snapshot_path=Config.SURAH_LIST_SNAPSHOT,
+        version=lambda: shared_cache.version("surah_list"),
+        # daftar baru dari upstream: respons /api/surah yang sudah di-cache (semua worker) dibuang
+        on_change=lambda key: response_cache.invalidate_corpus()
+    )
+
+    @staticmethod
+    def _load_surah_list():
+        # payload /surat dibagi antar worker lewat cache bersama: satu fetch upstream per TTL, bukan per worker
+        data = shared_cache.get("surah_list", "/surat")
+        if data:
+            return data
         logger.debug("Fetching all surah raw data")
         resp = EQuranService._get("/surat")
-        return resp.get("data", [])
+        data = resp.get("data", []) if isinstance(resp, dict) else resp
+        if not data:
+            raise EQuranAPIError("Empty surah list from API")
+        shared_cache.set("surah_list", "/surat", data, ttl=Config.SURAH_LIST_TTL)
+        return data
+
+    @staticmethod
+    def _surah_list_from_db():
+        """Surah list in the API's /surat shape, built from stored Surah rows (partial if not warmed up)."""
+        rows = Surah.query.order_by(Surah.nomor).all()
+        return [{
+            "nomor": s.nomor,
+            "nama": s.nama,
+            "namaLatin": s.nama_latin,
+            "jumlahAyat": s.jumlah_ayat,
+            "tempatTurun": s.tempat_turun,
+            "arti": s.arti,
+            "deskripsi": s.deskripsi
+        } for s in rows]
+
+    @staticmethod
+    def _fetch_all_surah_raw():
+        data, source = EQuranService._surah_list_cache.lookup(
+            "all", EQuranService._load_surah_list, fallback=EQuranService._surah_list_from_db
+        )
+        if source in ("stale", "fallback"):
+            # daftar basi / sebagian dari DB: jangan dibekukan di response cache, request berikutnya cek ulang
+            response_cache.skip()
+        return data
 
     # ----------------------
     # Normalizer helpers
@@ -74,16 +154,10 @@ class EQuranService:
     def _normalize_ayat_from_api(ay, idx=None):
         """
         Normalize ay object coming from external API (handles different key names).
-        Returns dict with keys: nomor, arab, latin, indonesia, audio (object)
+        Returns AyatDTO; audio di-encode sekali jadi RawJSON (teks yang sama dipakai untuk kolom audio_url).
         """
         if not ay:
-            return {
-                "nomor": idx + 1 if idx is not None else None,
-                "arab": "",
-                "latin": "",
-                "indonesia": "",
-                "audio": {}
-            }
+            return AyatDTO(idx + 1 if idx is not None else None)
 
         nomor = EQuranService._first(
             ay.get("nomor"),
@@ -110,50 +184,24 @@ class EQuranService:
         if not isinstance(audio, dict):
             audio = {}
 
-        return {
-            "nomor": nomor,
-            "arab": arab,
-            "latin": latin,
-            "indonesia": indonesia,
-            "audio": audio
-        }
+        return AyatDTO(nomor, arab, latin, indonesia, RawJSON(json.dumps(audio)))
 
     @staticmethod
-    def _normalize_ayat_from_db(ayat_model):
+    def _normalize_ayat_from_db(ayat_model, surah, qari=None):
         """
-        Normalize ayat row from DB (Ayat model).
-        Expects ayat_model has attributes: nomor_ayat, teks_arab, teks_latin, teks_indonesia, audio_url (json string).
+        Normalize ayat row from DB (Ayat model or a Core row with the same column names) into AyatDTO.
+        Audio dibangun dari template reciter (+ pengecualian di audio_url), tanpa json.loads per ayat.
         """
         if not ayat_model:
-            return {"nomor": None, "arab": "", "latin": "", "indonesia": "", "audio": {}}
-
-        nomor = EQuranService._to_int(getattr(ayat_model, "nomor_ayat", None), default=None)
-        arab = getattr(ayat_model, "teks_arab", "") or ""
-        latin = getattr(ayat_model, "teks_latin", "") or ""
-        indo = getattr(ayat_model, "teks_indonesia", "") or ""
-
-        audio_obj = {}
-        audio_raw = getattr(ayat_model, "audio_url", None)
-        if audio_raw:
-            # audio might already be JSON string
-            if isinstance(audio_raw, str):
-                try:
-                    audio_obj = json.loads(audio_raw)
-                except json.JSONDecodeError:
-                    logger.warning(f"Failed to parse audio JSON for ayat {nomor}, raw: {audio_raw}")
-                    audio_obj = {}
-            elif isinstance(audio_raw, dict):
-                audio_obj = audio_raw
-            else:
-                audio_obj = {}
-
-        return {
-            "nomor": nomor,
-            "arab": arab,
-            "latin": latin,
-            "indonesia": indo,
-            "audio": audio_obj
-        }
+            return AyatDTO(None)
+
+        return AyatDTO(
+            ayat_model.nomor_ayat,
+            ayat_model.teks_arab or "",
+            ayat_model.teks_latin or "",
+            ayat_model.teks_indonesia or "",
+            ReciterService.audio(surah, ayat_model.nomor_ayat, qari, ayat_model.audio_url)
+        )
 
     @staticmethod
     def _normalize_surah_meta(data):
@@ -186,7 +234,7 @@ class EQuranService:
             total = len(data)
             start = (page - 1) * limit
             end = start + limit
-            logger.info(f"Retrieved {len(data[start:end])} surah(s) for page {page}")
+            logger.info("Retrieved %s surah(s) for page %s", len(data[start:end]), page)
             return {
                 "items": data[start:end],
                 "meta": {
@@ -200,8 +248,53 @@ class EQuranService:
             logger.error("Error in get_all_surah", exc_info=True)
             raise
 
+    # ----------------------
+    # Keyset pagination
+    # ----------------------
+    @staticmethod
+    def encode_cursor(value, kind="a"):
+        """Opaque cursor pointing just after `value` (nomor_ayat for kind "a")."""
+        return base64.urlsafe_b64encode(f"{kind}:{int(value)}".encode()).decode().rstrip("=")
+
     @staticmethod
-    def get_surah_detail(nomor, page=1, limit=20):
+    def decode_cursor(cursor, kind="a"):
+        """Return the value encoded in `cursor`. Raises ValueError on a malformed cursor or another kind."""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+            prefix, _, value = raw.partition(":")
+            if prefix != kind:
+                raise ValueError
+            value = int(value)
+        except (ValueError, TypeError, binascii.Error, UnicodeDecodeError):
+            raise ValueError(f"Cursor tidak valid: {cursor}")
+        if value < 0:
+            raise ValueError(f"Cursor tidak valid: {cursor}")
+        return value
+
+    @staticmethod
+    def _resolve_after(page=1, limit=20, after=None):
+        """
+        Map (page, limit) or an `after` cursor to "nomor_ayat > N".
+        Nomor ayat berurutan mulai 1, jadi page lama ekuivalen dengan after=(page-1)*limit.
+        """
+        if after:
+            return EQuranService.decode_cursor(after)
+        return max(page - 1, 0) * limit
+
+    @staticmethod
+    def _page_meta(total, limit, items, key="nomor"):
+        last = None
+        if items:
+            last = items[-1].get(key) if isinstance(items[-1], dict) else getattr(items[-1], key, None)
+        has_more = bool(items) and len(items) >= limit and last is not None and (total is None or last < total)
+        return {
+            "total_ayat": total,
+            "limit": limit,
+            "next_cursor": EQuranService.encode_cursor(last) if has_more else None
+        }
+
+    @staticmethod
+    def get_surah_detail(nomor, page=1, limit=20, after=None, qari=None):
         """
         Return normalized surah detail:
         {
@@ -209,175 +302,546 @@ class EQuranService:
           "nama": str,
           "nama_latin": str,
           "ayat": [...],
-          "meta": {"total_ayat": int}
+          "meta": {"total_ayat": int, "limit": int, "next_cursor": str | None}
         }
         Handles:
          - data from DB (Ayat rows)
          - data from external API
+        Paging pakai keyset (nomor_ayat > cursor), jadi halaman dalam sama murahnya dengan halaman pertama.
+        qari: hanya audio qari itu (ValueError bila kodenya tidak dikenal).
+        NotFoundError untuk nomor di luar 1-114 (dicek lokal, tanpa DB/upstream).
         """
+        EQuranService.check_ref(nomor)
         try:
+            after_ayat = EQuranService._resolve_after(page, limit, after)
+
+            # in-memory corpus store (opsional): tanpa SQL/ORM/json.loads
+            if corpus_store.enabled:
+                stored = corpus_store.get_surah_page(nomor, after_ayat=after_ayat, limit=limit, qari=qari)
+                if stored is not None:
+                    DATA_SOURCE.inc(resource="surah", source="memory")
+                    stored["meta"] = EQuranService._page_meta(stored["meta"]["total_ayat"], limit, stored["ayat"])
+                    return stored
+
             # try DB first
             surah_model = Surah.query.filter_by(nomor=nomor).first()
 
-            if surah_model:
-                # DB path
-                ayat_query = Ayat.query.filter_by(surah_id=surah_model.id).order_by(Ayat.nomor_ayat)
-                total = ayat_query.count()
-                # pagination
-                ayat_rows = ayat_query.offset((page - 1) * limit).limit(limit).all()
-                logger.info(f"Retrieved surah {nomor} from DB with {total} ayat (returning {len(ayat_rows)})")
-
-                processed_ayat = [EQuranService._normalize_ayat_from_db(a) for a in ayat_rows]
-
-                surah_data = {
-                    "nomor": surah_model.nomor,
-                    "nama": surah_model.nama or "",
-                    "nama_latin": surah_model.nama_latin or "",
-                    "ayat": processed_ayat,
-                    "meta": {"total_ayat": total}
-                }
-                return surah_data
+            if not surah_model:
+                # not in DB -> satu fetch+persist per surah, request lain yang bersamaan ikut menunggu hasilnya
+                fetched = EQuranService._fetch_once(f"surah:{nomor}", EQuranService._fetch_and_store_surah, nomor)
+                if fetched is not None:
+                    DATA_SOURCE.inc(resource="surah", source="api")
+                    surah_meta, formatted_ayat_all = fetched
+                    total_ayat = len(formatted_ayat_all)
+
+                    # paginate the formatted_ayat_all for return
+                    paged = [a for a in formatted_ayat_all if (a.nomor or 0) > after_ayat][:limit]
+                    if qari is not None:
+                        # reciter baru saja terdaftar oleh ingest; URL dari API tetap diutamakan
+                        ReciterService.require(qari)
+                        paged = [
+                            AyatDTO(a.nomor, a.arab, a.latin, a.indonesia,
+                                    ReciterService.audio(nomor, a.nomor, qari, a.audio.text))
+                            for a in paged
+                        ]
+
+                    surah_result = {
+                        "nomor": surah_meta["nomor"],
+                        "nama": surah_meta["nama"],
+                        "nama_latin": surah_meta["nama_latin"],
+                        "ayat": paged,
+                        "meta": EQuranService._page_meta(total_ayat, limit, paged)
+                    }
+                    return surah_result
+
+                # proses lain sudah menyimpan surah ini selagi kita menunggu lock
+                surah_model = Surah.query.filter_by(nomor=nomor).first()
+                if not surah_model:
+                    raise EQuranAPIError(f"No data for surah {nomor}")
+
+            # DB path: range seek di index unik (surah_id, nomor_ayat), total dari surah.jumlah_ayat
+            ReciterService.require(qari)
+            # kolom saja (tanpa hidrasi objek ORM), langsung jadi AyatDTO
+            ayat_rows = db.session.execute(
+                select(Ayat.nomor_ayat, Ayat.teks_arab, Ayat.teks_latin, Ayat.teks_indonesia, Ayat.audio_url)
+                .where(Ayat.surah_id == surah_model.id, Ayat.nomor_ayat > after_ayat)
+                .order_by(Ayat.nomor_ayat)
+                .limit(limit)
+            ).all()
+            total = surah_model.jumlah_ayat
+            if total is None:
+                # baris surah lama tanpa jumlah_ayat
+                total = Ayat.query.filter_by(surah_id=surah_model.id).count()
+            DATA_SOURCE.inc(resource="surah", source="db")
+            logger.info("Retrieved surah %s from DB with %s ayat (returning %s)", nomor, total, len(ayat_rows))
+
+            processed_ayat = [EQuranService._normalize_ayat_from_db(a, nomor, qari) for a in ayat_rows]
+
+            surah_data = {
+                "nomor": surah_model.nomor,
+                "nama": surah_model.nama or "",
+                "nama_latin": surah_model.nama_latin or "",
+                "ayat": processed_ayat,
+                "meta": EQuranService._page_meta(total, limit, processed_ayat)
+            }
+            return surah_data
 
-            # not in DB -> fetch from external API
-            raw = EQuranService._get(f"/surat/{nomor}")
-            data = raw.get("data") if isinstance(raw, dict) else raw
-            if not data:
-                logger.warning(f"No data returned for surah {nomor} from API")
-                raise EQuranAPIError(f"No data for surah {nomor}")
+        except EQuranAPIError:
+            # sudah dicatat EQuranClient (atau hit negative cache); controller menjawab 502
+            raise
+        except (NotFoundError, ValueError):
+            # kesalahan klien (nomor di luar jangkauan, cursor ?after= rusak, ?qari= tak dikenal): 404/400, bukan error server
+            raise
+        except Exception as e:
+            logger.error("Error in get_surah_detail for surah %s", nomor, exc_info=True)
+            raise
 
-            logger.info(f"Fetched surah {nomor} from API")
+    @staticmethod
+    def _fetch_and_store_surah(nomor):
+        """
+        SingleFlight leader for get_surah_detail: fetch surah from API and persist it.
+        Returns (surah_meta, formatted_ayat_all), or None when the surah is already in DB
+        (stored by another process while this one waited for the lock).
+        """
+        if Surah.query.filter_by(nomor=nomor).first():
+            return None
 
-            # normalize surah meta
-            surah_meta = EQuranService._normalize_surah_meta(data)
+        raw = EQuranService._get(f"/surat/{nomor}")
+        data = raw.get("data") if isinstance(raw, dict) else raw
+        if not data:
+            logger.warning("No data returned for surah %s from API", nomor)
+            raise EQuranAPIError(f"No data for surah {nomor}")
 
-            # ayat raw list (handle different key names)
-            ayat_raw_list = data.get("ayat") or data.get("verses") or data.get("items") or []
+        logger.info("Fetched surah %s from API", nomor)
 
-            # build formatted ayat list (no pagination for API response saved below; but we'll paginate the returned list)
-            formatted_ayat_all = []
-            for i, ay in enumerate(ayat_raw_list):
-                formatted_ayat_all.append(EQuranService._normalize_ayat_from_api(ay, idx=i))
+        # normalize surah meta
+        surah_meta = EQuranService._normalize_surah_meta(data)
 
-            total_ayat = len(formatted_ayat_all)
+        # ayat raw list (handle different key names)
+        ayat_raw_list = data.get("ayat") or data.get("verses") or data.get("items") or []
+        formatted_ayat_all = [EQuranService._normalize_ayat_from_api(ay, idx=i) for i, ay in enumerate(ayat_raw_list)]
 
-            # persist to DB if not exists (best-effort)
-            try:
-                # create Surah record if missing
-                new_surah = Surah.query.filter_by(nomor=surah_meta["nomor"]).first()
-                if not new_surah:
-                    new_surah = Surah(
-                        nomor=surah_meta["nomor"],
-                        nama=surah_meta["nama"],
-                        nama_latin=surah_meta["nama_latin"],
-                        arti=data.get("arti") or data.get("meaning") or "",
-                        jumlah_ayat=total_ayat,
-                        tempat_turun=data.get("tempatTurun") or data.get("revelation") or ""
-                    )
-                    db.session.add(new_surah)
-                    db.session.flush()
-                    # save ayat rows
-                    for ay in formatted_ayat_all:
-                        audio_json = json.dumps(ay.get("audio") or {}) if ay.get("audio") is not None else "{}"
-                        db.session.add(Ayat(
-                            surah_id=new_surah.id,
-                            nomor_ayat=ay.get("nomor"),
-                            teks_arab=ay.get("arab"),
-                            teks_latin=ay.get("latin"),
-                            teks_indonesia=ay.get("indonesia"),
-                            audio_url=audio_json
-                        ))
-                    db.session.commit()
-                    logger.info(f"Saved surah {nomor} and {len(formatted_ayat_all)} ayat to DB")
-            except Exception as db_exc:
-                logger.exception(f"Failed to persist surah {nomor} to DB (continuing): {db_exc}")
-                # do not fail response if DB persist fails
+        # persist to DB (best-effort, satu transaksi upsert)
+        try:
+            written, _ = IngestService.ingest(
+                nomor, surah_data=data, surah_meta=surah_meta, formatted_ayat=formatted_ayat_all
+            )
+            logger.info("Saved surah %s and %s ayat to DB", nomor, written)
+        except Exception as db_exc:
+            logger.exception("Failed to persist surah %s to DB (continuing): %s", nomor, db_exc)
+            # do not fail response if DB persist fails
 
-            # paginate the formatted_ayat_all for return
-            start = (page - 1) * limit
-            end = start + limit
-            paged = formatted_ayat_all[start:end]
-
-            surah_result = {
-                "nomor": surah_meta["nomor"],
-                "nama": surah_meta["nama"],
-                "nama_latin": surah_meta["nama_latin"],
-                "ayat": paged,
-                "meta": {"total_ayat": total_ayat}
-            }
-            return surah_result
+        return surah_meta, formatted_ayat_all
 
-        except Exception as e:
-            logger.error(f"Error in get_surah_detail for surah {nomor}", exc_info=True)
-            raise
+    @staticmethod
+    def _excerpt(text, length):
+        """Cut `text` at the last word boundary before `length` characters."""
+        if not text or len(text) <= length:
+            return text
+        cut = text.rfind(" ", 0, length)
+        return text[:cut if cut > length // 2 else length].rstrip() + "…"
 
     @staticmethod
-    def get_tafsir(nomor, ayat=None):
-        try:
-            surah_model = Surah.query.filter_by(nomor=nomor).first()
-            tafsir_list = []
+    def _format_tafsir(items, excerpt=None):
+        """[(nomor_ayat, teks)] -> [{"ayat", "tafsir"}], dipotong bila mode excerpt."""
+        result = []
+        for nomor_ayat, teks in items:
+            teks = teks or ""
+            entry = {"ayat": nomor_ayat, "tafsir": teks}
+            if excerpt:
+                entry["tafsir"] = EQuranService._excerpt(teks, excerpt)
+                entry["truncated"] = len(teks) > excerpt
+            result.append(entry)
+        return result
 
-            # Ambil dari DB jika ada
-            if surah_model:
-                query = Tafsir.query.filter_by(surah_id=surah_model.id)
-                if ayat:
-                    try:
-                        query = query.filter_by(nomor_ayat=int(ayat))
-                    except ValueError:
-                        pass
-                tafsir_rows = query.all()
-                if tafsir_rows:
-                    logger.info(f"Retrieved tafsir for surah {nomor} from DB")
-                    return {
-                        "nomor": surah_model.nomor,
-                        "nama": surah_model.nama,
-                        "tafsir": [{"ayat": t.nomor_ayat, "tafsir": t.tafsir} for t in tafsir_rows]
-                    }
+    @staticmethod
+    def _get_tafsir_from_db(nomor, ayat=None, after_ayat=None, limit=None, excerpt=None):
+        surah_model = Surah.query.filter_by(nomor=nomor).first()
+        if not surah_model:
+            return surah_model, None
+
+        # hanya baris yang diminta yang dibaca & di-decompress
+        query = select(Tafsir.nomor_ayat, Tafsir.tafsir).where(Tafsir.surah_id == surah_model.id)
+        if ayat is not None:
+            query = query.where(Tafsir.nomor_ayat == ayat)
+        if after_ayat:
+            query = query.where(Tafsir.nomor_ayat > after_ayat)
+        query = query.order_by(Tafsir.nomor_ayat)
+        if limit:
+            query = query.limit(limit)
+        tafsir_rows = db.session.execute(query).all()
+        if not tafsir_rows:
+            return surah_model, None
+
+        return surah_model, {
+            "nomor": surah_model.nomor,
+            "nama": surah_model.nama,
+            "tafsir": EQuranService._format_tafsir(tafsir_rows, excerpt)
+        }
 
-            # Fetch dari API
-            raw = EQuranService._get(f"/tafsir/{nomor}")
-            data = raw.get("data") if isinstance(raw, dict) else raw
-            tafsir_data = data.get("tafsir", []) if isinstance(data, dict) else (data or [])
+    @staticmethod
+    def _fetch_and_store_tafsir(nomor):
+        """
+        SingleFlight leader for get_tafsir: fetch the whole surah tafsir from API and persist it.
+        Returns the raw tafsir list, or None when another process already stored it.
+        """
+        surah_model = Surah.query.filter_by(nomor=nomor).first()
+        if surah_model and db.session.execute(
+            select(Tafsir.id).where(Tafsir.surah_id == surah_model.id).limit(1)
+        ).first():
+            return None
+
+        raw = EQuranService._get(f"/tafsir/{nomor}")
+        data = raw.get("data") if isinstance(raw, dict) else raw
+        tafsir_data = data.get("tafsir", []) if isinstance(data, dict) else (data or [])
+
+        # Simpan ke DB (best-effort); surah (FK) disimpan dulu kalau belum ada
+        if tafsir_data:
+            try:
+                if not surah_model:
+                    EQuranService._fetch_once(f"surah:{nomor}", EQuranService._fetch_and_store_surah, nomor)
+                _, written = IngestService.ingest(nomor, tafsir_data=tafsir_data)
+                logger.info("Saved %s tafsir for surah %s to DB", written, nomor)
+            except Exception as db_exc:
+                logger.exception("Failed to persist tafsir for surah %s (continuing): %s", nomor, db_exc)
 
-            # Simpan ke DB (best-effort)
-            if tafsir_data:
-                try:
-                    if not surah_model:
-                        surah_model = Surah.query.filter_by(nomor=nomor).first()
-                    for item in tafsir_data:
-                        db.session.merge(Tafsir(
-                            surah_id=surah_model.id if surah_model else None,
-                            nomor_ayat=item.get("ayat"),
-                            tafsir=item.get("teks") or item.get("tafsir") or item.get("text") or ""
-                        ))
-                    db.session.commit()
-                    logger.info(f"Saved tafsir for surah {nomor} to DB")
-                except Exception as db_exc:
-                    logger.exception(f"Failed to persist tafsir for surah {nomor} (continuing): {db_exc}")
-
-            # Filter per ayat jika dibutuhkan
-            if ayat:
-                try:
-                    tafsir_data = [t for t in tafsir_data if t.get("ayat") == int(ayat)]
-                except ValueError:
-                    pass
+        return tafsir_data
 
-            return {
+    @staticmethod
+    def get_tafsir(nomor, ayat=None, page=None, limit=None, after=None, excerpt=None):
+        """
+        Tafsir satu surah (atau satu ayat). Tanpa page/limit/after seluruh tafsir dikembalikan seperti dulu;
+        dengan salah satunya hasil dipaging pakai keyset nomor_ayat dan diberi "meta".
+        excerpt=N memotong tiap tafsir jadi kira-kira N karakter (+ "truncated").
+        NotFoundError untuk surah/ayat di luar tabel statis.
+        """
+        ayat = EQuranService._to_int(ayat) if ayat else None
+        EQuranService.check_ref(nomor, ayat)
+        try:
+            paginate = ayat is None and (page is not None or limit is not None or bool(after))
+            after_ayat = None
+            if paginate:
+                limit = limit or 20
+                after_ayat = EQuranService._resolve_after(page or 1, limit, after)
+            else:
+                limit = None
+
+            def from_db():
+                surah_model, result = EQuranService._get_tafsir_from_db(nomor, ayat, after_ayat, limit, excerpt)
+                if result and paginate:
+                    result["meta"] = EQuranService._page_meta(surah_model.jumlah_ayat, limit, result["tafsir"], key="ayat")
+                return surah_model, result
+
+            # Ambil dari DB jika ada
+            surah_model, result = from_db()
+            if result:
+                DATA_SOURCE.inc(resource="tafsir", source="db")
+                logger.info("Retrieved tafsir for surah %s from DB", nomor)
+                return result
+
+            # Fetch dari API (satu fetch per surah walau banyak request bersamaan), lalu baca ulang dari DB
+            # supaya ?ayat= / halaman tetap hanya men-decompress baris yang diminta
+            tafsir_data = EQuranService._fetch_once(f"tafsir:{nomor}", EQuranService._fetch_and_store_tafsir, nomor)
+            DATA_SOURCE.inc(resource="tafsir", source="api")
+            surah_model, result = from_db()
+            if result:
+                return result
+
+            # persist gagal: layani dari data mentah API
+            items = [
+                (EQuranService._to_int(t.get("ayat")), t.get("teks") or t.get("tafsir") or t.get("text") or "")
+                for t in (tafsir_data or [])
+            ]
+            if ayat is not None:
+                items = [item for item in items if item[0] == ayat]
+            total = len(items)
+            if paginate:
+                items = [item for item in items if (item[0] or 0) > after_ayat][:limit]
+
+            if surah_model is None:
+                surah_model = Surah.query.filter_by(nomor=nomor).first()
+
+            result = {
                 "nomor": nomor,
                 "nama": surah_model.nama if surah_model else None,
-                "tafsir": tafsir_data
+                "tafsir": EQuranService._format_tafsir(items, excerpt)
             }
+            if paginate:
+                result["meta"] = EQuranService._page_meta(total, limit, result["tafsir"], key="ayat")
+            return result
+        except EQuranAPIError:
+            # sudah dicatat EQuranClient (atau hit negative cache); controller menjawab 502
+            raise
+        except (NotFoundError, ValueError):
+            # kesalahan klien (nomor di luar jangkauan, cursor ?after= rusak, ?qari= tak dikenal): 404/400, bukan error server
+            raise
         except Exception as e:
-            logger.error(f"Error in get_tafsir for surah {nomor}", exc_info=True)
+            logger.error("Error in get_tafsir for surah %s", nomor, exc_info=True)
             raise
 
+    @staticmethod
+    def parse_ayat_ref(ref):
+        """Parse "2" or "2:255" into (surah, ayat or None). Raises ValueError on bad input."""
+        surah, _, ayat = str(ref).strip().partition(":")
+        surah = int(surah)
+        ayat = int(ayat) if ayat else None
+        if surah < 1 or (ayat is not None and ayat < 1):
+            raise ValueError(f"Invalid ayat reference: {ref}")
+        return surah, ayat
+
+    @staticmethod
+    def iter_ayat_ndjson(start=None, end=None, batch_size=500, qari=None):
+        """
+        Yield one NDJSON line per ayat between start and end (inclusive, each (surah, ayat or None)),
+        urut mushaf. Rows are pulled through a streaming cursor in batches of `batch_size`,
+        so memory stays constant regardless of range size. qari divalidasi caller sebelum streaming.
+        """
+        query = (
+            select(Surah.nomor.label("surah"), Ayat.nomor_ayat, Ayat.teks_arab, Ayat.teks_latin,
+                   Ayat.teks_indonesia, Ayat.audio_url)
+            .join(Surah, Surah.id == Ayat.surah_id)
+            .order_by(Surah.nomor, Ayat.nomor_ayat)
+        )
+        if start:
+            s, a = start
+            query = query.where(or_(Surah.nomor > s, and_(Surah.nomor == s, Ayat.nomor_ayat >= (a or 1))))
+        if end:
+            s, a = end
+            upper = and_(Surah.nomor == s, Ayat.nomor_ayat <= a) if a else Surah.nomor == s
+            query = query.where(or_(Surah.nomor < s, upper))
+
+        result = db.session.execute(query.execution_options(yield_per=batch_size))
+        count = 0
+        for row in result:
+            item = EQuranService._normalize_ayat_from_db(row, row.surah, qari)
+            item.surah = row.surah
+            count += 1
+            yield dumps(item) + "\n"
+        logger.info("Exported %s ayat as NDJSON (start=%s, end=%s)", count, start, end)
+
+    @staticmethod
+    def parse_ayat_refs(refs):
+        """
+        Parse a compact reference list like "2:255,3:1-10,112" into [(token, surah, start, end)].
+        start/end are None for a whole surah. Raises ValueError on bad input, termasuk surah di luar 1-114
+        atau ayat awal melewati jumlah ayat surah (dicek ke tabel statis, tanpa query).
+        """
+        parsed = []
+        for token in (refs or "").split(","):
+            token = token.strip()
+            if not token:
+                continue
+            surah, _, ayat = token.partition(":")
+            try:
+                surah = int(surah)
+                if ayat:
+                    lo, _, hi = ayat.partition("-")
+                    start, end = int(lo), int(hi or lo)
+                else:
+                    start = end = None
+            except ValueError:
+                raise ValueError(f"Referensi ayat tidak valid: {token}")
+            if surah < 1 or (start is not None and (start < 1 or end < start)):
+                raise ValueError(f"Referensi ayat tidak valid: {token}")
+            jumlah = quran_index.jumlah_ayat(surah)
+            if jumlah is None:
+                raise ValueError(f"Surah {surah} tidak ditemukan")
+            if start is not None and start > jumlah:
+                raise ValueError(f"Ayat {surah}:{start} tidak ada (surah {surah} memiliki {jumlah} ayat)")
+            parsed.append((token, surah, start, end))
+        if not parsed:
+            raise ValueError("Parameter ref wajib diisi")
+        return parsed
+
+    @staticmethod
+    def _resolve_surah_ids(nomors, fetch_missing=True):
+        """
+        Map surah nomor -> (surah.id, jumlah_ayat); surah yang belum tersimpan di-fetch dulu (single-flight).
+        Nomor di luar tabel statis 114 surah tidak pernah di-query maupun di-fetch (tidak ada di hasil).
+        """
+        nomors = {nomor for nomor in nomors if quran_index.jumlah_ayat(nomor) is not None}
+
+        def load():
+            rows = db.session.execute(
+                select(Surah.nomor, Surah.id, Surah.jumlah_ayat).where(Surah.nomor.in_(nomors))
+            ).all()
+            return {nomor: (surah_id, jumlah) for nomor, surah_id, jumlah in rows}
+
+        surah_map = load()
+        missing = set(nomors) - set(surah_map)
+        if missing and fetch_missing:
+            for nomor in sorted(missing):
+                try:
+                    EQuranService.get_surah_detail(nomor=nomor, page=1, limit=1)
+                except Exception:
+                    logger.warning("Surah %s could not be loaded", nomor, exc_info=True)
+            surah_map = load()
+        return surah_map
+
+    @staticmethod
+    def resolve_ayat_keys(items, fetch_missing=True):
+        """
+        Map [(surah nomor, ayat)] to [(surah.id, ayat)] for user data (bookmark, note).
+        Raises ValueError for an unknown surah or an ayat out of range; with fetch_missing=False
+        surah yang tidak tersimpan dilewati saja (mis. untuk delete).
+        """
+        surah_map = EQuranService._resolve_surah_ids({surah for surah, _ in items}, fetch_missing=fetch_missing)
+        keys = []
+        for surah, ayat in items:
+            if surah not in surah_map:
+                if not fetch_missing:
+                    continue
+                raise ValueError(f"Surah {surah} tidak ditemukan")
+            surah_id, jumlah = surah_map[surah]
+            if jumlah and ayat > jumlah:
+                raise ValueError(f"Ayat {surah}:{ayat} tidak ada (surah {surah} memiliki {jumlah} ayat)")
+            keys.append((surah_id, ayat))
+        return keys
+
+    @staticmethod
+    def get_ayat_batch(refs, max_ayat=None, qari=None):
+        """
+        Resolve scattered verse references with one set-based query over ayat.
+        Returns {"items": [ayat + "surah", in request order], "missing": [token], "meta": {...}}.
+        Referensi di luar tabel statis -> ValueError (400); "missing" hanya berisi referensi valid yang
+        surahnya tidak bisa dimuat (belum di DB dan upstream gagal). Surah yang belum ada di DB di-fetch
+        dari API (single-flight) sebelum query.
+        """
+        max_ayat = max_ayat or Config.BATCH_AYAT_LIMIT
+        parsed = EQuranService.parse_ayat_refs(refs)
+        surah_map = EQuranService._resolve_surah_ids({surah for _, surah, _, _ in parsed})
+
+        # hitung total ayat yang diminta sebelum query (hard cap)
+        ranges, missing, requested = [], [], 0
+        for token, surah, start, end in parsed:
+            if surah not in surah_map:
+                missing.append(token)
+                continue
+            surah_id, jumlah = surah_map[surah]
+            start = start or 1
+            end = min(end or jumlah or 0, jumlah or end or 0)
+            if start > end:
+                missing.append(token)
+                continue
+            requested += end - start + 1
+            ranges.append((surah, surah_id, start, end))
+        if requested > max_ayat:
+            raise ValueError(f"Terlalu banyak ayat diminta ({requested}), maksimal {max_ayat} per request")
+
+        ReciterService.require(qari)
+        rows_by_key = {}
+        if ranges:
+            unique_ranges = set((surah_id, start, end) for _, surah_id, start, end in ranges)
+            rows = db.session.execute(
+                select(Surah.nomor.label("surah"), Ayat.nomor_ayat, Ayat.teks_arab, Ayat.teks_latin,
+                       Ayat.teks_indonesia, Ayat.audio_url)
+                .join(Surah, Surah.id == Ayat.surah_id)
+                .where(or_(*[
+                    and_(Ayat.surah_id == surah_id, Ayat.nomor_ayat.between(start, end))
+                    for surah_id, start, end in unique_ranges
+                ]))
+            ).all()
+            rows_by_key = {(r.surah, r.nomor_ayat): r for r in rows}
+
+        items = []
+        for surah, _, start, end in ranges:
+            for nomor_ayat in range(start, end + 1):
+                row = rows_by_key.get((surah, nomor_ayat))
+                if row is None:
+                    continue
+                item = EQuranService._normalize_ayat_from_db(row, surah, qari)
+                item.surah = surah
+                items.append(item)
+
+        logger.info("Batch lookup resolved %s ayat from %s reference(s)", len(items), len(parsed))
+        return {
+            "items": items,
+            "missing": missing,
+            "meta": {"requested": requested, "returned": len(items), "max_ayat": max_ayat}
+        }
+
     @staticmethod
     def generate_audio_url(surah, ayat=None):
         surah_str = quote(str(surah))
         audio_url = f"{BASE_URL}/audio/{surah_str}.mp3" if not ayat else f"{BASE_URL}/audio/{surah_str}/{quote(str(ayat))}.mp3"
-        logger.debug(f"Generated audio URL: {audio_url}")
+        logger.debug("Generated audio URL: %s", audio_url)
         return {"audio_url": audio_url}
 
+    @staticmethod
+    def resolve_audio_source(surah, ayat=None, qari=None):
+        """
+        Upstream MP3 URL for a surah or one ayat. Audio per ayat diturunkan dari template reciter (per qari,
+        default AUDIO_DEFAULT_QARI); kalau ayat belum tersimpan, pakai URL dari generate_audio_url.
+        NotFoundError untuk surah/ayat di luar tabel statis (tidak ada download upstream),
+        ValueError untuk qari yang tidak dikenal (tidak jatuh diam-diam ke qari lain).
+        """
+        EQuranService.check_ref(surah, ayat)
+        ReciterService.require(qari)
+        if ayat is not None:
+            row = db.session.execute(
+                select(Ayat.audio_url)
+                .join(Surah, Surah.id == Ayat.surah_id)
+                .where(Surah.nomor == surah, Ayat.nomor_ayat == ayat)
+            ).first()
+            audio = ReciterService.audio_map(surah, ayat, override=row.audio_url) if row is not None else {}
+            if audio:
+                url = audio.get(qari) if qari else audio.get(Config.AUDIO_DEFAULT_QARI) or next(iter(audio.values()))
+                if url:
+                    return url
+        return EQuranService.generate_audio_url(surah, ayat)["audio_url"]
+
+    @staticmethod
+    def get_cached_audio(surah, ayat=None, qari=None):
+        """
+        Return (local_path, upstream_url). local_path is None when the audio cache is disabled.
+        Miss pertama men-download file (streaming) ke cache; putar ulang berikutnya dilayani dari disk.
+        """
+        url = EQuranService.resolve_audio_source(surah, ayat, qari)
+        if not audio_cache.enabled:
+            return None, url
+        return audio_cache.get_path(url, audio_client.download), url
+
+    @staticmethod
+    def audio_cache_status():
+        return audio_cache.stats()
+
+    @staticmethod
+    def upstream_status():
+        return equran_client.stats()
+
+    @staticmethod
+    def audio_upstream_status():
+        return audio_client.stats()
+
+    @staticmethod
+    def singleflight_status():
+        return EQuranService._flight.stats()
+
+    @staticmethod
+    def corpus_store_status():
+        return corpus_store.stats()
+
+    @staticmethod
+    def surah_list_cache_status():
+        return EQuranService._surah_list_cache.stats()
+
+    @staticmethod
+    def shared_cache_status():
+        return shared_cache.stats()
+
+    @staticmethod
+    def response_cache_status():
+        return response_cache.stats()
+
+    @staticmethod
+    def database_status():
+        return database_status(db.engines)
+
     @staticmethod
     def clear_surah_cache():
-        EQuranService._fetch_all_surah_raw.cache_clear()
+        # versi bersama dinaikkan: semua worker membuang daftar surah, negative cache & response cache-nya
+        shared_cache.invalidate("surah_list")
+        shared_cache.invalidate(NEGATIVE_NAMESPACE)
+        EQuranService._surah_list_cache.invalidate()
+        response_cache.invalidate()
         logger.info("Cleared surah cache")
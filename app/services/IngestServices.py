@@ -0,0 +1,376 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import select, update, bindparam, type_coerce, Text
+
+from config.config import Config
+from app.models.EquranModels import Surah, Ayat, Reciter, Tafsir
+from app.models.types import is_compressed, compress_value
+from app.extension import db
+from app.database import upsert
+from app.services.CorpusStore import corpus_store
+from app.services.ReciterServices import ReciterService, QARI_NAMES
+from app.response_cache import response_cache
+from app.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class IngestError(ValueError):
+    """Data from the API cannot be stored (e.g. tafsir for a surah that is not in DB)."""
+
+
+def _to_int(value, default=None):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class IngestService:
+    """
+    Satu jalur tulis untuk data korpus dari API (surah meta, ayat, tafsir).
+
+    Semua tulis pakai Core executemany `INSERT ... ON CONFLICT (...) DO UPDATE` (atau padanannya per dialect),
+    per batch satu statement multi-VALUES, dan FK surah divalidasi sebelum ayat/tafsir ditulis,
+    jadi tidak ada baris dengan surah_id=None dan tidak ada SELECT per baris.
+    """
+
+    # diset split_audio saat qari baru terdaftar; cache template di-invalidate setelah commit
+    _reciters_changed = False
+
+    # ----------------------
+    # Row builders
+    # ----------------------
+    @staticmethod
+    def surah_row(data, surah_meta, jumlah_ayat=None):
+        return {
+            "nomor": surah_meta["nomor"],
+            "nama": surah_meta["nama"],
+            "nama_latin": surah_meta["nama_latin"],
+            "arti": data.get("arti") or data.get("meaning") or "",
+            "jumlah_ayat": _to_int(data.get("jumlahAyat"), default=jumlah_ayat),
+            "tempat_turun": data.get("tempatTurun") or data.get("revelation") or "",
+            "deskripsi": data.get("deskripsi") or data.get("description")
+        }
+
+    @staticmethod
+    def ayat_rows(surah_id, nomor, formatted_ayat):
+        """
+        Rows for the ayat table from AyatDTO items. Audio tidak disimpan per baris: URL yang cocok template
+        reciter dibuang, hanya pengecualian yang masuk audio_url (lihat split_audio).
+        """
+        items = {}
+        for ay in formatted_ayat:
+            nomor_ayat = _to_int(ay.nomor)
+            if nomor_ayat is not None:
+                items[nomor_ayat] = ay  # duplikat nomor dalam satu batch bikin ON CONFLICT error di Postgres
+        overrides = IngestService.split_audio([(nomor, n, ay.audio.load()) for n, ay in items.items()])
+        return [
+            {
+                "surah_id": surah_id,
+                "nomor_ayat": nomor_ayat,
+                "teks_arab": ay.arab,
+                "teks_latin": ay.latin,
+                "teks_indonesia": ay.indonesia,
+                "audio_url": override
+            }
+            for (nomor_ayat, ay), override in zip(items.items(), overrides)
+        ]
+
+    @staticmethod
+    def tafsir_rows(surah_id, tafsir_data):
+        rows = {}
+        for item in tafsir_data:
+            nomor_ayat = _to_int(item.get("ayat"))
+            if nomor_ayat is None:
+                continue
+            rows[nomor_ayat] = {
+                "surah_id": surah_id,
+                "nomor_ayat": nomor_ayat,
+                "tafsir": item.get("teks") or item.get("tafsir") or item.get("text") or ""
+            }
+        return list(rows.values())
+
+    # ----------------------
+    # Writes (caller commits)
+    # ----------------------
+    @staticmethod
+    def require_surah(nomor):
+        """Return surah.id for `nomor` or raise IngestError (FK check before writing children)."""
+        surah_id = db.session.execute(select(Surah.id).where(Surah.nomor == nomor)).scalar()
+        if surah_id is None:
+            raise IngestError(f"Surah {nomor} is not stored")
+        return surah_id
+
+    @staticmethod
+    def upsert_surah(row):
+        upsert(db.session, Surah, [row], ("nomor",), [c for c in row if c != "nomor"])
+        return IngestService.require_surah(row["nomor"])
+
+    @staticmethod
+    def split_audio(items):
+        """
+        items: [(surah, ayat, {qari: url})]. Qari baru didaftarkan ke tabel reciter dengan template dari URL
+        pertamanya (insert-or-ignore, jadi template yang sudah ada tidak berubah). Returns per item teks JSON
+        berisi URL yang tidak bisa diturunkan dari template (pengecualian), atau None. Caller commits.
+        """
+        templates = ReciterService.load_templates()
+        new = {}
+        for surah, ayat, audio in items:
+            for kode, url in audio.items():
+                if kode in templates or kode in new or "{" in kode or "}" in kode:
+                    continue
+                template = ReciterService.derive_template(url, surah, ayat)
+                if template:
+                    new[kode] = template
+        if new:
+            upsert(
+                db.session, Reciter,
+                [{"kode": kode, "nama": QARI_NAMES.get(kode), "ayat_template": t} for kode, t in new.items()],
+                ("kode",), ()
+            )
+            # proses lain bisa lebih dulu mendaftarkan qari yang sama: pakai template yang tersimpan
+            templates = ReciterService.load_templates()
+            IngestService._reciters_changed = True
+            logger.info("Registered reciter template(s): %s", ", ".join(sorted(new)))
+
+        overrides = []
+        for surah, ayat, audio in items:
+            extra = {
+                kode: url for kode, url in audio.items()
+                if kode not in templates or templates[kode].format(surah=surah, ayat=ayat) != url
+            }
+            overrides.append(json.dumps(extra) if extra else None)
+        return overrides
+
+    @staticmethod
+    def upsert_ayat(surah_id, nomor, formatted_ayat):
+        return upsert(
+            db.session, Ayat, IngestService.ayat_rows(surah_id, nomor, formatted_ayat),
+            ("surah_id", "nomor_ayat"), ("teks_arab", "teks_latin", "teks_indonesia", "audio_url")
+        )
+
+    @staticmethod
+    def upsert_tafsir(surah_id, tafsir_data):
+        return upsert(
+            db.session, Tafsir, IngestService.tafsir_rows(surah_id, tafsir_data),
+            ("surah_id", "nomor_ayat"), ("tafsir",)
+        )
+
+    # ----------------------
+    # Transaction
+    # ----------------------
+    @staticmethod
+    def ingest(nomor, surah_data=None, surah_meta=None, formatted_ayat=None, tafsir_data=None):
+        """
+        Store one surah's API data in a single transaction: surah meta + ayat and/or tafsir.
+        Tafsir tanpa surah_data hanya ditulis bila surah sudah ada di DB (IngestError kalau belum).
+        Returns (ayat_rows, tafsir_rows).
+        """
+        ayat_written, tafsir_written = 0, 0
+        try:
+            if surah_data is not None:
+                surah_id = IngestService.upsert_surah(
+                    IngestService.surah_row(surah_data, surah_meta, jumlah_ayat=len(formatted_ayat or []))
+                )
+                ayat_written = IngestService.upsert_ayat(surah_id, nomor, formatted_ayat or [])
+            else:
+                surah_id = IngestService.require_surah(nomor)
+            if tafsir_data:
+                tafsir_written = IngestService.upsert_tafsir(surah_id, tafsir_data)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        IngestService._notify_persisted(surah_changed=surah_data is not None, surahs=[nomor])
+        logger.debug("Ingested surah %s: %s ayat, %s tafsir", nomor, ayat_written, tafsir_written)
+        return ayat_written, tafsir_written
+
+    # ----------------------
+    # Maintenance
+    # ----------------------
+    @staticmethod
+    def compress_tafsir(batch_size=None, vacuum=False):
+        """
+        Rewrite legacy plain-text tafsir rows in compressed form (idempotent, one commit per batch).
+        Returns {"rows_scanned", "rows_compressed", "bytes_before", "bytes_after", "db_bytes_before", "db_bytes_after", "seconds"}.
+        """
+        started = time.perf_counter()
+        batch_size = batch_size or Config.INGEST_BATCH_SIZE
+        table = Tafsir.__table__
+        dialect = db.session.get_bind().dialect.name
+        db_path = db.engine.url.database if dialect == "sqlite" else None
+        db_size = lambda: os.path.getsize(db_path) if db_path and os.path.exists(db_path) else None
+
+        report = {"rows_scanned": 0, "rows_compressed": 0, "bytes_before": 0, "bytes_after": 0,
+                  "db_bytes_before": db_size()}
+        # type_coerce ke Text: baca nilai mentah tanpa decompress otomatis
+        raw_col = type_coerce(table.c.tafsir, Text)
+        stmt = update(table).where(table.c.id == bindparam("_id")).values(tafsir=bindparam("_tafsir"))
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                select(table.c.id, raw_col).where(table.c.id > last_id).order_by(table.c.id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            pending = []
+            for row_id, raw in rows:
+                report["rows_scanned"] += 1
+                size = len(raw) if isinstance(raw, (bytes, bytearray)) else len((raw or "").encode("utf-8"))
+                report["bytes_before"] += size
+                if raw is None or is_compressed(raw):
+                    report["bytes_after"] += size
+                    continue
+                packed = compress_value(raw, dialect)
+                report["bytes_after"] += len(packed) if isinstance(packed, bytes) else len(packed.encode("utf-8"))
+                if packed is not raw:
+                    pending.append({"_id": row_id, "_tafsir": raw})
+            if pending:
+                db.session.execute(stmt, pending)  # CompressedText meng-compress saat bind
+                report["rows_compressed"] += len(pending)
+            db.session.commit()
+
+        if vacuum and dialect == "sqlite":
+            with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                conn.exec_driver_sql("VACUUM")
+        report["db_bytes_after"] = db_size()
+        report["seconds"] = round(time.perf_counter() - started, 3)
+        if report["rows_compressed"]:
+            IngestService._notify_persisted(surah_changed=False)
+        logger.info(
+            "Tafsir compression: %s/%s rows rewritten, %s -> %s bytes",
+            report['rows_compressed'], report['rows_scanned'], report['bytes_before'], report['bytes_after']
+        )
+        return report
+
+    @staticmethod
+    def migrate_audio(batch_size=None, vacuum=False):
+        """
+        Move legacy per-ayat audio JSON blobs to reciter templates: kolom audio_url jadi NULL, atau hanya berisi
+        URL pengecualian. Idempotent (baris yang sudah bersih tidak ditulis ulang), satu commit per batch.
+        Returns {"rows_scanned", "rows_rewritten", "rows_override", "bytes_before", "bytes_after",
+        "db_bytes_before", "db_bytes_after", "seconds"}.
+        """
+        started = time.perf_counter()
+        batch_size = batch_size or Config.INGEST_BATCH_SIZE
+        dialect = db.session.get_bind().dialect.name
+        db_path = db.engine.url.database if dialect == "sqlite" else None
+        db_size = lambda: os.path.getsize(db_path) if db_path and os.path.exists(db_path) else None
+
+        report = {"rows_scanned": 0, "rows_rewritten": 0, "rows_override": 0, "bytes_before": 0, "bytes_after": 0,
+                  "db_bytes_before": db_size()}
+        table = Ayat.__table__
+        stmt = update(table).where(table.c.id == bindparam("_id")).values(audio_url=bindparam("_audio"))
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                select(table.c.id, Surah.nomor, table.c.nomor_ayat, table.c.audio_url)
+                .join(Surah, Surah.id == table.c.surah_id)
+                .where(table.c.id > last_id, table.c.audio_url.isnot(None))
+                .order_by(table.c.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            items = []
+            for _, surah, ayat, raw in rows:
+                try:
+                    audio = json.loads(raw)
+                except ValueError:
+                    audio = {}
+                items.append((surah, ayat, audio if isinstance(audio, dict) else {}))
+            overrides = IngestService.split_audio(items)
+
+            pending = []
+            for (row_id, _, _, raw), override in zip(rows, overrides):
+                report["rows_scanned"] += 1
+                report["bytes_before"] += len(raw.encode("utf-8"))
+                report["bytes_after"] += len(override.encode("utf-8")) if override else 0
+                report["rows_override"] += 1 if override else 0
+                if override != raw:
+                    pending.append({"_id": row_id, "_audio": override})
+            if pending:
+                db.session.execute(stmt, pending)
+                report["rows_rewritten"] += len(pending)
+            db.session.commit()
+
+        if vacuum and dialect == "sqlite":
+            with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                conn.exec_driver_sql("VACUUM")
+        report["db_bytes_after"] = db_size()
+        report["seconds"] = round(time.perf_counter() - started, 3)
+        if report["rows_rewritten"] or IngestService._reciters_changed:
+            IngestService._notify_persisted(surah_changed=True)
+            logger.info(
+                "Audio migration: %s/%s ayat rewritten (%s with overrides), %s -> %s bytes",
+                report['rows_rewritten'], report['rows_scanned'], report['rows_override'],
+                report['bytes_before'], report['bytes_after']
+            )
+        return report
+
+    # invalidasi tertunda per thread selama deferred_notifications(): {"surahs": {nomor: surah_changed}, "all": ...}
+    _deferred = threading.local()
+    # sebanyak ini surah tertunda atau lebih: satu invalidasi penuh lebih murah daripada bump versi per surah
+    _FULL_INVALIDATION_AT = 32
+
+    @staticmethod
+    @contextmanager
+    def deferred_notifications():
+        """
+        Coalesce the cache invalidations of every commit in this block (warm-up, bundle import) into one at exit.
+        Hanya berlaku untuk thread pemanggil; request lain tetap meng-invalidate per surah seperti biasa.
+        """
+        state = IngestService._deferred
+        if getattr(state, "pending", None) is not None:
+            yield  # nested: blok terluar yang mengirim
+            return
+        state.pending = pending = {"surahs": {}, "all": None}
+        try:
+            yield
+        finally:
+            state.pending = None
+            if pending["all"] is not None or len(pending["surahs"]) >= IngestService._FULL_INVALIDATION_AT:
+                IngestService._notify_persisted(surah_changed=bool(pending["all"]) or any(pending["surahs"].values()))
+            elif pending["surahs"]:
+                changed = [nomor for nomor, surah_changed in pending["surahs"].items() if surah_changed]
+                if changed:
+                    IngestService._notify_persisted(surah_changed=True, surahs=changed)
+                tafsir_only = [nomor for nomor, surah_changed in pending["surahs"].items() if not surah_changed]
+                if tafsir_only:
+                    IngestService._notify_persisted(surah_changed=False, surahs=tafsir_only)
+
+    @staticmethod
+    def _notify_persisted(surah_changed=True, surahs=None):
+        """
+        Hook after a successful commit of corpus data. `surahs`: hanya surah ini yang di-invalidate
+        (response cache & corpus store per surah); None = seluruh korpus. surah_changed=False: hanya tafsir.
+        """
+        pending = getattr(IngestService._deferred, "pending", None)
+        if pending is not None:
+            if surahs is None:
+                pending["all"] = bool(pending["all"]) or surah_changed
+            else:
+                for nomor in surahs:
+                    pending["surahs"][nomor] = pending["surahs"].get(nomor, False) or surah_changed
+            return
+
+        reciters_changed = IngestService._reciters_changed
+        if reciters_changed:
+            IngestService._reciters_changed = False
+            ReciterService.invalidate()
+        if surah_changed:
+            corpus_store.invalidate(surahs)
+        if surahs is None or reciters_changed:
+            # qari baru mengubah audio di semua respons
+            response_cache.invalidate()
+        else:
+            # tafsir saja: respons lintas surah (list, batch ayat, juz) tidak memuat tafsir
+            response_cache.invalidate_surahs(surahs, corpus=surah_changed)
@@ -0,0 +1,103 @@
+from sqlalchemy import select, or_
+
+from app.models.EquranModels import Surah, Ayat
+from app.extension import db
+from app.services.CorpusStore import corpus_store
+from app.services.EquranServices import EQuranService
+from app.services.QuranIndex import KINDS, quran_index
+from app.services.ReciterServices import ReciterService
+from app.metrics import DATA_SOURCE
+from app.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class NavigationService:
+    """Juz / hizb / rubu' / page reads; batas unit dari quran_index (tanpa query), ayat lewat satu range query."""
+
+    @staticmethod
+    def list_units(kind=None):
+        """{kind: [{nomor, start, end, total_ayat}]} for all kinds or only `kind` (ValueError if unknown)."""
+        if kind is not None and kind not in KINDS:
+            raise ValueError(f"Jenis navigasi {kind} tidak dikenal")
+        kinds = [kind] if kind else list(KINDS)
+        return {k: [quran_index.describe(k, nomor) for nomor in range(1, quran_index.count(k) + 1)] for k in kinds}
+
+    @staticmethod
+    def locate(surah, ayat):
+        """{kind: nomor} of every unit containing surah:ayat."""
+        return {kind: quran_index.locate(kind, surah, ayat) for kind in KINDS}
+
+    @staticmethod
+    def _from_corpus(segments, qari):
+        """Ayat for `segments` from the in-memory corpus store, or None if a surah is not loaded."""
+        items = []
+        for surah, start, end in segments:
+            stored = corpus_store.get_surah_page(surah, after_ayat=start - 1, limit=end - start + 1, qari=qari)
+            if stored is None:
+                return None
+            for item in stored["ayat"]:
+                item.surah = surah
+            items.extend(stored["ayat"])
+        return items
+
+    @staticmethod
+    def _query_range(segments):
+        """
+        All ayat rows of `segments` in one range query, urut mushaf. Batas surah (BETWEEN) membatasi scan ke
+        index unik surah.nomor, lalu tiap surah di-seek lewat index (surah_id, nomor_ayat).
+        """
+        (first_surah, first_ayat, _), (last_surah, _, last_ayat) = segments[0], segments[-1]
+        query = (
+            select(Surah.nomor.label("surah"), Ayat.nomor_ayat, Ayat.teks_arab, Ayat.teks_latin,
+                   Ayat.teks_indonesia, Ayat.audio_url)
+            .join(Surah, Surah.id == Ayat.surah_id)
+            .where(Surah.nomor.between(first_surah, last_surah))
+            .where(or_(Surah.nomor > first_surah, Ayat.nomor_ayat >= first_ayat))
+            .where(or_(Surah.nomor < last_surah, Ayat.nomor_ayat <= last_ayat))
+            .order_by(Surah.nomor, Ayat.nomor_ayat)
+        )
+        return db.session.execute(query).all()
+
+    @staticmethod
+    def get_unit(kind, nomor, qari=None):
+        """
+        Ayat of one juz / hizb / rubu' / page:
+        {"kind", "nomor", "start", "end", "total_ayat", "segments", "prev", "next", "ayat": [...], "missing": [...]}
+        Satu range query atas ayat (atau corpus store bila aktif); surah yang belum tersimpan di-fetch dulu.
+        ValueError untuk unit atau qari yang tidak dikenal.
+        """
+        result = quran_index.describe(kind, nomor)
+        segments = quran_index.segments(*quran_index.unit(kind, nomor))
+        ReciterService.require(qari)
+
+        items = NavigationService._from_corpus(segments, qari) if corpus_store.enabled else None
+        if items is not None:
+            DATA_SOURCE.inc(resource=kind, source="memory")
+        else:
+            rows = NavigationService._query_range(segments)
+            if len(rows) < result["total_ayat"]:
+                # sebagian surah belum tersimpan (korpus belum di-warm-up): fetch lalu ulangi query
+                stored = {row.surah for row in rows}
+                missing = sorted({surah for surah, _, _ in segments} - stored)
+                logger.info("%s %s: fetching %s surah not in DB yet", KINDS[kind], nomor, len(missing))
+                EQuranService._resolve_surah_ids(missing)
+                rows = NavigationService._query_range(segments)
+            DATA_SOURCE.inc(resource=kind, source="db")
+            items = []
+            for row in rows:
+                item = EQuranService._normalize_ayat_from_db(row, row.surah, qari)
+                item.surah = row.surah
+                items.append(item)
+
+        returned = {item.surah for item in items}
+        logger.info("Returned %s %s with %s ayat", KINDS[kind], nomor, len(items))
+        result.update({
+            "kind": kind,
+            "segments": [{"surah": surah, "from": start, "to": end} for surah, start, end in segments],
+            "prev": nomor - 1 if nomor > 1 else None,
+            "next": nomor + 1 if nomor < quran_index.count(kind) else None,
+            "ayat": items,
+            "missing": [surah for surah, _, _ in segments if surah not in returned]
+        })
+        return result
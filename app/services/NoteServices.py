@@ -0,0 +1,234 @@
+import base64
+import binascii
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update, func, and_, or_, tuple_
+
+from config.config import Config
+from app.models.EquranModels import Surah, Note, NoteClock
+from app.extension import db
+from app.database import upsert
+from app.services.EquranServices import EQuranService
+from app.logger import get_logger
+
+logger = get_logger(__name__)
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class NoteService:
+    """
+    Catatan per ayat per user, untuk klien offline-first.
+
+    - unique index (user_id, surah_id, nomor_ayat): satu note per ayat, simpan = INSERT ... ON CONFLICT DO UPDATE
+    - hapus = tombstone (content NULL, deleted_at diisi) supaya perangkat lain ikut menghapus saat sync
+    - delta sync: index (user_id, updated_at, id), keyset "berubah setelah cursor" -> hanya baris yang berubah dikirim
+    - tulis per user diserialisasi lewat baris note_clock, jadi updated_at ter-commit berurutan
+    """
+
+    # ----------------------
+    # Input
+    # ----------------------
+    @staticmethod
+    def parse_items(payload, max_items=None, delete=False):
+        """
+        Accept {"surah", "ayat", "content"} or {"items": [...]}; an item with "deleted": true (or every item
+        when `delete`) is a delete.
+        Returns [(surah, ayat, content or None)] in request order, the last item per ayat wins.
+        Raises ValueError on bad input.
+        """
+        max_items = max_items or Config.NOTE_BULK_LIMIT
+        if not isinstance(payload, dict):
+            raise ValueError("Body JSON wajib diisi")
+        raw_items = payload.get("items") if "items" in payload else [payload]
+        if not isinstance(raw_items, list) or not raw_items:
+            raise ValueError("items wajib berupa list yang tidak kosong")
+        if len(raw_items) > max_items:
+            raise ValueError(f"Maksimal {max_items} note per request")
+
+        items = {}
+        for item in raw_items:
+            try:
+                surah, ayat = int(item.get("surah")), int(item.get("ayat"))
+            except (AttributeError, TypeError, ValueError):
+                raise ValueError(f"Item note tidak valid: {item}")
+            if surah < 1 or ayat < 1:
+                raise ValueError(f"Item note tidak valid: {item}")
+
+            if delete or item.get("deleted"):
+                content = None
+            else:
+                content = item.get("content")
+                if not isinstance(content, str):
+                    raise ValueError(f"content wajib berupa string untuk note {surah}:{ayat}")
+                if len(content) > Config.NOTE_MAX_LENGTH:
+                    raise ValueError(f"Note {surah}:{ayat} melebihi {Config.NOTE_MAX_LENGTH} karakter")
+            items.pop((surah, ayat), None)
+            items[(surah, ayat)] = content
+        return [(surah, ayat, content) for (surah, ayat), content in items.items()]
+
+    # ----------------------
+    # Sync cursor
+    # ----------------------
+    @staticmethod
+    def encode_cursor(updated_at, note_id):
+        """Opaque cursor pointing just after the change (updated_at, id)."""
+        micros = (updated_at - _EPOCH) // timedelta(microseconds=1)
+        return base64.urlsafe_b64encode(f"n:{micros}:{int(note_id)}".encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Return (updated_at, id) encoded in `cursor`. Raises ValueError on a malformed cursor."""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+            prefix, micros, note_id = raw.split(":")
+            if prefix != "n":
+                raise ValueError
+            micros, note_id = int(micros), int(note_id)
+            if micros < 0 or note_id < 0:
+                raise ValueError
+            return _EPOCH + timedelta(microseconds=micros), note_id
+        except (ValueError, TypeError, OverflowError, binascii.Error, UnicodeDecodeError):
+            raise ValueError(f"Cursor tidak valid: {cursor}")
+
+    @staticmethod
+    def _next_timestamp(user_id):
+        """
+        Server time for a write, strictly after the user's latest change; call inside the write transaction.
+
+        Baris note_clock user dikunci sampai commit (SQLite: INSERT pertama mengambil write lock DB;
+        Postgres/MySQL: SELECT ... FOR UPDATE), jadi penulis kedua baru memilih timestamp setelah penulis pertama
+        commit. Tanpa itu penulis dengan timestamp lebih besar bisa commit duluan, klien sync di antaranya
+        menyimpan cursor melewati tulisan lain dan tidak pernah menerimanya. Jam antar worker/host bisa mundur,
+        karena itu timestamp selalu > nilai terakhir.
+        """
+        upsert(db.session, NoteClock, [{"user_id": user_id, "updated_at": _EPOCH}], ("user_id",))
+        latest = db.session.execute(
+            select(NoteClock.updated_at).where(NoteClock.user_id == user_id).with_for_update()
+        ).scalar()
+        if latest == _EPOCH:
+            # user lama (sebelum note_clock ada): mulai dari perubahan terakhirnya
+            latest = db.session.execute(
+                select(func.max(Note.updated_at)).where(Note.user_id == user_id)
+            ).scalar() or _EPOCH
+        now = datetime.utcnow()
+        if latest >= now:
+            now = latest + timedelta(microseconds=1)
+        db.session.execute(
+            update(NoteClock).where(NoteClock.user_id == user_id).values(updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        return now
+
+    # ----------------------
+    # Writes
+    # ----------------------
+    @staticmethod
+    def save(user_id, items):
+        """
+        Upsert (content) or tombstone (content None) every (surah, ayat, content) in `items` for `user_id`,
+        in one transaction. Returns {"saved": n, "deleted": n, "updated_at": ...}.
+        """
+        saves = [(surah, ayat, content) for surah, ayat, content in items if content is not None]
+        deletes = [(surah, ayat) for surah, ayat, content in items if content is None]
+
+        keys = EQuranService.resolve_ayat_keys([(surah, ayat) for surah, ayat, _ in saves])
+        delete_keys = EQuranService.resolve_ayat_keys(deletes, fetch_missing=False)
+        try:
+            now = NoteService._next_timestamp(user_id)
+            rows = [
+                {
+                    "user_id": user_id, "surah_id": surah_id, "nomor_ayat": ayat,
+                    "content": content, "updated_at": now, "deleted_at": None
+                }
+                for (surah_id, ayat), (_, _, content) in zip(keys, saves)
+            ]
+            upsert(
+                db.session, Note, rows, ("user_id", "surah_id", "nomor_ayat"), ("content", "updated_at", "deleted_at")
+            )
+            deleted = 0
+            if delete_keys:
+                deleted = db.session.execute(
+                    update(Note)
+                    .where(
+                        Note.user_id == user_id,
+                        Note.deleted_at.is_(None),
+                        tuple_(Note.surah_id, Note.nomor_ayat).in_(delete_keys)
+                    )
+                    .values(content=None, updated_at=now, deleted_at=now)
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        logger.debug("User %s: %s note(s) saved, %s deleted", user_id, len(rows), deleted)
+        return {"saved": len(rows), "deleted": deleted, "updated_at": now.isoformat()}
+
+    # ----------------------
+    # Reads
+    # ----------------------
+    @staticmethod
+    def _format(row):
+        return {
+            "id": row.id,
+            "surah": row.nomor,
+            "ayat": row.nomor_ayat,
+            "content": row.content,
+            "deleted": row.deleted_at is not None,
+            "updated_at": row.updated_at.isoformat() if row.updated_at else None
+        }
+
+    @staticmethod
+    def _query():
+        return (
+            select(Note.id, Note.nomor_ayat, Note.content, Note.updated_at, Note.deleted_at, Surah.nomor)
+            .join(Surah, Surah.id == Note.surah_id)
+        )
+
+    @staticmethod
+    def get_note(user_id, surah, ayat):
+        """The live note of `user_id` at surah:ayat, or None."""
+        row = db.session.execute(
+            NoteService._query().where(
+                Note.user_id == user_id,
+                Surah.nomor == surah,
+                Note.nomor_ayat == ayat,
+                Note.deleted_at.is_(None)
+            )
+        ).first()
+        return NoteService._format(row) if row else None
+
+    @staticmethod
+    def changes(user_id, since=None, limit=None):
+        """
+        Notes of `user_id` changed after the `since` cursor, oldest change first, tombstones included.
+        Tanpa `since` (sync pertama) tombstone dilewati. `next_cursor` selalu diisi selama ada baris:
+        klien menyimpannya dan memakainya lagi di sync berikutnya. Returns {"items": [...], "meta": {...}}.
+        """
+        limit = max(1, min(int(limit or Config.NOTE_SYNC_PAGE_LIMIT), Config.NOTE_SYNC_PAGE_LIMIT))
+        query = (
+            NoteService._query()
+            .where(Note.user_id == user_id)
+            .order_by(Note.updated_at, Note.id)
+            .limit(limit + 1)
+        )
+        if since:
+            updated_at, note_id = NoteService.decode_cursor(since)
+            query = query.where(or_(
+                Note.updated_at > updated_at,
+                and_(Note.updated_at == updated_at, Note.id > note_id)
+            ))
+        else:
+            query = query.where(Note.deleted_at.is_(None))
+
+        rows = db.session.execute(query).all()
+        page = rows[:limit]
+        return {
+            "items": [NoteService._format(row) for row in page],
+            "meta": {
+                "limit": limit,
+                "has_more": len(rows) > limit,
+                "next_cursor": NoteService.encode_cursor(page[-1].updated_at, page[-1].id) if page else since
+            }
+        }
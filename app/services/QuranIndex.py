@@ -0,0 +1,111 @@
+import json
+from bisect import bisect_right
+
+from config.config import Config
+from app.logger import get_logger
+
+logger = get_logger(__name__)
+
+# unit navigasi -> label untuk pesan error; hizb = 4 rubu' (diturunkan dari daftar rub)
+KINDS = {"juz": "Juz", "hizb": "Hizb", "rub": "Rubu'", "page": "Halaman"}
+
+
+class QuranIndex:
+    """
+    Static table of the 114 surah (jumlah ayat) plus juz / hizb / rubu' / page boundaries,
+    loaded once from NAVIGATION_INDEX_PATH.
+
+    Setiap (surah, ayat) dipetakan ke nomor urut mushaf (1..6236), jadi satu unit cukup disimpan sebagai
+    rentang ordinal [awal, akhir]; jumlah ayat, segmen per surah, dan lokasi ayat dihitung tanpa query.
+    Tabel yang sama dipakai untuk validasi nomor surah/ayat sebelum menyentuh DB atau upstream.
+    """
+
+    def __init__(self, surah_ayat, starts):
+        self.surah_ayat = tuple(surah_ayat)
+        # _offset[i] = jumlah ayat sebelum surah i+1
+        self._offset = [0]
+        for jumlah in self.surah_ayat:
+            self._offset.append(self._offset[-1] + jumlah)
+        self.total = self._offset[-1]
+
+        self._starts = {}
+        for kind, units in starts.items():
+            ordinals = [self.ordinal(surah, ayat) for surah, ayat in units]
+            if not ordinals or ordinals[0] != 1 or any(a >= b for a, b in zip(ordinals, ordinals[1:])):
+                raise ValueError(f"Index navigasi {kind} tidak urut atau tidak mulai dari 1:1")
+            self._starts[kind] = ordinals
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+        rub = data["rub"]
+        starts = {"juz": data["juz"], "hizb": rub[::4], "rub": rub, "page": data["page"]}
+        index = cls(data["surah_ayat"], starts)
+        logger.info("Quran index loaded from %s (surah=%s, %s)", path, len(index.surah_ayat),
+                    ", ".join(f"{kind}={index.count(kind)}" for kind in starts))
+        return index
+
+    # ----------------------
+    # Surah / ayat bounds
+    # ----------------------
+    def jumlah_ayat(self, surah):
+        """Ayat count of `surah`, or None when it is not one of the 114 surah."""
+        if isinstance(surah, int) and 1 <= surah <= len(self.surah_ayat):
+            return self.surah_ayat[surah - 1]
+        return None
+
+    def ordinal(self, surah, ayat):
+        """Nomor urut mushaf (1-based) of surah:ayat. Raises ValueError when out of range."""
+        jumlah = self.jumlah_ayat(surah)
+        if jumlah is None or not isinstance(ayat, int) or not 1 <= ayat <= jumlah:
+            raise ValueError(f"Ayat {surah}:{ayat} tidak ada")
+        return self._offset[surah - 1] + ayat
+
+    def position(self, ordinal):
+        """Inverse of ordinal(): (surah, ayat)."""
+        surah = bisect_right(self._offset, ordinal - 1)
+        return surah, ordinal - self._offset[surah - 1]
+
+    # ----------------------
+    # Navigation units
+    # ----------------------
+    def count(self, kind):
+        return len(self._starts[kind])
+
+    def unit(self, kind, nomor):
+        """(first ordinal, last ordinal) of unit `nomor`. Raises ValueError for an unknown kind or nomor."""
+        starts = self._starts.get(kind)
+        if starts is None:
+            raise ValueError(f"Jenis navigasi {kind} tidak dikenal")
+        if not 1 <= nomor <= len(starts):
+            raise ValueError(f"{KINDS[kind]} {nomor} tidak ada (1-{len(starts)})")
+        end = starts[nomor] - 1 if nomor < len(starts) else self.total
+        return starts[nomor - 1], end
+
+    def locate(self, kind, surah, ayat):
+        """Nomor of the `kind` unit containing surah:ayat."""
+        return bisect_right(self._starts[kind], self.ordinal(surah, ayat))
+
+    def segments(self, first, last):
+        """Split ordinal range into per-surah pieces [(surah, ayat awal, ayat akhir)]."""
+        segments = []
+        surah, ayat = self.position(first)
+        end_surah, end_ayat = self.position(last)
+        while surah <= end_surah:
+            segments.append((surah, ayat, end_ayat if surah == end_surah else self.surah_ayat[surah - 1]))
+            surah, ayat = surah + 1, 1
+        return segments
+
+    def describe(self, kind, nomor):
+        first, last = self.unit(kind, nomor)
+        (start_surah, start_ayat), (end_surah, end_ayat) = self.position(first), self.position(last)
+        return {
+            "nomor": nomor,
+            "start": {"surah": start_surah, "ayat": start_ayat},
+            "end": {"surah": end_surah, "ayat": end_ayat},
+            "total_ayat": last - first + 1
+        }
+
+
+quran_index = QuranIndex.load(Config.NAVIGATION_INDEX_PATH)
@@ -0,0 +1,132 @@
+import json
+import threading
+
+from sqlalchemy import select
+
+from app.models.EquranModels import Reciter
+from app.extension import db
+from app.cache import shared_cache
+from app.serialization import RawJSON
+from app.logger import get_logger
+
+logger = get_logger(__name__)
+
+VERSION_NAMESPACE = "reciter"
+
+# nama qari equran.id (payload hanya memberi kode)
+QARI_NAMES = {
+    "01": "Abdullah Al-Juhany",
+    "02": "Abdul Muhsin Al-Qasim",
+    "03": "Abdurrahman as-Sudais",
+    "04": "Ibrahim Al-Dossari",
+    "05": "Misyari Rasyid Al-Afasi",
+    "06": "Yasser Al-Dosari"
+}
+
+# bentuk nomor surah/ayat di URL -> placeholder template (dicoba berurutan)
+PLACEHOLDERS = (
+    ("{:03d}{:03d}", "{surah:03d}{ayat:03d}"),   # .../Abdullah-Al-Juhany/002255.mp3
+    ("/{}/{}.", "/{surah}/{ayat}.")              # .../audio/2/255.mp3
+)
+
+
+class ReciterService:
+    """
+    Audio per ayat diturunkan dari URL template per qari (tabel reciter), bukan blob JSON per baris ayat.
+
+    Template di-cache per proses dan di-reload saat versi namespace "reciter" di shared_cache naik.
+    Per kombinasi qari disiapkan satu format string yang langsung menghasilkan teks JSON {qari: url},
+    jadi membangun audio satu ayat = satu str.format, tanpa json.loads/json.dumps.
+    """
+
+    _state = None  # (version, {kode: template}, {qari | None: json format string})
+    _lock = threading.Lock()
+
+    # ----------------------
+    # Templates
+    # ----------------------
+    @staticmethod
+    def derive_template(url, surah, ayat):
+        """Template for `url` of (surah, ayat), or None if the numbers cannot be located unambiguously."""
+        if not isinstance(url, str) or "{" in url or "}" in url:
+            return None
+        for literal, placeholder in PLACEHOLDERS:
+            token = literal.format(surah, ayat)
+            if url.count(token) == 1:
+                return url.replace(token, placeholder)
+        return None
+
+    @staticmethod
+    def load_templates():
+        """{kode: template} straight from the DB (caller's transaction), bypassing the cache."""
+        rows = db.session.execute(select(Reciter.kode, Reciter.ayat_template).order_by(Reciter.kode)).all()
+        return {kode: template for kode, template in rows}
+
+    @staticmethod
+    def _current():
+        version = shared_cache.version(VERSION_NAMESPACE)
+        state = ReciterService._state
+        if state is None or state[0] != version:
+            with ReciterService._lock:
+                state = ReciterService._state
+                if state is None or state[0] != version:
+                    state = ReciterService._state = (version, ReciterService.load_templates(), {})
+        return state
+
+    @staticmethod
+    def templates():
+        return ReciterService._current()[1]
+
+    @staticmethod
+    def invalidate():
+        """Reload templates on next read, here and (via the shared version) in every other worker."""
+        ReciterService._state = None
+        shared_cache.invalidate(VERSION_NAMESPACE)
+
+    @staticmethod
+    def _json_format(templates, formats, qari):
+        """'{{"01":".../{surah:03d}{ayat:03d}.mp3",...}}' for all qari or only `qari`."""
+        fmt = formats.get(qari)
+        if fmt is None:
+            items = templates.items() if qari is None else [(qari, templates[qari])]
+            # kode & template tidak mengandung kurung kurawal selain placeholder (dijamin derive_template)
+            fmt = formats[qari] = "{{" + ",".join(f"{json.dumps(k)}:{json.dumps(t)}" for k, t in items) + "}}"
+        return fmt
+
+    # ----------------------
+    # Read
+    # ----------------------
+    @staticmethod
+    def require(qari):
+        """Raise ValueError for an unknown qari code (None = semua qari)."""
+        if qari is not None and qari not in ReciterService.templates():
+            raise ValueError(f"Qari {qari} tidak dikenal")
+
+    @staticmethod
+    def audio_map(surah, ayat, qari=None, override=None):
+        """Audio {qari: url} as a dict; `override` = teks JSON pengecualian dari kolom ayat.audio_url."""
+        templates = ReciterService.templates()
+        audio = {kode: template.format(surah=surah, ayat=ayat) for kode, template in templates.items()}
+        if override and override != "{}":
+            extra = RawJSON(override).load()
+            audio.update({k: v for k, v in extra.items() if isinstance(v, str)})
+        if qari is not None:
+            return {qari: audio[qari]} if qari in audio else {}
+        return audio
+
+    @staticmethod
+    def audio(surah, ayat, qari=None, override=None):
+        """Audio for one ayat as a RawJSON fragment (jalur cepat: satu str.format)."""
+        if override and override != "{}":
+            return RawJSON(json.dumps(ReciterService.audio_map(surah, ayat, qari, override)))
+        _, templates, formats = ReciterService._current()
+        if qari is not None and qari not in templates:
+            return RawJSON("{}")
+        return RawJSON(ReciterService._json_format(templates, formats, qari).format(surah=surah, ayat=ayat))
+
+    @staticmethod
+    def list_reciters():
+        rows = db.session.execute(
+            select(Reciter.kode, Reciter.nama, Reciter.ayat_template).order_by(Reciter.kode)
+        ).all()
+        return [{"kode": kode, "nama": nama, "ayat_template": template} for kode, nama, template in rows]
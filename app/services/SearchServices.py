@@ -0,0 +1,235 @@
+import re
+
+from sqlalchemy import event, text, or_
+
+from app.models.EquranModels import Surah, Ayat
+from app.extension import db
+from app.logger import get_logger
+
+logger = get_logger(__name__)
+
+FTS_TABLE = "ayat_fts"
+FTS_FIELDS = ("arab", "latin", "indonesia")
+
+# harakat, tanda waqaf & tatweel diabaikan saat index/query supaya "الحمد" cocok dengan "اَلْحَمْدُ"
+ARABIC_MARKS = (
+    [chr(c) for c in range(0x064B, 0x0660)]
+    + [chr(0x0670), chr(0x0640)]
+    + [chr(c) for c in range(0x06D6, 0x06EE)]
+)
+ARABIC_FOLD = {"ٱ": "ا", "أ": "ا", "إ": "ا", "آ": "ا", "ى": "ي"}
+
+HIGHLIGHT_OPEN = "<mark>"
+HIGHLIGHT_CLOSE = "</mark>"
+
+
+def normalize_arabic(value):
+    if not value:
+        return ""
+    for ch in ARABIC_MARKS:
+        value = value.replace(ch, "")
+    for src, dst in ARABIC_FOLD.items():
+        value = value.replace(src, dst)
+    return value
+
+
+def _register_sql_functions(dbapi_conn, connection_record):
+    # dipakai trigger FTS; koneksi di luar aplikasi (mis. sqlite3 CLI) yang menulis ke ayat perlu fungsi ini juga
+    dbapi_conn.create_function("quran_normalize", 1, normalize_arabic, deterministic=True)
+
+
+class SearchService:
+    """
+    Full-text search over ayat (teks_arab, teks_latin, teks_indonesia).
+
+    SQLite: FTS5 virtual table `ayat_fts` (rowid = ayat.id) dijaga sinkron oleh trigger pada tabel ayat,
+    jadi semua jalur insert (get_surah_detail, warmup, bulk insert Core) otomatis ter-index.
+    Dialect lain: fallback ILIKE scan.
+    """
+
+    @staticmethod
+    def _is_sqlite():
+        return db.engine.dialect.name == "sqlite"
+
+    @staticmethod
+    def init_engine():
+        """Register quran_normalize() on every new SQLite connection. Call before the first DB access."""
+        if SearchService._is_sqlite() and not event.contains(db.engine, "connect", _register_sql_functions):
+            event.listen(db.engine, "connect", _register_sql_functions)
+            db.engine.dispose()  # koneksi lama di pool belum punya fungsi ini
+
+    # ----------------------
+    # Index maintenance
+    # ----------------------
+    @staticmethod
+    def ensure_index():
+        """Create FTS table + sync triggers if missing and rebuild when out of sync. Call inside app context."""
+        if not SearchService._is_sqlite():
+            return False
+
+        statements = [
+            f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+                arab, latin, indonesia, tokenize = 'unicode61 remove_diacritics 2'
+            )""",
+            f"""CREATE TRIGGER IF NOT EXISTS ayat_fts_ai AFTER INSERT ON ayat BEGIN
+                INSERT INTO {FTS_TABLE}(rowid, arab, latin, indonesia)
+                VALUES (new.id, quran_normalize(new.teks_arab), new.teks_latin, new.teks_indonesia);
+            END""",
+            f"""CREATE TRIGGER IF NOT EXISTS ayat_fts_ad AFTER DELETE ON ayat BEGIN
+                DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+            END""",
+            f"""CREATE TRIGGER IF NOT EXISTS ayat_fts_au AFTER UPDATE ON ayat BEGIN
+                DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+                INSERT INTO {FTS_TABLE}(rowid, arab, latin, indonesia)
+                VALUES (new.id, quran_normalize(new.teks_arab), new.teks_latin, new.teks_indonesia);
+            END""",
+        ]
+        with db.engine.begin() as conn:
+            for stmt in statements:
+                conn.execute(text(stmt))
+            indexed = conn.execute(text(f"SELECT count(*) FROM {FTS_TABLE}")).scalar()
+            stored = conn.execute(text("SELECT count(*) FROM ayat")).scalar()
+
+        if indexed != stored:
+            logger.info("FTS index out of sync (%s indexed vs %s ayat), rebuilding", indexed, stored)
+            SearchService.rebuild_index()
+        return True
+
+    @staticmethod
+    def drop_index():
+        """Drop FTS triggers + table (bulk loads); ensure_index() recreates and rebuilds them in one pass."""
+        if not SearchService._is_sqlite():
+            return False
+        with db.engine.begin() as conn:
+            for trigger in ("ayat_fts_ai", "ayat_fts_ad", "ayat_fts_au"):
+                conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+            conn.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+        return True
+
+    @staticmethod
+    def rebuild_index():
+        if not SearchService._is_sqlite():
+            return 0
+        with db.engine.begin() as conn:
+            conn.execute(text(f"DELETE FROM {FTS_TABLE}"))
+            conn.execute(text(
+                f"INSERT INTO {FTS_TABLE}(rowid, arab, latin, indonesia) "
+                "SELECT id, quran_normalize(teks_arab), teks_latin, teks_indonesia FROM ayat"
+            ))
+            conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"))
+            total = conn.execute(text(f"SELECT count(*) FROM {FTS_TABLE}")).scalar()
+        logger.info("FTS index rebuilt with %s ayat", total)
+        return total
+
+    # ----------------------
+    # Query
+    # ----------------------
+    @staticmethod
+    def _tokens(q):
+        return [t for t in re.split(r"\s+", normalize_arabic(q).strip()) if t]
+
+    @staticmethod
+    def _build_match(tokens, fields):
+        """Quote every token (no FTS syntax injection); tokens >= 3 chars also match as prefix."""
+        terms = []
+        for t in tokens:
+            quoted = '"' + t.replace('"', '""') + '"'
+            terms.append(quoted + "*" if len(t) >= 3 else quoted)
+        expr = " AND ".join(terms)
+        if fields and set(fields) != set(FTS_FIELDS):
+            expr = "{" + " ".join(fields) + "} : (" + expr + ")"
+        return expr
+
+    @staticmethod
+    def search(q, page=1, limit=20, fields=None):
+        """
+        Return ranked, paginated, highlighted ayat:
+        {"items": [{"surah", "nama_latin", "ayat", "arab", "latin", "indonesia", "highlight": {...}, "score"}],
+         "meta": {"page", "limit", "total", "total_pages", "query"}}
+        """
+        fields = [f for f in (fields or FTS_FIELDS) if f in FTS_FIELDS] or list(FTS_FIELDS)
+        tokens = SearchService._tokens(q or "")
+        page = max(page, 1)
+        limit = max(1, min(limit, 100))
+        if not tokens:
+            return {"items": [], "meta": {"page": page, "limit": limit, "total": 0, "total_pages": 0, "query": q}}
+
+        if SearchService._is_sqlite():
+            items, total = SearchService._search_fts(tokens, fields, page, limit)
+        else:
+            items, total = SearchService._search_like(tokens, fields, page, limit)
+
+        logger.info("Search '%s' matched %s ayat (returning %s)", q, total, len(items))
+        return {
+            "items": items,
+            "meta": {
+                "page": page,
+                "limit": limit,
+                "total": total,
+                "total_pages": (total + limit - 1) // limit,
+                "query": q
+            }
+        }
+
+    @staticmethod
+    def _search_fts(tokens, fields, page, limit):
+        match = SearchService._build_match(tokens, fields)
+        total = db.session.execute(
+            text(f"SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :q"), {"q": match}
+        ).scalar()
+        if not total:
+            return [], 0
+
+        hl = ", ".join(
+            f"highlight({FTS_TABLE}, {i}, '{HIGHLIGHT_OPEN}', '{HIGHLIGHT_CLOSE}') AS hl_{name}"
+            for i, name in enumerate(FTS_FIELDS)
+        )
+        rows = db.session.execute(text(
+            f"""SELECT s.nomor AS surah, s.nama_latin, a.nomor_ayat, a.teks_arab, a.teks_latin, a.teks_indonesia,
+                       {hl}, bm25({FTS_TABLE}) AS score
+                FROM {FTS_TABLE}
+                JOIN ayat a ON a.id = {FTS_TABLE}.rowid
+                JOIN surah s ON s.id = a.surah_id
+                WHERE {FTS_TABLE} MATCH :q
+                ORDER BY score
+                LIMIT :limit OFFSET :offset"""
+        ), {"q": match, "limit": limit, "offset": (page - 1) * limit}).mappings().all()
+
+        items = [{
+            "surah": r["surah"],
+            "nama_latin": r["nama_latin"],
+            "ayat": r["nomor_ayat"],
+            "arab": r["teks_arab"] or "",
+            "latin": r["teks_latin"] or "",
+            "indonesia": r["teks_indonesia"] or "",
+            "highlight": {name: r[f"hl_{name}"] for name in fields},
+            "score": round(-r["score"], 4)
+        } for r in rows]
+        return items, total
+
+    @staticmethod
+    def _search_like(tokens, fields, page, limit):
+        columns = {"arab": Ayat.teks_arab, "latin": Ayat.teks_latin, "indonesia": Ayat.teks_indonesia}
+        query = db.session.query(Surah.nomor, Surah.nama_latin, Ayat).join(Surah, Surah.id == Ayat.surah_id)
+        for t in tokens:
+            query = query.filter(or_(*[columns[f].ilike(f"%{t}%") for f in fields]))
+        total = query.count()
+        rows = query.order_by(Surah.nomor, Ayat.nomor_ayat).offset((page - 1) * limit).limit(limit).all()
+
+        pattern = re.compile("|".join(re.escape(t) for t in tokens), re.IGNORECASE)
+        items = []
+        for nomor, nama_latin, a in rows:
+            v = {"arab": a.teks_arab or "", "latin": a.teks_latin or "", "indonesia": a.teks_indonesia or ""}
+            items.append({
+                "surah": nomor,
+                "nama_latin": nama_latin,
+                "ayat": a.nomor_ayat,
+                "arab": v["arab"],
+                "latin": v["latin"],
+                "indonesia": v["indonesia"],
+                "highlight": {
+                    f: pattern.sub(lambda m: f"{HIGHLIGHT_OPEN}{m.group(0)}{HIGHLIGHT_CLOSE}", v[f]) for f in fields
+                },
+                "score": None
+            })
+        return items, total
@@ -0,0 +1,262 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from sqlalchemy import func
+
+from config.config import Config
+from app.models.EquranModels import Surah, Ayat, Tafsir
+from app.extension import db
+from app.services.EquranServices import EQuranService
+from app.services.IngestServices import IngestService
+from app.logger import get_logger
+
+logger = get_logger(__name__)
+
+TOTAL_SURAH = 114
+
+
+class WarmupService:
+    """
+    Preload seluruh surah (dan tafsirnya) ke DB lokal supaya request user tidak pernah menyentuh upstream.
+
+    Fetch ke upstream berjalan paralel di thread pool (I/O bound), sedangkan penulisan DB
+    dilakukan di thread pemanggil (satu transaksi per surah) karena session SQLAlchemy tidak thread-safe.
+    """
+
+    # ----------------------
+    # Checkpoint
+    # ----------------------
+    @staticmethod
+    def _load_checkpoint(path, include_tafsir):
+        """
+        Surah marked done by a previous run with the same include_tafsir, or an empty set.
+        Hanya petunjuk: yang menentukan skip tetap isi DB (_is_complete).
+        """
+        if not path or not os.path.exists(path):
+            return set()
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+        except Exception:
+            logger.warning("Checkpoint %s unreadable, starting from scratch", path, exc_info=True)
+            return set()
+        if data.get("include_tafsir") != include_tafsir:
+            logger.info("Checkpoint %s was written with include_tafsir=%s, ignoring it",
+                        path, data.get("include_tafsir"))
+            return set()
+        return set(data.get("completed", []))
+
+    @staticmethod
+    def _save_checkpoint(path, completed, include_tafsir):
+        if not path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump({
+                "completed": sorted(completed),
+                "include_tafsir": include_tafsir,
+                "updated_at": datetime.utcnow().isoformat()
+            }, fh)
+        os.replace(tmp_path, path)  # atomic, checkpoint tidak pernah setengah tertulis
+
+    @staticmethod
+    def _clear_checkpoint(path):
+        if path and os.path.exists(path):
+            os.remove(path)
+
+    # ----------------------
+    # DB state
+    # ----------------------
+    @staticmethod
+    def _stored_state():
+        """Return {nomor: (surah_id, jumlah_ayat, ayat_count, tafsir_count)} with two grouped queries."""
+        ayat_counts = dict(
+            db.session.query(Ayat.surah_id, func.count(Ayat.id)).group_by(Ayat.surah_id).all()
+        )
+        tafsir_counts = dict(
+            db.session.query(Tafsir.surah_id, func.count(Tafsir.id)).group_by(Tafsir.surah_id).all()
+        )
+        state = {}
+        for surah_id, nomor, jumlah_ayat in db.session.query(Surah.id, Surah.nomor, Surah.jumlah_ayat).all():
+            state[nomor] = (surah_id, jumlah_ayat, ayat_counts.get(surah_id, 0), tafsir_counts.get(surah_id, 0))
+        return state
+
+    @staticmethod
+    def _is_complete(entry, include_tafsir):
+        if not entry:
+            return False, False
+        _, jumlah_ayat, ayat_count, tafsir_count = entry
+        ayat_done = bool(jumlah_ayat) and ayat_count >= jumlah_ayat
+        tafsir_done = (not include_tafsir) or (bool(jumlah_ayat) and tafsir_count >= jumlah_ayat)
+        return ayat_done, tafsir_done
+
+    # ----------------------
+    # Worker (runs in pool thread, network only)
+    # ----------------------
+    @staticmethod
+    def _fetch(nomor, need_surah, need_tafsir):
+        surah_data, tafsir_data = None, None
+        if need_surah:
+            raw = EQuranService._get(f"/surat/{nomor}")
+            surah_data = raw.get("data") if isinstance(raw, dict) else raw
+        if need_tafsir:
+            raw = EQuranService._get(f"/tafsir/{nomor}")
+            data = raw.get("data") if isinstance(raw, dict) else raw
+            tafsir_data = data.get("tafsir", []) if isinstance(data, dict) else (data or [])
+        return surah_data, tafsir_data
+
+    @staticmethod
+    def _store(nomor, surah_data, tafsir_data):
+        """Persist one surah in a single transaction. Returns (ayat_rows, tafsir_rows)."""
+        surah_meta, formatted = None, None
+        if surah_data:
+            surah_meta = EQuranService._normalize_surah_meta(surah_data)
+            surah_meta["nomor"] = surah_meta["nomor"] or nomor
+            ayat_raw_list = surah_data.get("ayat") or surah_data.get("verses") or surah_data.get("items") or []
+            formatted = [EQuranService._normalize_ayat_from_api(ay, idx=i) for i, ay in enumerate(ayat_raw_list)]
+        return IngestService.ingest(
+            nomor,
+            surah_data=surah_data or None,
+            surah_meta=surah_meta,
+            formatted_ayat=formatted,
+            tafsir_data=tafsir_data
+        )
+
+    # ----------------------
+    # Public API
+    # ----------------------
+    @staticmethod
+    def run(workers=None, surah_numbers=None, include_tafsir=True, resume=True, checkpoint_path=None):
+        """
+        Fetch & store every surah (+ tafsir). Must be called inside an app context.
+        Surah yang sudah lengkap di DB dilewati; checkpoint hanya petunjuk resume dan dihapus setelah run tanpa gagal.
+
+        Returns report:
+        {
+          "wall_time": float (detik),
+          "ayat_rows": int, "tafsir_rows": int,
+          "completed": int, "skipped": int, "failed": int,
+          "surah": [{"nomor", "status", "ayat_rows", "tafsir_rows", "seconds", "error"}]
+        }
+        """
+        started = time.perf_counter()
+        workers = workers or Config.WARMUP_WORKERS
+        checkpoint_path = checkpoint_path or Config.WARMUP_CHECKPOINT
+
+        checkpoint = WarmupService._load_checkpoint(checkpoint_path, include_tafsir) if resume else set()
+        nomors = sorted(set(surah_numbers or range(1, TOTAL_SURAH + 1)))
+        state = WarmupService._stored_state()
+
+        results = {}
+        jobs = {}
+        completed = set()
+        for nomor in nomors:
+            ayat_done, tafsir_done = WarmupService._is_complete(state.get(nomor), include_tafsir)
+            if ayat_done and tafsir_done:
+                results[nomor] = {"nomor": nomor, "status": "skipped", "ayat_rows": 0, "tafsir_rows": 0}
+                completed.add(nomor)
+                continue
+            jobs[nomor] = (not ayat_done, include_tafsir and not tafsir_done)
+
+        stale = checkpoint & set(jobs)
+        if stale:
+            # checkpoint bilang selesai tapi DB tidak (DB di-reset / dihapus): DB yang menang
+            logger.warning("Warmup checkpoint lists %s surah missing from the DB, fetching them again", len(stale))
+
+        logger.info("Warmup: %s surah to fetch, %s already stored (workers=%s)", len(jobs), len(results), workers)
+
+        # satu invalidasi cache (per surah yang ditulis) di akhir, bukan satu flush per commit
+        with IngestService.deferred_notifications():
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="warmup") as pool:
+                futures = {
+                    pool.submit(WarmupService._fetch, nomor, need_surah, need_tafsir): (nomor, time.perf_counter())
+                    for nomor, (need_surah, need_tafsir) in jobs.items()
+                }
+                for future in as_completed(futures):
+                    nomor, submitted = futures[future]
+                    entry = {"nomor": nomor, "status": "ok", "ayat_rows": 0, "tafsir_rows": 0}
+                    try:
+                        surah_data, tafsir_data = future.result()
+                        entry["ayat_rows"], entry["tafsir_rows"] = WarmupService._store(nomor, surah_data, tafsir_data)
+                        completed.add(nomor)
+                        WarmupService._save_checkpoint(checkpoint_path, completed, include_tafsir)
+                    except Exception as e:
+                        db.session.rollback()
+                        entry["status"] = "failed"
+                        entry["error"] = str(e)
+                        logger.warning("Warmup failed for surah %s: %s", nomor, e)
+                    entry["seconds"] = round(time.perf_counter() - submitted, 3)
+                    results[nomor] = entry
+
+        if surah_numbers is None:
+            # prime cache daftar surah juga
+            try:
+                EQuranService._fetch_all_surah_raw()
+            except Exception:
+                logger.warning("Warmup could not prime surah list cache", exc_info=True)
+
+        report_items = [results[n] for n in sorted(results)]
+        if not any(r["status"] == "failed" for r in report_items):
+            # run bersih: checkpoint tidak dibutuhkan lagi, run berikutnya cukup mengecek DB
+            WarmupService._clear_checkpoint(checkpoint_path)
+        report = {
+            "wall_time": round(time.perf_counter() - started, 3),
+            "ayat_rows": sum(r["ayat_rows"] for r in report_items),
+            "tafsir_rows": sum(r["tafsir_rows"] for r in report_items),
+            "completed": sum(1 for r in report_items if r["status"] == "ok"),
+            "skipped": sum(1 for r in report_items if r["status"] == "skipped"),
+            "failed": sum(1 for r in report_items if r["status"] == "failed"),
+            "surah": report_items
+        }
+        logger.info(
+            "Warmup finished in %ss: %s ayat, %s tafsir, %s failed",
+            report['wall_time'], report['ayat_rows'], report['tafsir_rows'], report['failed']
+        )
+        return report
+
+    @staticmethod
+    def start_background(app, **kwargs):
+        """
+        Run warmup in a daemon thread so the app can serve while the corpus fills.
+        Hanya satu proses per host yang benar-benar crawl (file lock single-flight "warmup"); worker lain langsung keluar.
+        """
+        def _target():
+            with EQuranService._flight.try_lock("warmup") as acquired:
+                if not acquired:
+                    logger.info("Background warmup already running in another process, skipping")
+                    return
+                with app.app_context():
+                    try:
+                        WarmupService.run(**kwargs)
+                    except Exception:
+                        logger.error("Background warmup crashed", exc_info=True)
+                    finally:
+                        db.session.remove()
+
+        thread = threading.Thread(target=_target, name="warmup", daemon=True)
+        thread.start()
+        return thread
+
+    @staticmethod
+    def start_on_first_request(app, **kwargs):
+        """
+        WARMUP_ON_STARTUP hook: start_background() on the first request this process serves.
+        Proses CLI (flask db ..., flask quran warmup) tidak pernah melayani request jadi tidak ikut crawl, dan
+        thread tidak dibuat di master gunicorn --preload (thread hilang saat fork).
+        """
+        lock = threading.Lock()
+        started = []
+
+        @app.before_request
+        def _start_warmup():
+            if started:
+                return
+            with lock:
+                if started:
+                    return
+                started.append(WarmupService.start_background(app, **kwargs))
@@ -0,0 +1,144 @@
+# app/singleflight.py
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from app.logger import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    try:
+        import msvcrt
+    except ImportError:
+        msvcrt = None
+
+
+class _Call:
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key so the work runs exactly once.
+
+    - dalam satu proses: caller pertama (leader) menjalankan fn, caller lain menunggu hasilnya
+    - antar proses (host yang sama): leader memegang file lock per key, sehingga proses lain
+      baru menjalankan fn setelah leader selesai; fn wajib cek ulang DB di awal (double-checked)
+    """
+
+    def __init__(self, lock_dir=None, lock_timeout=30.0):
+        self.lock_dir = lock_dir
+        self.lock_timeout = lock_timeout
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {"leaders": 0, "coalesced": 0, "lock_waits": 0, "lock_timeouts": 0}
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._stats["coalesced"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._stats["leaders"] += 1
+                leader = True
+
+        if not leader:
+            logger.debug("SingleFlight: waiting for in-flight call %s", key)
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            with self._process_lock(key):
+                call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    # ----------------------
+    # Cross-process lock
+    # ----------------------
+    def _lock_path(self, key):
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.lock_dir, f"{digest}.lock")
+
+    def try_lock(self, key):
+        """
+        Context manager yielding True if this process got the file lock for `key` without waiting,
+        False if another process holds it. Tanpa lock_dir / fcntl selalu True (tidak ada koordinasi antar proses).
+        """
+        return self._process_lock(key, wait=False)
+
+    @contextmanager
+    def _process_lock(self, key, wait=True):
+        if not self.lock_dir or (fcntl is None and msvcrt is None):
+            yield True
+            return
+
+        os.makedirs(self.lock_dir, exist_ok=True)
+        fd = os.open(self._lock_path(key), os.O_RDWR | os.O_CREAT, 0o644)
+        acquired = False
+        try:
+            deadline = time.monotonic() + self.lock_timeout
+            delay = 0.01
+            while True:
+                try:
+                    if fcntl is not None:
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    else:
+                        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                    acquired = True
+                    break
+                except OSError:
+                    if not wait:
+                        break
+                    if time.monotonic() >= deadline:
+                        # best-effort: lanjut tanpa lock, insert tetap aman karena fn cek ulang DB
+                        with self._lock:
+                            self._stats["lock_timeouts"] += 1
+                        logger.warning("SingleFlight: lock wait for %s timed out, continuing without it", key)
+                        break
+                    with self._lock:
+                        self._stats["lock_waits"] += 1
+                    time.sleep(delay)
+                    delay = min(delay * 2, 0.25)
+            yield acquired
+        finally:
+            if acquired:
+                try:
+                    if fcntl is not None:
+                        fcntl.flock(fd, fcntl.LOCK_UN)
+                    else:
+                        os.lseek(fd, 0, os.SEEK_SET)
+                        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+                except OSError:
+                    logger.debug("SingleFlight: failed to release lock for %s", key, exc_info=True)
+            os.close(fd)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        return stats
@@ -0,0 +1,239 @@
+# app/swr_cache.py
+import json
+import os
+import threading
+import time
+
+from app.singleflight import SingleFlight
+from app.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class _Entry:
+    __slots__ = ("value", "fetched_at", "source", "version")
+
+    def __init__(self, value, fetched_at, source, version=None):
+        self.value = value
+        self.fetched_at = fetched_at
+        self.source = source
+        self.version = version
+
+
+class SWRCache:
+    """
+    TTL cache with stale-while-revalidate, a fallback source and an on-disk snapshot.
+
+    - umur < ttl: hit
+    - ttl <= umur < ttl + max_stale: nilai lama langsung dikembalikan, satu refresh jalan di background thread
+    - tidak ada nilai / terlalu basi: load sinkron (digabung lewat SingleFlight); kalau gagal pakai nilai basi,
+      lalu `fallback()`; hasil fallback dilayani seperti nilai basi (refresh di background, paling sering tiap retry_interval)
+    - setiap load sukses ditulis ke `snapshot_path`, dibaca lagi saat start supaya restart tidak mulai dari kosong
+    - `version()` (opsional): entry yang dibuat pada versi lain dianggap tidak ada (invalidasi lintas worker)
+    - `on_change(key)` (opsional): dipanggil setelah load menggantikan nilai lama dengan nilai berbeda, supaya cache
+      turunan (mis. respons /api/surah) ikut dibuang
+    """
+
+    def __init__(self, name, ttl=3600.0, max_stale=86400.0, retry_interval=30.0, snapshot_path=None, version=None,
+                 on_change=None):
+        self.name = name
+        self.version = version
+        self.on_change = on_change
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.retry_interval = retry_interval
+        self.snapshot_path = snapshot_path
+        self._lock = threading.Lock()
+        self._entries = None
+        self._refreshing = set()
+        self._last_attempt = {}
+        self._flight = SingleFlight()
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_failures": 0, "fallbacks": 0}
+        self._timings = {}
+
+    # ----------------------
+    # Metrics
+    # ----------------------
+    def _observe(self, kind, started):
+        elapsed = (time.perf_counter() - started) * 1000
+        with self._lock:
+            t = self._timings.setdefault(kind, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            t["count"] += 1
+            t["total_ms"] += elapsed
+            t["max_ms"] = max(t["max_ms"], elapsed)
+
+    def _incr(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    # ----------------------
+    # Snapshot
+    # ----------------------
+    def _load_snapshot(self):
+        """Caller holds _lock."""
+        if self._entries is not None:
+            return self._entries
+        self._entries = {}
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return self._entries
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as fh:
+                raw = json.load(fh)
+            for key, item in raw.get("entries", {}).items():
+                self._entries[key] = _Entry(item["value"], item["fetched_at"], "snapshot", item.get("version"))
+            logger.info("%s: restored %s entry(ies) from snapshot", self.name, len(self._entries))
+        except Exception:
+            logger.warning("%s: snapshot %s unreadable, ignoring", self.name, self.snapshot_path, exc_info=True)
+        return self._entries
+
+    def _save_snapshot(self):
+        if not self.snapshot_path:
+            return
+        with self._lock:
+            payload = {
+                "entries": {
+                    key: {"value": e.value, "fetched_at": e.fetched_at, "version": e.version}
+                    for key, e in self._entries.items() if e.source != "fallback"
+                },
+                "saved_at": time.time()
+            }
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.snapshot_path)), exist_ok=True)
+            tmp_path = f"{self.snapshot_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                json.dump(payload, fh, ensure_ascii=False)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError:
+            logger.warning("%s: failed to write snapshot", self.name, exc_info=True)
+
+    # ----------------------
+    # Load / refresh
+    # ----------------------
+    def _current_version(self):
+        return self.version() if self.version else None
+
+    def _load(self, key, loader):
+        self._last_attempt[key] = time.monotonic()
+        version = self._current_version()
+        value = loader()
+        with self._lock:
+            previous = self._entries.get(key)
+            self._entries[key] = _Entry(value, time.time(), "upstream", version)
+        self._save_snapshot()
+        if self.on_change and previous is not None and previous.value != value:
+            try:
+                self.on_change(key)
+            except Exception:
+                logger.warning("%s: on_change hook for %s failed", self.name, key, exc_info=True)
+        return value
+
+    def _refresh_in_background(self, key, loader):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            if time.monotonic() - self._last_attempt.get(key, 0.0) < self.retry_interval:
+                return
+            self._refreshing.add(key)
+            self._last_attempt[key] = time.monotonic()
+
+        def _target():
+            started = time.perf_counter()
+            try:
+                self._load(key, loader)
+                self._incr("refreshes")
+                logger.info("%s: background refresh of %s done", self.name, key)
+            except Exception as e:
+                self._incr("refresh_failures")
+                logger.warning("%s: background refresh of %s failed: %s", self.name, key, e)
+            finally:
+                self._observe("refresh", started)
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=_target, name=f"swr-{self.name}", daemon=True).start()
+
+    # ----------------------
+    # Public API
+    # ----------------------
+    def get(self, key, loader, fallback=None):
+        return self.lookup(key, loader, fallback)[0]
+
+    def lookup(self, key, loader, fallback=None):
+        """
+        Like get(), returning (value, source): "hit" / "upstream" (segar), "stale" (basi, refresh di background
+        atau upstream gagal) atau "fallback". Hasil stale/fallback sebaiknya tidak di-cache lebih jauh oleh pemanggil.
+        """
+        started = time.perf_counter()
+        version = self._current_version()
+        with self._lock:
+            entry = self._load_snapshot().get(key)
+            if entry is not None and entry.source != "fallback" and entry.version != version:
+                # di-invalidate (di worker ini atau worker lain) sejak entry dibuat
+                del self._entries[key]
+                entry = None
+        age = time.time() - entry.fetched_at if entry is not None else None
+
+        if entry is not None and age < self.ttl:
+            self._incr("hits")
+            self._observe("hit", started)
+            return entry.value, "hit"
+
+        if entry is not None and (age < self.ttl + self.max_stale or entry.source == "fallback"):
+            self._incr("stale_hits")
+            self._refresh_in_background(key, loader)
+            self._observe("stale_hit", started)
+            return entry.value, "fallback" if entry.source == "fallback" else "stale"
+
+        self._incr("misses")
+        try:
+            return self._flight.do(f"{self.name}:{key}", self._load, key, loader), "upstream"
+        except Exception as e:
+            self._incr("refresh_failures")
+            if entry is not None:
+                logger.warning("%s: refresh of %s failed, serving stale value: %s", self.name, key, e)
+                return entry.value, "stale"
+            if fallback is None:
+                raise
+            value = fallback()
+            if not value:
+                raise
+            self._incr("fallbacks")
+            logger.warning("%s: upstream failed for %s, serving fallback: %s", self.name, key, e)
+            with self._lock:
+                self._entries[key] = _Entry(value, 0.0, "fallback", version)
+            return value, "fallback"
+        finally:
+            self._observe("miss", started)
+
+    def invalidate(self, key=None):
+        """Drop `key` (or everything) from memory and snapshot; the next get() loads synchronously."""
+        with self._lock:
+            entries = self._load_snapshot()
+            if key is None:
+                entries.clear()
+            else:
+                entries.pop(key, None)
+            self._last_attempt.clear()
+        self._save_snapshot()
+
+    def stats(self):
+        with self._lock:
+            entries = self._entries or {}
+            now = time.time()
+            return {
+                **self._stats,
+                "ttl": self.ttl,
+                "entries": {
+                    key: {"age_seconds": round(now - e.fetched_at, 1) if e.fetched_at else None, "source": e.source}
+                    for key, e in entries.items()
+                },
+                "refreshing": sorted(self._refreshing),
+                "latency_ms": {
+                    kind: {
+                        "count": t["count"],
+                        "avg": round(t["total_ms"] / t["count"], 3) if t["count"] else 0.0,
+                        "max": round(t["max_ms"], 3)
+                    }
+                    for kind, t in self._timings.items()
+                }
+            }
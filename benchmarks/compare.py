@@ -0,0 +1,80 @@
+"""
+Compare two benchmark result files (benchmarks.run) endpoint by endpoint.
+
+    python -m benchmarks.compare base.json head.json
+    python -m benchmarks.compare base.json head.json --threshold 0.15 --fail-on-regression
+
+Regresi = p95 naik lebih dari --threshold (relatif, dan minimal --min-delta-ms), SQL per request bertambah,
+atau jumlah error bertambah. Dengan --fail-on-regression exit code 1 bila ada regresi (untuk CI).
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path, encoding="utf-8") as fh:
+        report = json.load(fh)
+    return report["meta"], {(r["phase"], r["endpoint"]): r for r in report["results"]}
+
+
+def _change(old, new):
+    if old in (None, 0) or new is None:
+        return None
+    return (new - old) / old
+
+
+def compare(base, head, threshold=0.1, min_delta_ms=0.5):
+    """Return rows [(phase, endpoint, base, head, p95 change, regressions)] for endpoints in both files."""
+    rows = []
+    for key in sorted(base.keys() & head.keys()):
+        old, new = base[key], head[key]
+        change = _change(old["p95_ms"], new["p95_ms"])
+        regressions = []
+        if change is not None and change > threshold and new["p95_ms"] - old["p95_ms"] >= min_delta_ms:
+            regressions.append(f"p95 +{change:.0%}")
+        if (new.get("sql_per_request") or 0) > (old.get("sql_per_request") or 0) + 0.01:
+            regressions.append(f"sql {old['sql_per_request']} -> {new['sql_per_request']}")
+        if new["errors"] > old["errors"]:
+            regressions.append(f"errors {old['errors']} -> {new['errors']}")
+        rows.append((*key, old, new, change, regressions))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative p95 growth counted as regression.")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="Ignore p95 changes smaller than this.")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    base_meta, base = load(args.base)
+    head_meta, head = load(args.head)
+    print(f"base: {base_meta.get('commit')} {base_meta.get('timestamp')}  "
+          f"head: {head_meta.get('commit')} {head_meta.get('timestamp')}")
+    if base_meta.get("options") != head_meta.get("options"):
+        print("warning: runs used different options; numbers may not be comparable")
+
+    rows = compare(base, head, args.threshold, args.min_delta_ms)
+    print(f"{'phase':11}{'endpoint':24}{'p50 base':>10}{'p50 head':>10}{'p95 base':>10}{'p95 head':>10}"
+          f"{'change':>9}{'sql':>12}  regression")
+    for phase, endpoint, old, new, change, regressions in rows:
+        print(
+            f"{phase:11}{endpoint:24}{old['p50_ms']:>10.2f}{new['p50_ms']:>10.2f}{old['p95_ms']:>10.2f}"
+            f"{new['p95_ms']:>10.2f}{(f'{change:+.0%}' if change is not None else '-'):>9}"
+            f"{str(old['sql_per_request']) + '/' + str(new['sql_per_request']):>12}  {', '.join(regressions)}"
+        )
+    for key in sorted(base.keys() ^ head.keys()):
+        print(f"only in {'base' if key in base else 'head'}: {key[0]} {key[1]}")
+
+    regressed = [row for row in rows if row[5]]
+    print(f"{len(regressed)} regression(s) across {len(rows)} endpoint(s)")
+    if regressed and args.fail_on_regression:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,308 @@
+"""
+Fake equran.id v2 API for benchmarks.
+
+Respons diambil dari fixture rekaman (benchmarks/fixtures/*.json.gz); path yang belum direkam dibuat secara
+deterministik dengan ukuran mirip aslinya (jumlah ayat per surah asli, teks & tafsir sepanjang rata-rata),
+jadi suite tetap bisa jalan tanpa jaringan. Latency dan error (HTTP 503 / koneksi diputus) bisa disuntikkan.
+
+    python -m benchmarks.fake_equran serve --port 8765 --latency-ms 80 --jitter-ms 40 --error-rate 0.05
+    python -m benchmarks.fake_equran record            # rekam /surat, /surat/<n>, /tafsir/<n> dari equran.id
+    python -m benchmarks.fake_equran record --surah 1 --surah 2
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+REAL_API_URL = "https://equran.id/api/v2"
+
+# jumlah ayat per surah (mushaf standar, total 6236)
+AYAT_COUNTS = (
+    7, 286, 200, 176, 120, 165, 206, 75, 129, 109, 123, 111, 43, 52, 99, 128, 111, 110, 98, 135,
+    112, 78, 118, 64, 77, 227, 93, 88, 69, 60, 34, 30, 73, 54, 45, 83, 182, 88, 75, 85,
+    54, 53, 89, 59, 37, 35, 38, 29, 18, 45, 60, 49, 62, 55, 78, 96, 29, 22, 24, 13,
+    14, 11, 11, 18, 12, 12, 30, 52, 52, 44, 28, 28, 20, 56, 40, 31, 50, 40, 46, 42,
+    29, 19, 36, 25, 22, 17, 19, 26, 30, 20, 15, 21, 11, 8, 8, 19, 5, 8, 8, 11,
+    11, 8, 3, 9, 5, 4, 7, 3, 6, 3, 5, 4, 5, 6
+)
+TOTAL_SURAH = len(AYAT_COUNTS)
+QARI = ("01", "02", "03", "04", "05", "06")
+
+ARABIC_WORDS = (
+    "بِسْمِ", "ٱللَّهِ", "ٱلرَّحْمَٰنِ", "ٱلرَّحِيمِ", "ٱلْحَمْدُ", "رَبِّ", "ٱلْعَٰلَمِينَ", "مَٰلِكِ", "يَوْمِ",
+    "ٱلدِّينِ", "إِيَّاكَ", "نَعْبُدُ", "نَسْتَعِينُ", "ٱهْدِنَا", "ٱلصِّرَٰطَ", "ٱلْمُسْتَقِيمَ", "ٱلَّذِينَ",
+    "ءَامَنُوا۟", "قُلْ", "هُوَ", "أَحَدٌ", "ٱلنَّاسِ", "كِتَٰبٌ", "نُورٌ", "وَ", "فِى", "مِنَ", "عَلَىٰ"
+)
+LATIN_WORDS = (
+    "bismillāhir", "raḥmānir", "raḥīm", "al-ḥamdu", "lillāhi", "rabbil", "'ālamīn", "māliki", "yaumid",
+    "dīn", "iyyāka", "na'budu", "qul", "huwa", "aḥad", "wa", "fī", "minal", "'alā", "nās"
+)
+INDONESIAN_WORDS = (
+    "Allah", "Tuhan", "seluruh", "alam", "Maha", "Pengasih", "Penyayang", "segala", "puji", "bagi",
+    "hari", "pembalasan", "hanya", "kepada", "Engkau", "kami", "menyembah", "memohon", "pertolongan",
+    "tunjukilah", "jalan", "lurus", "orang", "beriman", "manusia", "kitab", "cahaya", "rahmat", "sabar",
+    "syukur", "dan", "yang", "itu", "dari", "di", "dengan", "mereka", "sesungguhnya"
+)
+
+
+def _words(rng, vocabulary, chars):
+    out, length = [], 0
+    while length < chars:
+        word = rng.choice(vocabulary)
+        out.append(word)
+        length += len(word) + 1
+    return " ".join(out)
+
+
+def fixture_name(path):
+    """'/surat/2' -> 'surat_2.json.gz'."""
+    return path.strip("/").replace("/", "_") + ".json.gz"
+
+
+class FakeEquran:
+    """
+    In-process HTTP server speaking the equran.id v2 shapes used by EQuranService.
+
+    - /api/v2/surat, /api/v2/surat/<n>, /api/v2/tafsir/<n>: JSON (fixture atau sintetis)
+    - /cdn/...: byte MP3 palsu (audio per ayat / audioFull menunjuk ke sini); /api/v2/audio/... juga,
+      untuk URL fallback generate_audio_url saat ayat belum tersimpan
+    - latency_ms + jitter_ms ditambahkan ke tiap respons; error_rate menghasilkan 503 (atau reset koneksi
+      bila error_mode="reset")
+    """
+
+    def __init__(self, fixtures_dir=FIXTURES_DIR, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0,
+                 error_mode="503", audio_bytes=64 * 1024, seed=0):
+        self.fixtures_dir = fixtures_dir
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_mode = error_mode
+        self.audio_bytes = audio_bytes
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._bodies = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+        self.base = None
+        self.stats = {"requests": 0, "injected_errors": 0, "fixture_hits": 0, "synthesized": 0, "not_found": 0}
+
+    # ----------------------
+    # Lifecycle
+    # ----------------------
+    def start(self, host="127.0.0.1", port=0):
+        """Start serving in a daemon thread; returns the API base URL (…/api/v2)."""
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                fake._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.base = f"http://{host}:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-equran", daemon=True)
+        self._thread.start()
+        return f"{self.base}/api/v2"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    # ----------------------
+    # Payloads
+    # ----------------------
+    def _audio_url(self, path):
+        return f"{self.base}/cdn/{path}"
+
+    def _rewrite_audio(self, value):
+        """Point recorded CDN URLs at this server so audio downloads stay local."""
+        if isinstance(value, dict):
+            return {
+                key: (re.sub(r"^https?://", f"{self.base}/cdn/", v) if key in QARI and isinstance(v, str)
+                      else self._rewrite_audio(v))
+                for key, v in value.items()
+            }
+        if isinstance(value, list):
+            return [self._rewrite_audio(v) for v in value]
+        return value
+
+    def _load_fixture(self, path):
+        fixture = os.path.join(self.fixtures_dir, fixture_name(path))
+        if not os.path.exists(fixture):
+            return None
+        with gzip.open(fixture, "rt", encoding="utf-8") as fh:
+            return self._rewrite_audio(json.load(fh))
+
+    def _surah_meta(self, nomor):
+        rng = random.Random(nomor)
+        return {
+            "nomor": nomor,
+            "nama": f"سُورَةُ {nomor}",
+            "namaLatin": f"Surah-{nomor}",
+            "jumlahAyat": AYAT_COUNTS[nomor - 1],
+            "tempatTurun": "Mekah" if rng.random() < 0.75 else "Madinah",
+            "arti": _words(rng, INDONESIAN_WORDS, 20),
+            "deskripsi": _words(rng, INDONESIAN_WORDS, 600),
+            "audioFull": {q: self._audio_url(f"audio-full/{q}/{nomor:03d}.mp3") for q in QARI}
+        }
+
+    def _synthesize(self, path):
+        if path == "/surat":
+            return {"code": 200, "message": "OK", "data": [self._surah_meta(n) for n in range(1, TOTAL_SURAH + 1)]}
+        match = re.match(r"^/(surat|tafsir)/(\d+)$", path)
+        if not match or not 1 <= int(match.group(2)) <= TOTAL_SURAH:
+            return None
+        kind, nomor = match.group(1), int(match.group(2))
+        rng = random.Random(nomor * 7919 + (kind == "tafsir"))
+        data = self._surah_meta(nomor)
+        if kind == "surat":
+            data["ayat"] = [
+                {
+                    "nomorAyat": i,
+                    "teksArab": _words(rng, ARABIC_WORDS, rng.randint(60, 260)),
+                    "teksLatin": _words(rng, LATIN_WORDS, rng.randint(60, 300)),
+                    "teksIndonesia": _words(rng, INDONESIAN_WORDS, rng.randint(80, 400)),
+                    "audio": {q: self._audio_url(f"audio-partial/{q}/{nomor:03d}{i:03d}.mp3") for q in QARI}
+                }
+                for i in range(1, AYAT_COUNTS[nomor - 1] + 1)
+            ]
+        else:
+            data["tafsir"] = [
+                {"ayat": i, "teks": _words(rng, INDONESIAN_WORDS, rng.randint(400, 3000))}
+                for i in range(1, AYAT_COUNTS[nomor - 1] + 1)
+            ]
+        return {"code": 200, "message": "OK", "data": data}
+
+    def body(self, path):
+        """Encoded JSON body for an API `path` (without /api/v2), or None for an unknown path."""
+        with self._lock:
+            if path in self._bodies:
+                return self._bodies[path]
+        payload = self._load_fixture(path)
+        if payload is not None:
+            self.stats["fixture_hits"] += 1
+        else:
+            payload = self._synthesize(path)
+            if payload is None:
+                return None
+            self.stats["synthesized"] += 1
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            self._bodies[path] = body
+        return body
+
+    # ----------------------
+    # HTTP
+    # ----------------------
+    def _send(self, handler, status, body, content_type):
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _handle(self, handler):
+        self.stats["requests"] += 1
+        with self._rng_lock:
+            delay = self.latency_ms + (self._rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+            fail = self.error_rate and self._rng.random() < self.error_rate
+        if delay:
+            time.sleep(delay / 1000.0)
+        if fail:
+            self.stats["injected_errors"] += 1
+            if self.error_mode == "reset":
+                handler.close_connection = True
+                handler.connection.close()
+                return
+            return self._send(handler, 503, b'{"code": 503, "message": "Injected error"}', "application/json")
+
+        path = handler.path.split("?", 1)[0]
+        if path.startswith(("/cdn/", "/api/v2/audio/")):
+            return self._send(handler, 200, b"\xff\xfb\x90\x00" * (self.audio_bytes // 4), "audio/mpeg")
+        if path.startswith("/api/v2/"):
+            body = self.body(path[len("/api/v2"):])
+            if body is not None:
+                return self._send(handler, 200, body, "application/json")
+        self.stats["not_found"] += 1
+        self._send(handler, 404, b'{"code": 404, "message": "Not found"}', "application/json")
+
+
+# ----------------------
+# Recording
+# ----------------------
+def record(surah_numbers=None, fixtures_dir=FIXTURES_DIR, api_url=REAL_API_URL, include_tafsir=True):
+    """Save real equran.id responses as gzip fixtures; returns the list of written files."""
+    import requests
+
+    os.makedirs(fixtures_dir, exist_ok=True)
+    paths = ["/surat"]
+    for nomor in surah_numbers or range(1, TOTAL_SURAH + 1):
+        paths.append(f"/surat/{nomor}")
+        if include_tafsir:
+            paths.append(f"/tafsir/{nomor}")
+
+    written = []
+    with requests.Session() as session:
+        for path in paths:
+            resp = session.get(f"{api_url}{path}", timeout=30)
+            resp.raise_for_status()
+            target = os.path.join(fixtures_dir, fixture_name(path))
+            with gzip.open(target, "wt", encoding="utf-8") as fh:
+                json.dump(resp.json(), fh, ensure_ascii=False)
+            written.append(target)
+            print(f"recorded {path} -> {os.path.relpath(target)}")
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="Jalankan fake upstream sampai Ctrl+C.")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--latency-ms", type=float, default=0.0)
+    serve.add_argument("--jitter-ms", type=float, default=0.0)
+    serve.add_argument("--error-rate", type=float, default=0.0)
+    serve.add_argument("--error-mode", choices=("503", "reset"), default="503")
+    serve.add_argument("--fixtures", default=FIXTURES_DIR)
+
+    rec = sub.add_parser("record", help="Rekam respons equran.id asli ke direktori fixture.")
+    rec.add_argument("--surah", type=int, action="append", help="Hanya surah tertentu (bisa diulang).")
+    rec.add_argument("--no-tafsir", action="store_true")
+    rec.add_argument("--api-url", default=REAL_API_URL)
+    rec.add_argument("--fixtures", default=FIXTURES_DIR)
+
+    args = parser.parse_args(argv)
+    if args.command == "record":
+        record(args.surah, fixtures_dir=args.fixtures, api_url=args.api_url, include_tafsir=not args.no_tafsir)
+        return
+
+    fake = FakeEquran(
+        fixtures_dir=args.fixtures, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, error_mode=args.error_mode
+    )
+    print(f"Fake equran.id listening on {fake.start(args.host, args.port)} (EQURAN_API_URL)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        fake.stop()
+
+
+if __name__ == "__main__":
+    main()
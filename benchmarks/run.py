@@ -0,0 +1,462 @@
+"""
+Load-test & micro-benchmark suite for the /api endpoints against a fake equran.id upstream.
+
+Aplikasi dijalankan in-process (Flask test client) dengan DB, cache, lock & log di direktori sementara,
+upstream diganti benchmarks.fake_equran. Dua fase:
+
+- cold: DB kosong, tiap request memakai surah yang belum pernah disentuh (fetch upstream + persist)
+- warm: korpus sudah di-warmup penuh, tiap endpoint dipanggil --iterations kali
+
+plus fase micro (fungsi service tanpa HTTP) dan contention (baca /api/surah/<n> dari DB saat idle vs saat satu
+thread terus menulis tafsir; membandingkan profil DB, mis. --env DB_SQLITE_JOURNAL_MODE=DELETE vs WAL). Hasil per endpoint: p50/p95/p99/mean/max latency, throughput,
+SQL statement per request, status code; disimpan sebagai JSON untuk dibandingkan antar commit:
+
+    python -m benchmarks.run                                  # -> benchmarks/results/<commit>-<waktu>.json
+    python -m benchmarks.run --iterations 500 --concurrency 4 --latency-ms 80 --error-rate 0.02
+    python -m benchmarks.run --only surah_detail,tafsir --env CORPUS_STORE_ENABLED=true
+    python -m benchmarks.run --phases contention --concurrency 4 --env DB_SQLITE_JOURNAL_MODE=DELETE
+    python -m benchmarks.compare benchmarks/results/a.json benchmarks/results/b.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.fake_equran import FakeEquran, AYAT_COUNTS, TOTAL_SURAH  # noqa: E402
+
+SEARCH_QUERIES = ("rahmat", "Allah", "jalan lurus", "sabar", "manusia", "ٱللَّهِ", "cahaya", "kitab")
+
+
+class Case:
+    """
+    One endpoint scenario. `build(surah, i)` returns (method, path, json_body); `ok` are the expected statuses.
+    uses_surah=True: fase cold memberi surah yang belum pernah diminta ke tiap request.
+    """
+
+    def __init__(self, name, build, uses_surah=True, ok=(200,), user=False, cold=True, max_requests=None):
+        self.name = name
+        self.build = build
+        self.uses_surah = uses_surah
+        self.ok = set(ok)
+        self.user = user
+        self.cold = cold
+        self.max_requests = max_requests
+
+
+CASES = [
+    Case("surah_list", lambda s, i: ("GET", "/api/surah", None), uses_surah=False),
+    Case("surah_list_search", lambda s, i: ("GET", f"/api/surah?search=Surah-{s}", None), uses_surah=False),
+    Case("surah_detail", lambda s, i: ("GET", f"/api/surah/{s}", None)),
+    Case("surah_detail_page", lambda s, i: ("GET", f"/api/surah/{s}?page=2&limit=10", None)),
+    # Al-Baqarah utuh (286 ayat) dalam satu halaman: beban normalisasi + serialisasi terbesar
+    Case("surah_detail_286", lambda s, i: ("GET", "/api/surah/2?limit=286", None), uses_surah=False),
+    Case("surah_invalid", lambda s, i: ("GET", f"/api/surah/{115 + i}", None), uses_surah=False, ok=(404,)),
+    Case("tafsir_page", lambda s, i: ("GET", f"/api/tafsir/{s}?limit=5", None)),
+    Case("tafsir_ayat", lambda s, i: ("GET", f"/api/tafsir/{s}?ayat=1", None)),
+    Case("tafsir_full", lambda s, i: ("GET", f"/api/tafsir/{s}", None)),
+    Case("ayat_batch", lambda s, i: ("GET", f"/api/ayat?ref={s}:1-5,{s % TOTAL_SURAH + 1}:1", None)),
+    Case("juz", lambda s, i: ("GET", f"/api/juz/{i % 30 + 1}", None), uses_surah=False),
+    Case("mushaf_page", lambda s, i: ("GET", f"/api/page/{i * 37 % 604 + 1}", None), uses_surah=False),
+    Case("export_surah", lambda s, i: ("GET", f"/api/export?surah={s}", None)),
+    Case("export_all", lambda s, i: ("GET", "/api/export", None), uses_surah=False, cold=False, max_requests=3),
+    Case("search", lambda s, i: ("GET", f"/api/search?q={SEARCH_QUERIES[i % len(SEARCH_QUERIES)]}", None),
+         uses_surah=False),
+    Case("audio_url", lambda s, i: ("GET", f"/api/audio?surah={s}&ayat=1", None)),
+    Case("audio_stream", lambda s, i: ("GET", f"/api/audio/stream?surah={s}&ayat=1", None)),
+    Case("bookmark_add", lambda s, i: ("POST", "/api/bookmark", {"surah": s, "ayat": 1}), user=True),
+    Case("bookmark_list", lambda s, i: ("GET", "/api/bookmark?limit=20", None), uses_surah=False, user=True),
+    Case("bookmark_remove", lambda s, i: ("DELETE", "/api/bookmark", {"surah": s, "ayat": 1}), user=True),
+    Case("note_save", lambda s, i: ("POST", "/api/note", {"surah": s, "ayat": 1, "content": f"catatan {i}"}),
+         user=True),
+    Case("note_get", lambda s, i: ("GET", f"/api/note?surah={s}&ayat=1", None), ok=(200, 404), user=True),
+    Case("note_changes", lambda s, i: ("GET", "/api/note/changes", None), uses_surah=False, user=True),
+    Case("status", lambda s, i: ("GET", "/api/status", None), uses_surah=False),
+    Case("metrics", lambda s, i: ("GET", "/metrics", None), uses_surah=False),
+    # terakhir: membuang cache daftar surah & response cache
+    Case("surah_cache_clear", lambda s, i: ("POST", "/api/surah/cache/clear", None), uses_surah=False,
+         cold=False, max_requests=5),
+]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo, hi = int(k), min(int(k) + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(phase, name, samples, wall):
+    """samples: [(seconds, status, sql_statements, body_bytes, ok, cpu_seconds)]."""
+    latencies = sorted(s[0] for s in samples)
+    statuses = {}
+    for _, status, _, _, _, _ in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    sql = [s[2] for s in samples]
+    ms = lambda v: round(v * 1000, 3) if v is not None else None  # noqa: E731
+    return {
+        "phase": phase,
+        "endpoint": name,
+        "requests": len(samples),
+        "errors": sum(1 for s in samples if not s[4]),
+        "status": statuses,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "mean_ms": ms(sum(latencies) / len(latencies)) if latencies else None,
+        "max_ms": ms(latencies[-1]) if latencies else None,
+        "cpu_mean_ms": ms(sum(s[5] for s in samples) / len(samples)) if samples else None,
+        "throughput_rps": round(len(samples) / wall, 1) if wall > 0 else None,
+        "sql_per_request": round(sum(sql) / len(sql), 2) if sql else None,
+        "sql_max": max(sql) if sql else None,
+        "bytes_mean": round(sum(s[3] for s in samples) / len(samples)) if samples else None
+    }
+
+
+class Bench:
+    def __init__(self, args):
+        self.args = args
+        self.workdir = tempfile.mkdtemp(prefix="qalmi-bench-")
+        self.fake = FakeEquran(
+            latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+            error_rate=args.error_rate, error_mode=args.error_mode, seed=args.seed
+        )
+        self._sql = threading.local()
+        self.results = []
+
+    # ----------------------
+    # Setup
+    # ----------------------
+    def _environment(self, api_url):
+        path = lambda name: os.path.join(self.workdir, name)  # noqa: E731
+        env = {
+            "EQURAN_API_URL": api_url,
+            "DATABASE_URI": "sqlite:///" + path("data.db"),
+            "CACHE_SQLITE_PATH": path("shared_cache.db"),
+            "SURAH_LIST_SNAPSHOT": path("surah_list_snapshot.json"),
+            "SINGLEFLIGHT_LOCK_DIR": path("locks"),
+            "AUDIO_CACHE_ENABLED": "true",
+            "AUDIO_CACHE_DIR": path("audio_cache"),
+            "METRICS_DIR": path("metrics"),
+            "WARMUP_CHECKPOINT": path("warmup_checkpoint.json"),
+            "BUNDLE_PATH": path("corpus.qbundle"),
+            "LOG_FILE": path("app.log"),
+            "LOG_CONSOLE_LEVEL": "ERROR",
+            "WARMUP_ON_STARTUP": "false",
+            "BUNDLE_IMPORT_ON_STARTUP": "false"
+        }
+        for item in self.args.env or []:
+            key, _, value = item.partition("=")
+            env[key] = value
+        return env
+
+    def setup(self):
+        api_url = self.fake.start()
+        self.env = self._environment(api_url)
+        os.environ.update(self.env)
+
+        # Config membaca environment saat import: app baru di-import setelah env diset
+        from app import create_app
+        from app.extension import db
+        from sqlalchemy import event
+
+        self.app = create_app()
+        with self.app.app_context():
+            for engine in db.engines.values():  # + replika "read" bila DATABASE_READ_URI diisi
+                event.listen(engine, "before_cursor_execute", self._count_sql)
+
+    def _count_sql(self, *args):
+        self._sql.count = getattr(self._sql, "count", 0) + 1
+
+    def teardown(self):
+        self.fake.stop()
+        if not self.args.keep_workdir:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+    # ----------------------
+    # Load phases
+    # ----------------------
+    def _request(self, client, case, surah, i):
+        method, path, body = case.build(surah, i)
+        headers = {"X-User-Id": str(1 + i % 50)} if case.user else {}
+        self._sql.count = 0
+        started, cpu_started = time.perf_counter(), time.process_time()
+        resp = client.open(path, method=method, json=body, headers=headers)
+        data = resp.get_data()  # streaming (export) ikut dikonsumsi penuh
+        elapsed, cpu = time.perf_counter() - started, time.process_time() - cpu_started
+        status = resp.status_code
+        resp.close()
+        return elapsed, status, self._sql.count, len(data), status in case.ok, cpu
+
+    def _run(self, case, jobs):
+        """Run [(surah, i)] for `case` with --concurrency threads; returns (samples, wall seconds)."""
+        concurrency = max(1, self.args.concurrency)
+        started = time.perf_counter()
+        if concurrency == 1:
+            client = self.app.test_client()
+            samples = [self._request(client, case, surah, i) for surah, i in jobs]
+        else:
+            local = threading.local()
+
+            def work(job):
+                if not hasattr(local, "client"):
+                    local.client = self.app.test_client()
+                return self._request(local.client, case, *job)
+
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                samples = list(pool.map(work, jobs))
+        return samples, time.perf_counter() - started
+
+    def _selected(self):
+        only = set(self.args.only.split(",")) if self.args.only else None
+        return [case for case in CASES if only is None or case.name in only]
+
+    def _record(self, phase, case, samples, wall):
+        result = summarize(phase, case.name, samples, wall)
+        self.results.append(result)
+        print(
+            f"  {phase:10} {case.name:20} n={result['requests']:<5} p50={result['p50_ms']:>9.2f}ms "
+            f"p95={result['p95_ms']:>9.2f}ms p99={result['p99_ms']:>9.2f}ms "
+            f"cpu={result['cpu_mean_ms']:>8.2f}ms {result['throughput_rps']:>8.1f} req/s  "
+            f"sql={result['sql_per_request']:<6} errors={result['errors']}"
+        )
+
+    def cold_phase(self):
+        print("cold (empty DB)")
+        untouched = iter(range(1, TOTAL_SURAH + 1))
+        for case in self._selected():
+            if not case.cold:
+                continue
+            count = self.args.cold_samples if case.uses_surah else 1
+            jobs = []
+            for i in range(count):
+                surah = next(untouched, None)
+                if surah is None:
+                    # semua surah sudah tersentuh: sisa sampel cold tidak lagi benar-benar cold
+                    break
+                jobs.append((surah, i))
+            if case.uses_surah and not jobs:
+                continue
+            if not case.uses_surah:
+                jobs = [(1, 0)]
+            self._record("cold", case, *self._run(case, jobs))
+
+    def warmup_corpus(self):
+        from app.services.WarmupServices import WarmupService
+
+        started = time.perf_counter()
+        with self.app.app_context():
+            report = WarmupService.run(workers=self.args.warmup_workers, resume=False)
+        self.warmup = {
+            "seconds": round(time.perf_counter() - started, 3),
+            "failed": report["failed"],
+            "ayat_rows": report["ayat_rows"],
+            "tafsir_rows": report["tafsir_rows"]
+        }
+        print(f"warmup: {self.warmup}")
+
+    def warm_phase(self):
+        print("warm (full corpus)")
+        rng = random.Random(self.args.seed)
+        # surah dipilih berbobot jumlah ayat kecil-besar secara acak tapi deterministik
+        surahs = [rng.randint(1, TOTAL_SURAH) for _ in range(self.args.iterations)]
+        for case in self._selected():
+            count = min(self.args.iterations, case.max_requests or self.args.iterations)
+            jobs = [(surahs[i], i) for i in range(count)]
+            self._run(case, jobs[:min(len(jobs), self.args.warm_requests)])  # pemanasan (JIT cache, pool, dsb.)
+            self._record("warm", case, *self._run(case, jobs))
+
+    def contention_phase(self):
+        """
+        Read throughput without and with a concurrent write burst. Response cache & corpus store dimatikan
+        supaya tiap request benar-benar membaca DB; writer meng-upsert ulang tafsir surah terbesar berulang kali.
+        """
+        print("contention (reads vs write burst)")
+        from app.response_cache import response_cache
+        from app.services.CorpusStore import corpus_store
+        from app.services.IngestServices import IngestService
+        from app.services.WarmupServices import WarmupService
+
+        largest = max(range(1, TOTAL_SURAH + 1), key=lambda n: AYAT_COUNTS[n - 1])
+        with self.app.app_context():
+            _, tafsir_data = WarmupService._fetch(largest, False, True)
+
+        rng = random.Random(self.args.seed)
+        jobs = [(rng.randint(1, TOTAL_SURAH), i) for i in range(self.args.iterations)]
+        read = next(case for case in CASES if case.name == "surah_detail")
+        saved = response_cache.enabled, corpus_store.enabled
+        response_cache.enabled = corpus_store.enabled = False
+        try:
+            self._run(read, jobs[:self.args.warm_requests])
+            self._record("contention", Case("read_idle", None), *self._run(read, jobs))
+
+            stop, writes = threading.Event(), []
+
+            def writer():
+                with self.app.app_context():
+                    while not stop.is_set():
+                        started, cpu_started = time.perf_counter(), time.process_time()
+                        try:
+                            IngestService.ingest(largest, tafsir_data=tafsir_data)
+                            status = 200
+                        except Exception:
+                            status = 500
+                        writes.append((
+                            time.perf_counter() - started, status, 0, 0, status == 200,
+                            time.process_time() - cpu_started
+                        ))
+
+            thread = threading.Thread(target=writer, name="bench-writer")
+            write_started = time.perf_counter()
+            thread.start()
+            try:
+                self._record("contention", Case("read_under_write", None), *self._run(read, jobs))
+            finally:
+                stop.set()
+                thread.join()
+            self._record("contention", Case("write_burst", None), writes, time.perf_counter() - write_started)
+        finally:
+            response_cache.enabled, corpus_store.enabled = saved
+
+    # ----------------------
+    # Micro benchmarks
+    # ----------------------
+    def micro_phase(self):
+        """Service-level hot paths without HTTP/Werkzeug overhead."""
+        print("micro")
+        from flask import json as flask_json
+        from app.services.EquranServices import EQuranService
+        from app.models.EquranModels import Ayat, Surah
+
+        largest = max(range(1, TOTAL_SURAH + 1), key=lambda n: AYAT_COUNTS[n - 1])
+        with self.app.app_context():
+            surah_id = Surah.query.filter_by(nomor=largest).first().id
+            rows = Ayat.query.filter_by(surah_id=surah_id).order_by(Ayat.nomor_ayat).all()
+            detail = EQuranService.get_surah_detail(largest, limit=len(rows))
+            refs = ",".join(f"{n}:1-3" for n in range(1, 60))
+
+            cases = {
+                "normalize_ayat_from_db": lambda: [EQuranService._normalize_ayat_from_db(a) for a in rows],
+                "get_surah_detail_full": lambda: EQuranService.get_surah_detail(largest, limit=len(rows)),
+                "serialize_surah_detail": lambda: flask_json.dumps({"status": "success", "data": detail}),
+                "parse_ayat_refs": lambda: EQuranService.parse_ayat_refs(refs),
+                "get_all_surah": lambda: EQuranService.get_all_surah(page=1, limit=114)
+            }
+            for name, fn in cases.items():
+                fn()
+                samples = []
+                for _ in range(self.args.micro_iterations):
+                    self._sql.count = 0
+                    started, cpu_started = time.perf_counter(), time.process_time()
+                    fn()
+                    samples.append((
+                        time.perf_counter() - started, 200, self._sql.count, 0, True, time.process_time() - cpu_started
+                    ))
+                self._record("micro", Case(name, None), samples, sum(s[0] for s in samples))
+
+    # ----------------------
+    # Report
+    # ----------------------
+    @staticmethod
+    def _git(*args):
+        try:
+            return subprocess.check_output(["git", *args], cwd=ROOT, stderr=subprocess.DEVNULL, text=True).strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def report(self):
+        commit = self._git("rev-parse", "--short", "HEAD")
+        dirty = bool(self._git("status", "--porcelain", "--untracked-files=no"))
+        return {
+            "meta": {
+                "label": self.args.label,
+                "commit": commit,
+                "dirty": dirty,
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "options": {
+                    key: getattr(self.args, key) for key in (
+                        "iterations", "cold_samples", "concurrency", "latency_ms", "jitter_ms", "error_rate",
+                        "error_mode", "seed", "only", "env"
+                    )
+                },
+                "upstream": self.fake.stats,
+                "warmup": getattr(self, "warmup", None)
+            },
+            "results": self.results
+        }
+
+    def save(self, report):
+        path = self.args.out
+        if not path:
+            meta = report["meta"]
+            stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            name = f"{meta['commit'] or 'nogit'}{'-dirty' if meta['dirty'] else ''}-{stamp}.json"
+            path = os.path.join(RESULTS_DIR, name)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2, ensure_ascii=False)
+        print(f"results written to {path}")
+        return path
+
+    def run(self):
+        self.setup()
+        try:
+            if "cold" in self.args.phases:
+                self.cold_phase()
+            if self.args.phases & {"warm", "micro", "contention"}:
+                self.warmup_corpus()
+            if "warm" in self.args.phases:
+                self.warm_phase()
+            if "micro" in self.args.phases:
+                self.micro_phase()
+            if "contention" in self.args.phases:
+                self.contention_phase()
+            return self.save(self.report())
+        finally:
+            self.teardown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--phases", default="cold,warm,micro", help="Subset of cold,warm,micro,contention.")
+    parser.add_argument("--only", help="Comma-separated endpoint names (see CASES).")
+    parser.add_argument("--iterations", type=int, default=200, help="Requests per endpoint in the warm phase.")
+    parser.add_argument("--warm-requests", type=int, default=20, help="Unmeasured requests before each warm run.")
+    parser.add_argument("--cold-samples", type=int, default=5, help="Cold requests per surah-based endpoint.")
+    parser.add_argument("--micro-iterations", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=1, help="Client threads per endpoint.")
+    parser.add_argument("--warmup-workers", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Injected upstream latency.")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Extra uniform random upstream latency.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of upstream requests that fail.")
+    parser.add_argument("--error-mode", choices=("503", "reset"), default="503")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--env", action="append", help="Extra app config as KEY=VALUE (repeatable).")
+    parser.add_argument("--label", help="Free-form label stored in the result file.")
+    parser.add_argument("--out", help="Result JSON path (default: benchmarks/results/<commit>-<time>.json).")
+    parser.add_argument("--keep-workdir", action="store_true", help="Keep the temporary DB/cache directory.")
+    args = parser.parse_args(argv)
+    args.phases = set(args.phases.split(","))
+    Bench(args).run()
+
+
+if __name__ == "__main__":
+    main()
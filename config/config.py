@@ -3,6 +3,8 @@ from dotenv import load_dotenv
 
 load_dotenv()
 basedir = os.path.abspath(os.path.dirname(__file__))
+# State runtime (cache, lock, metrics, log, checkpoint) di luar source tree; di-ignore git
+vardir = os.getenv('QALMI_VAR_DIR') or os.path.join(os.path.dirname(basedir), 'instance')
 
 class Config:
     raw_uri = os.getenv('DATABASE_URI') or "sqlite:///database/data.db"
@@ -19,4 +21,124 @@ class Config:
         SQLALCHEMY_DATABASE_URI = raw_uri
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Profil database. SQLite: pragma tiap koneksi baru (WAL: pembaca tidak diblok penulis); kosongkan untuk skip
+    DB_SQLITE_JOURNAL_MODE = os.getenv('DB_SQLITE_JOURNAL_MODE', 'WAL').upper()
+    DB_SQLITE_SYNCHRONOUS = os.getenv('DB_SQLITE_SYNCHRONOUS', 'NORMAL').upper()
+    DB_SQLITE_BUSY_TIMEOUT = int(os.getenv('DB_SQLITE_BUSY_TIMEOUT', 5000))
+    DB_SQLITE_MMAP_SIZE = int(os.getenv('DB_SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    DB_SQLITE_CACHE_SIZE = int(os.getenv('DB_SQLITE_CACHE_SIZE', -64 * 1024))  # negatif = KiB (64 MB)
+    # Postgres/MySQL: pool koneksi per worker
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+    # Replika read-only opsional: SELECT di luar transaksi tulis diarahkan ke sini
+    DATABASE_READ_URI = os.getenv('DATABASE_READ_URI')
+    # Skema lewat Alembic (migrations/): upgrade ke head saat start; false = jalankan `flask db upgrade` saat deploy
+    DB_UPGRADE_ON_STARTUP = os.getenv('DB_UPGRADE_ON_STARTUP', 'true').lower() in ('1', 'true', 'yes')
     API_URL = os.getenv('EQURAN_API_URL')
+
+    # Upstream HTTP client (connection pool, retry, circuit breaker)
+    UPSTREAM_POOL_SIZE = int(os.getenv('UPSTREAM_POOL_SIZE', 20))
+    UPSTREAM_CONNECT_TIMEOUT = float(os.getenv('UPSTREAM_CONNECT_TIMEOUT', 3))
+    UPSTREAM_TIMEOUT = float(os.getenv('UPSTREAM_TIMEOUT', 10))
+    UPSTREAM_RETRIES = int(os.getenv('UPSTREAM_RETRIES', 3))
+    UPSTREAM_BACKOFF_BASE = float(os.getenv('UPSTREAM_BACKOFF_BASE', 0.2))
+    UPSTREAM_BACKOFF_MAX = float(os.getenv('UPSTREAM_BACKOFF_MAX', 2))
+    UPSTREAM_DEADLINE = float(os.getenv('UPSTREAM_DEADLINE', 8))
+    BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', 5))
+    BREAKER_RESET_TIMEOUT = float(os.getenv('BREAKER_RESET_TIMEOUT', 30))
+
+    # Negative cache: fetch surah/tafsir yang gagal di upstream diingat sekian detik (0 = off)
+    NEGATIVE_CACHE_TTL = float(os.getenv('NEGATIVE_CACHE_TTL', 30))
+
+    # Single-flight: lock file per surah/tafsir supaya antar proses tidak fetch data yang sama
+    SINGLEFLIGHT_LOCK_DIR = os.getenv('SINGLEFLIGHT_LOCK_DIR') or os.path.join(vardir, 'locks')
+    SINGLEFLIGHT_LOCK_TIMEOUT = float(os.getenv('SINGLEFLIGHT_LOCK_TIMEOUT', 30))
+
+    # In-memory corpus store untuk /api/surah/<n> (opsional)
+    CORPUS_STORE_ENABLED = os.getenv('CORPUS_STORE_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    CORPUS_STORE_CHECK_INTERVAL = float(os.getenv('CORPUS_STORE_CHECK_INTERVAL', 30))
+
+    # Cache body response (ETag + 304) untuk /api/surah, /api/surah/<n>, /api/tafsir/<n>
+    RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 512))
+    RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    RESPONSE_CACHE_MAX_AGE = int(os.getenv('RESPONSE_CACHE_MAX_AGE', 300))
+
+    # Batas total ayat per request /api/ayat?ref=...
+    BATCH_AYAT_LIMIT = int(os.getenv('BATCH_AYAT_LIMIT', 300))
+
+    # Ukuran batch executemany saat upsert ayat/tafsir
+    INGEST_BATCH_SIZE = int(os.getenv('INGEST_BATCH_SIZE', 500))
+
+    # Bookmark: maks item per request bulk add/remove & maks limit per halaman list
+    BOOKMARK_BULK_LIMIT = int(os.getenv('BOOKMARK_BULK_LIMIT', 500))
+    BOOKMARK_PAGE_LIMIT = int(os.getenv('BOOKMARK_PAGE_LIMIT', 100))
+
+    # Note: maks item per request batch upsert, panjang isi note & maks limit per halaman delta sync
+    NOTE_BULK_LIMIT = int(os.getenv('NOTE_BULK_LIMIT', 500))
+    NOTE_MAX_LENGTH = int(os.getenv('NOTE_MAX_LENGTH', 10000))
+    NOTE_SYNC_PAGE_LIMIT = int(os.getenv('NOTE_SYNC_PAGE_LIMIT', 500))
+
+    # Identitas user endpoint bookmark/note: token Bearer bertanda tangan (USER_TOKEN_SECRET) dan/atau
+    # X-User-Id dari gateway tepercaya (header X-Gateway-Secret = USER_GATEWAY_SECRET); kosong semua -> nonaktif
+    USER_TOKEN_SECRET = os.getenv('USER_TOKEN_SECRET')
+    USER_TOKEN_MAX_AGE = int(os.getenv('USER_TOKEN_MAX_AGE', 30 * 86400))
+    USER_GATEWAY_SECRET = os.getenv('USER_GATEWAY_SECRET')
+
+    # Cache audio lokal untuk /api/audio/stream (off: redirect ke upstream)
+    AUDIO_CACHE_ENABLED = os.getenv('AUDIO_CACHE_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    AUDIO_CACHE_DIR = os.getenv('AUDIO_CACHE_DIR', os.path.join(vardir, 'audio_cache'))
+    AUDIO_CACHE_MAX_BYTES = int(os.getenv('AUDIO_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+    AUDIO_CACHE_MAX_AGE = int(os.getenv('AUDIO_CACHE_MAX_AGE', 86400))
+    AUDIO_CACHE_EVICT_GRACE = float(os.getenv('AUDIO_CACHE_EVICT_GRACE', 60))  # detik; file yang baru diputar tidak di-evict
+    AUDIO_DEFAULT_QARI = os.getenv('AUDIO_DEFAULT_QARI', '05')
+
+    # Cache daftar surah (/surat): TTL, batas nilai basi yang masih boleh dilayani, snapshot di disk
+    SURAH_LIST_TTL = float(os.getenv('SURAH_LIST_TTL', 3600))
+    SURAH_LIST_MAX_STALE = float(os.getenv('SURAH_LIST_MAX_STALE', 7 * 86400))
+    SURAH_LIST_RETRY_INTERVAL = float(os.getenv('SURAH_LIST_RETRY_INTERVAL', 30))
+    SURAH_LIST_SNAPSHOT = os.getenv('SURAH_LIST_SNAPSHOT', os.path.join(vardir, 'surah_list_snapshot.json'))
+
+    # Tabel statis 114 surah (jumlah ayat) + batas juz, hizb, rubu', halaman mushaf; dibaca sekali per proses
+    NAVIGATION_INDEX_PATH = os.getenv('NAVIGATION_INDEX_PATH', os.path.join(basedir, 'database', 'navigation.json'))
+
+    # Cache bersama antar worker: sqlite (file lokal), redis (REDIS_URL) atau memory (per proses)
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'sqlite')
+    CACHE_SQLITE_PATH = os.getenv('CACHE_SQLITE_PATH', os.path.join(vardir, 'shared_cache.db'))
+    REDIS_URL = os.getenv('REDIS_URL')
+    CACHE_L1_MAX_ENTRIES = int(os.getenv('CACHE_L1_MAX_ENTRIES', 1024))
+    CACHE_L1_TTL = float(os.getenv('CACHE_L1_TTL', 60))
+    CACHE_VERSION_CHECK_INTERVAL = float(os.getenv('CACHE_VERSION_CHECK_INTERVAL', 1.0))
+
+    # Bundle korpus (flask quran export-bundle / import-bundle); opsional di-load saat start bila DB kosong
+    BUNDLE_PATH = os.getenv('BUNDLE_PATH', os.path.join(vardir, 'corpus.qbundle'))
+    BUNDLE_IMPORT_ON_STARTUP = os.getenv('BUNDLE_IMPORT_ON_STARTUP', 'false').lower() in ('1', 'true', 'yes')
+
+    # Logging: level global & per modul (LOG_LEVELS="app.services.EquranClient=INFO,app.cache=WARNING"),
+    # format json/text, antrean async ke thread listener, sampling debug log per request
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG').upper()
+    LOG_LEVELS = os.getenv('LOG_LEVELS', '')
+    LOG_FILE = os.getenv('LOG_FILE', os.path.join(vardir, 'logs', 'data.log'))
+    LOG_FILE_LEVEL = os.getenv('LOG_FILE_LEVEL', 'DEBUG').upper()
+    LOG_CONSOLE_LEVEL = os.getenv('LOG_CONSOLE_LEVEL', 'INFO').upper()
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'json').lower()
+    LOG_ASYNC = os.getenv('LOG_ASYNC', 'true').lower() in ('1', 'true', 'yes')
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+    LOG_DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', 0.1))
+
+    # Metrics Prometheus di /metrics; tiap worker menulis snapshot ke METRICS_DIR, /metrics menjumlahkan semuanya
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    METRICS_DIR = os.getenv('METRICS_DIR', os.path.join(vardir, 'metrics'))
+    METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 1.0))
+
+    # Encoder JSON respons: auto (orjson bila terpasang, opsional), orjson, atau stdlib
+    JSON_BACKEND = os.getenv('JSON_BACKEND', 'auto').lower()
+
+    # Warm-up korpus (flask quran warmup)
+    WARMUP_WORKERS = int(os.getenv('WARMUP_WORKERS', 8))
+    WARMUP_CHECKPOINT = os.getenv('WARMUP_CHECKPOINT') or os.path.join(vardir, 'warmup_checkpoint.json')
+    WARMUP_ON_STARTUP = os.getenv('WARMUP_ON_STARTUP', 'false').lower() in ('1', 'true', 'yes')
@@ -30,6 +30,16 @@ CREATE TABLE IF NOT EXISTS ayat (
     FOREIGN KEY (surah_id) REFERENCES surah(id) ON DELETE CASCADE
 );
 
+-- =====================================================
+-- RECITER TABLE (template URL audio per ayat per qari)
+-- =====================================================
+CREATE TABLE IF NOT EXISTS reciter (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kode VARCHAR(20) UNIQUE NOT NULL,
+    nama VARCHAR(100),
+    ayat_template VARCHAR(500) NOT NULL
+);
+
 -- =====================================================
 -- TAFSIR TABLE
 -- =====================================================
@@ -64,14 +74,25 @@ CREATE TABLE IF NOT EXISTS note (
     nomor_ayat INTEGER NOT NULL,
     content TEXT,
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    deleted_at DATETIME,
     FOREIGN KEY (surah_id) REFERENCES surah(id) ON DELETE CASCADE
 );
 
+-- =====================================================
+-- NOTE CLOCK TABLE (waktu tulis note terakhir per user)
+-- =====================================================
+CREATE TABLE IF NOT EXISTS note_clock (
+    user_id INTEGER PRIMARY KEY,
+    updated_at DATETIME NOT NULL
+);
+
 -- =====================================================
 -- INDEXES (Recommended for Performance)
 -- =====================================================
 
 CREATE INDEX IF NOT EXISTS idx_ayat_surah ON ayat(surah_id);
 CREATE INDEX IF NOT EXISTS idx_tafsir_surah ON tafsir(surah_id);
-CREATE INDEX IF NOT EXISTS idx_bookmark_user ON bookmark(user_id);
-CREATE INDEX IF NOT EXISTS idx_note_user ON note(user_id);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_bookmark_user_surah_ayat ON bookmark(user_id, surah_id, nomor_ayat);
+CREATE INDEX IF NOT EXISTS ix_bookmark_user_id ON bookmark(user_id, id);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_note_user_surah_ayat ON note(user_id, surah_id, nomor_ayat);
+CREATE INDEX IF NOT EXISTS ix_note_user_updated ON note(user_id, updated_at, id);
@@ -0,0 +1,85 @@
+"""baseline schema: surah, ayat, tafsir, bookmark, note
+
+Revision ID: 3f1a2c7d9b10
+Revises:
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1a2c7d9b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'surah',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('nomor', sa.Integer(), nullable=False),
+        sa.Column('nama', sa.String(length=100), nullable=False),
+        sa.Column('nama_latin', sa.String(length=100), nullable=True),
+        sa.Column('arti', sa.String(length=150), nullable=True),
+        sa.Column('jumlah_ayat', sa.Integer(), nullable=True),
+        sa.Column('tempat_turun', sa.String(length=50), nullable=True),
+        sa.Column('deskripsi', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('nomor')
+    )
+    op.create_table(
+        'ayat',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('surah_id', sa.Integer(), nullable=False),
+        sa.Column('nomor_ayat', sa.Integer(), nullable=False),
+        sa.Column('teks_arab', sa.Text(), nullable=True),
+        sa.Column('teks_latin', sa.Text(), nullable=True),
+        sa.Column('teks_indonesia', sa.Text(), nullable=True),
+        sa.Column('audio_url', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['surah_id'], ['surah.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('surah_id', 'nomor_ayat', name='uq_surah_nomor_ayat')
+    )
+    op.create_table(
+        'tafsir',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('surah_id', sa.Integer(), nullable=False),
+        sa.Column('nomor_ayat', sa.Integer(), nullable=False),
+        sa.Column('tafsir', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['surah_id'], ['surah.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('surah_id', 'nomor_ayat', name='uq_tafsir_surah_ayat')
+    )
+    op.create_table(
+        'bookmark',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('surah_id', sa.Integer(), nullable=False),
+        sa.Column('nomor_ayat', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['surah_id'], ['surah.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'note',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('surah_id', sa.Integer(), nullable=False),
+        sa.Column('nomor_ayat', sa.Integer(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['surah_id'], ['surah.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('note')
+    op.drop_table('bookmark')
+    op.drop_table('tafsir')
+    op.drop_table('ayat')
+    op.drop_table('surah')
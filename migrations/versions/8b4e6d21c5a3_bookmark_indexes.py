@@ -0,0 +1,39 @@
+"""bookmark: unique (user, surah, ayat) and keyset index (user_id, id)
+
+Revision ID: 8b4e6d21c5a3
+Revises: 3f1a2c7d9b10
+Create Date: 2026-10-17 16:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b4e6d21c5a3'
+down_revision = '3f1a2c7d9b10'
+branch_labels = None
+depends_on = None
+
+
+def _indexes(table):
+    # DB lama dari db.create_all() bisa sudah punya index ini
+    return {ix['name'] for ix in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    present = _indexes('bookmark')
+    if 'uq_bookmark_user_surah_ayat' not in present:
+        # bookmark ganda dari sebelum add() idempotent: simpan yang paling awal
+        op.execute(
+            "DELETE FROM bookmark WHERE id NOT IN ("
+            "SELECT id FROM (SELECT MIN(id) AS id FROM bookmark GROUP BY user_id, surah_id, nomor_ayat) AS keep)"
+        )
+        op.create_index('uq_bookmark_user_surah_ayat', 'bookmark', ['user_id', 'surah_id', 'nomor_ayat'], unique=True)
+    if 'ix_bookmark_user_id' not in present:
+        op.create_index('ix_bookmark_user_id', 'bookmark', ['user_id', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_bookmark_user_id', table_name='bookmark')
+    op.drop_index('uq_bookmark_user_surah_ayat', table_name='bookmark')
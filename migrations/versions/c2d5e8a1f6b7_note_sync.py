@@ -0,0 +1,50 @@
+"""note: tombstone column, unique (user, surah, ayat), delta-sync index and note_clock
+
+Revision ID: c2d5e8a1f6b7
+Revises: 8b4e6d21c5a3
+Create Date: 2026-10-17 16:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2d5e8a1f6b7'
+down_revision = '8b4e6d21c5a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # DB lama dari db.create_all() bisa sudah punya sebagian objek ini
+    inspector = sa.inspect(op.get_bind())
+    columns = {col['name'] for col in inspector.get_columns('note')}
+    indexes = {ix['name'] for ix in inspector.get_indexes('note')}
+
+    if 'deleted_at' not in columns:
+        op.add_column('note', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    if 'uq_note_user_surah_ayat' not in indexes:
+        # note ganda per ayat: simpan yang terakhir ditulis
+        op.execute(
+            "DELETE FROM note WHERE id NOT IN ("
+            "SELECT id FROM (SELECT MAX(id) AS id FROM note GROUP BY user_id, surah_id, nomor_ayat) AS keep)"
+        )
+        op.create_index('uq_note_user_surah_ayat', 'note', ['user_id', 'surah_id', 'nomor_ayat'], unique=True)
+    if 'ix_note_user_updated' not in indexes:
+        op.create_index('ix_note_user_updated', 'note', ['user_id', 'updated_at', 'id'], unique=False)
+    if not inspector.has_table('note_clock'):
+        op.create_table(
+            'note_clock',
+            sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('user_id')
+        )
+
+
+def downgrade():
+    op.drop_table('note_clock')
+    op.drop_index('ix_note_user_updated', table_name='note')
+    op.drop_index('uq_note_user_surah_ayat', table_name='note')
+    with op.batch_alter_table('note') as batch_op:
+        batch_op.drop_column('deleted_at')
@@ -0,0 +1,35 @@
+"""reciter: audio URL templates per qari
+
+Revision ID: e91b3a4c7f28
+Revises: c2d5e8a1f6b7
+Create Date: 2026-10-17 16:15:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e91b3a4c7f28'
+down_revision = 'c2d5e8a1f6b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # DB lama dari db.create_all() bisa sudah punya tabel ini; isi ayat.audio_url dipindah oleh IngestService.migrate_audio
+    if sa.inspect(op.get_bind()).has_table('reciter'):
+        return
+    op.create_table(
+        'reciter',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kode', sa.String(length=20), nullable=False),
+        sa.Column('nama', sa.String(length=100), nullable=True),
+        sa.Column('ayat_template', sa.String(length=500), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('kode')
+    )
+
+
+def downgrade():
+    op.drop_table('reciter')
@@ -0,0 +1,92 @@
+"""
+Shared fixtures: satu app + DB SQLite sementara per sesi, upstream diganti benchmarks.fake_equran (tanpa jaringan).
+
+Config membaca environment saat import, jadi env diset di sini sebelum `app` di-import.
+Jalankan: pip install -r requirements-dev.txt && python -m pytest -q
+"""
+import atexit
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.fake_equran import FakeEquran  # noqa: E402
+
+WORKDIR = tempfile.mkdtemp(prefix="qalmi-tests-")
+FAKE = FakeEquran()
+_user_ids = itertools.count(1000)
+# didaftarkan sebelum app di-import -> berjalan paling akhir, setelah flush metrics & log saat exit
+atexit.register(shutil.rmtree, WORKDIR, ignore_errors=True)
+
+os.environ.update({
+    "EQURAN_API_URL": FAKE.start(),
+    "QALMI_VAR_DIR": os.path.join(WORKDIR, "var"),
+    "DATABASE_URI": "sqlite:///" + os.path.join(WORKDIR, "data.db"),
+    "LOG_CONSOLE_LEVEL": "ERROR",
+    "WARMUP_ON_STARTUP": "false",
+    "BUNDLE_IMPORT_ON_STARTUP": "false",
+    "AUDIO_CACHE_ENABLED": "false",
+    "USER_TOKEN_SECRET": "test-user-token-secret"
+})
+
+
+def pytest_sessionfinish(session, exitstatus):
+    FAKE.stop()
+
+
+@pytest.fixture(scope="session")
+def fake():
+    return FAKE
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app import create_app
+
+    return create_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def app_context(app):
+    with app.app_context():
+        yield
+
+
+@pytest.fixture
+def user_id():
+    """User id unik per test: data bookmark/note antar test tidak saling terlihat."""
+    return next(_user_ids)
+
+
+@pytest.fixture
+def auth_headers():
+    """Header Authorization dengan token bertanda tangan untuk user id tertentu."""
+    from app.services.AuthServices import AuthService
+
+    return lambda uid: {"Authorization": f"Bearer {AuthService.issue_token(uid)}"}
+
+
+@pytest.fixture
+def warm_etag(client):
+    """ETag of `path` once it is served from the response cache."""
+    def _warm(path):
+        # request pertama bisa diisi dari upstream lalu di-persist (entry lama jadi stale); ETag stabil setelahnya
+        client.get(path)
+        resp = client.get(path)
+        assert resp.status_code == 200
+        assert resp.headers["ETag"]
+        return resp.headers["ETag"]
+
+    return _warm
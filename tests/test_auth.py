@@ -0,0 +1,31 @@
+from config.config import Config
+
+
+def test_raw_user_id_header_is_not_trusted(client, user_id, auth_headers):
+    client.post("/api/bookmark", json={"surah": 1, "ayat": 1}, headers=auth_headers(user_id))
+    assert client.get("/api/bookmark", headers={"X-User-Id": str(user_id)}).status_code == 401
+    assert client.get("/api/note/changes", headers={"X-User-Id": str(user_id)}).status_code == 401
+
+
+def test_tampered_token_is_rejected(client, user_id, auth_headers):
+    headers = auth_headers(user_id)
+    headers["Authorization"] = headers["Authorization"][:-2] + "xx"
+    assert client.get("/api/bookmark", headers=headers).status_code == 401
+
+
+def test_gateway_secret_is_checked_before_user_id(client, user_id, monkeypatch):
+    monkeypatch.setattr(Config, "USER_GATEWAY_SECRET", "gateway-secret")
+    trusted = {"X-Gateway-Secret": "gateway-secret", "X-User-Id": str(user_id)}
+    assert client.post("/api/bookmark", json={"surah": 1, "ayat": 2}, headers=trusted).status_code == 200
+    assert client.get("/api/bookmark", headers=trusted).get_json()["data"]["items"][0]["ayat"] == 2
+
+    forged = {"X-Gateway-Secret": "tebakan", "X-User-Id": str(user_id)}
+    assert client.get("/api/bookmark", headers=forged).status_code == 401
+
+
+def test_user_routes_disabled_without_auth_config(client, user_id, auth_headers, monkeypatch):
+    headers = auth_headers(user_id)
+    monkeypatch.setattr(Config, "USER_TOKEN_SECRET", None)
+    monkeypatch.setattr(Config, "USER_GATEWAY_SECRET", None)
+    assert client.get("/api/bookmark", headers=headers).status_code == 503
+    assert client.post("/api/note", json={"surah": 1, "ayat": 1, "content": "x"}, headers=headers).status_code == 503
@@ -0,0 +1,40 @@
+def _data(resp):
+    assert resp.status_code == 200, resp.get_data(as_text=True)
+    return resp.get_json()["data"]
+
+
+def test_bookmark_list_pages_newest_first(client, user_id, auth_headers):
+    headers = auth_headers(user_id)
+    items = [{"surah": 1, "ayat": n} for n in range(1, 8)]
+    assert _data(client.post("/api/bookmark", json={"items": items}, headers=headers)) == {"added": 7, "existing": 0}
+    # add ulang idempotent
+    assert _data(client.post("/api/bookmark", json=items[0], headers=headers)) == {"added": 0, "existing": 1}
+
+    seen, cursor = [], None
+    while True:
+        url = "/api/bookmark?limit=3" + (f"&after={cursor}" if cursor else "")
+        data = _data(client.get(url, headers=headers))
+        seen.extend(item["ayat"] for item in data["items"])
+        cursor = data["meta"]["next_cursor"]
+        if not cursor:
+            break
+    assert seen == [7, 6, 5, 4, 3, 2, 1]
+
+
+def test_bookmark_remove(client, user_id, auth_headers):
+    headers = auth_headers(user_id)
+    _data(client.post("/api/bookmark", json={"items": [{"surah": 2, "ayat": 255}, {"surah": 2, "ayat": 256}]},
+                      headers=headers))
+    _data(client.delete("/api/bookmark", json={"surah": 2, "ayat": 255}, headers=headers))
+    assert [item["ayat"] for item in _data(client.get("/api/bookmark", headers=headers))["items"]] == [256]
+
+
+def test_bookmarks_are_per_user(client, user_id, auth_headers):
+    _data(client.post("/api/bookmark", json={"surah": 1, "ayat": 1}, headers=auth_headers(user_id)))
+    other = user_id + 500_000
+    assert _data(client.get("/api/bookmark", headers=auth_headers(other)))["items"] == []
+
+
+def test_bookmark_out_of_range_ayat_is_400(client, user_id, auth_headers):
+    resp = client.post("/api/bookmark", json={"surah": 1, "ayat": 8}, headers=auth_headers(user_id))
+    assert resp.status_code == 400
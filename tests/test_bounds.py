@@ -0,0 +1,59 @@
+import pytest
+
+
+@pytest.mark.parametrize("path", [
+    "/api/surah/0",
+    "/api/surah/115",
+    "/api/tafsir/115",
+])
+def test_out_of_range_is_404_without_upstream(client, fake, path):
+    before = fake.stats["requests"]
+    resp = client.get(path)
+    assert resp.status_code == 404
+    assert resp.get_json()["status"] == "error"
+    assert fake.stats["requests"] == before
+
+
+@pytest.mark.parametrize("path", ["/api/juz/31", "/api/hizb/61", "/api/page/605"])
+def test_out_of_range_navigation_is_400(client, fake, path):
+    before = fake.stats["requests"]
+    assert client.get(path).status_code == 400
+    assert fake.stats["requests"] == before
+
+
+@pytest.mark.parametrize("ref", ["0:1", "999", "2:300", "2:5-1", "abc"])
+def test_invalid_ayat_refs_are_400(client, fake, ref):
+    before = fake.stats["requests"]
+    assert client.get(f"/api/ayat?ref={ref}").status_code == 400
+    assert fake.stats["requests"] == before
+
+
+def test_ayat_ref_range_is_clipped_to_surah(client):
+    resp = client.get("/api/ayat?ref=112:3-10")
+    assert resp.status_code == 200
+    data = resp.get_json()["data"]
+    assert [item["nomor"] for item in data["items"]] == [3, 4]
+    assert data["missing"] == []
+
+
+def test_failed_upstream_lookup_is_negatively_cached(client, monkeypatch):
+    from app.cache import shared_cache
+    from app.services.EquranClient import EQuranAPIError
+    from app.services.EquranServices import NEGATIVE_NAMESPACE, EQuranService
+
+    calls = []
+
+    def failing_get(endpoint, retry=3):
+        calls.append(endpoint)
+        raise EQuranAPIError(f"upstream gagal untuk {endpoint}")
+
+    monkeypatch.setattr(EQuranService, "_get", staticmethod(failing_get))
+    try:
+        assert client.get("/api/surah/98").status_code == 502
+        assert client.get("/api/surah/98").status_code == 502
+        assert calls == ["/surat/98"]  # kegagalan kedua dijawab dari negative cache
+    finally:
+        shared_cache.invalidate(NEGATIVE_NAMESPACE)
+
+    monkeypatch.undo()
+    assert client.get("/api/surah/98").status_code == 200
@@ -0,0 +1,25 @@
+import pytest
+
+from app.cache import CacheBackend, MemoryBackend, SQLiteBackend, TieredCache
+
+
+def test_incomplete_backend_fails_at_construction():
+    class GetOnly(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnly()
+
+
+def test_shared_invalidation_reaches_other_workers(tmp_path):
+    path = str(tmp_path / "shared.db")
+    # dua "worker": L1 masing-masing, L2 SQLite yang sama
+    worker_a = TieredCache(SQLiteBackend(path), MemoryBackend(), version_check_interval=0)
+    worker_b = TieredCache(SQLiteBackend(path), MemoryBackend(), version_check_interval=0)
+
+    worker_a.set("surah", "1", {"nama": "Al-Fatihah"})
+    assert worker_b.get("surah", "1") == {"nama": "Al-Fatihah"}
+
+    worker_b.invalidate("surah")
+    assert worker_a.get("surah", "1") is None
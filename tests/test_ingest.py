@@ -0,0 +1,74 @@
+import copy
+
+from sqlalchemy import select
+
+from app.database import upsert
+from app.extension import db
+from app.models import Ayat, Reciter, Surah, Tafsir
+from app.services.WarmupServices import WarmupService
+
+
+def _rows(model, nomor):
+    return db.session.execute(
+        select(model.id, model.nomor_ayat).join(Surah, Surah.id == model.surah_id)
+        .where(Surah.nomor == nomor).order_by(model.nomor_ayat)
+    ).all()
+
+
+def test_ingest_twice_keeps_rows(app_context):
+    surah_data, tafsir_data = WarmupService._fetch(105, True, True)
+    WarmupService._store(105, surah_data, tafsir_data)
+    ayat, tafsir = _rows(Ayat, 105), _rows(Tafsir, 105)
+    assert len(ayat) == len(tafsir) == 5
+
+    WarmupService._store(105, surah_data, tafsir_data)
+    assert _rows(Ayat, 105) == ayat  # id tetap: upsert, bukan delete + insert
+    assert _rows(Tafsir, 105) == tafsir
+    assert db.session.query(Surah).filter_by(nomor=105).count() == 1
+
+
+def test_upsert_ignore_and_update(app_context):
+    row = {"kode": "t1", "nama": "Qari Uji", "ayat_template": "https://cdn.test/a/{surah}{ayat}.mp3"}
+    try:
+        upsert(db.session, Reciter, [row], ("kode",))
+        upsert(db.session, Reciter, [{**row, "nama": "Diabaikan"}], ("kode",))
+        db.session.commit()
+        assert db.session.execute(select(Reciter.nama).where(Reciter.kode == "t1")).scalars().all() == ["Qari Uji"]
+
+        upsert(db.session, Reciter, [{**row, "nama": "Baru"}], ("kode",), update_cols=("nama",))
+        db.session.commit()
+        assert db.session.execute(select(Reciter.nama).where(Reciter.kode == "t1")).scalars().all() == ["Baru"]
+    finally:
+        db.session.query(Reciter).filter_by(kode="t1").delete()
+        db.session.commit()
+
+
+def test_reingest_only_invalidates_that_surah(app, client, warm_etag):
+    etag_5 = warm_etag("/api/surah/5?limit=5")
+    etag_6 = warm_etag("/api/surah/6?limit=5")
+
+    with app.app_context():
+        surah_data = copy.deepcopy(WarmupService._fetch(5, True, False)[0])
+        surah_data["ayat"][0]["teksIndonesia"] = "teks yang diperbarui"
+        WarmupService._store(5, surah_data, None)
+
+    resp = client.get("/api/surah/5?limit=5", headers={"If-None-Match": etag_5})
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != etag_5
+    assert resp.get_json()["data"]["ayat"][0]["indonesia"] == "teks yang diperbarui"
+    assert client.get("/api/surah/6?limit=5", headers={"If-None-Match": etag_6}).status_code == 304
+
+
+def test_deferred_notifications_invalidate_once_per_surah(app_context):
+    from app.cache import shared_cache
+    from app.response_cache import SURAH_NAMESPACE
+    from app.services.IngestServices import IngestService
+
+    namespace = SURAH_NAMESPACE.format(107)
+    surah_data, tafsir_data = WarmupService._fetch(107, True, True)
+    before = shared_cache.version(namespace, fresh=True)
+    with IngestService.deferred_notifications():
+        WarmupService._store(107, surah_data, None)
+        WarmupService._store(107, None, tafsir_data)
+        assert shared_cache.version(namespace, fresh=True) == before  # ditahan sampai blok selesai
+    assert shared_cache.version(namespace, fresh=True) == before + 1
@@ -0,0 +1,34 @@
+def _walk(client, path, items_key, cursor_param="after"):
+    seen, cursor = [], None
+    while True:
+        url = path + (f"&{cursor_param}={cursor}" if cursor else "")
+        resp = client.get(url)
+        assert resp.status_code == 200, resp.get_data(as_text=True)
+        data = resp.get_json()["data"]
+        seen.append([item.get("nomor", item.get("ayat")) for item in data[items_key]])
+        cursor = data["meta"]["next_cursor"]
+        if not cursor:
+            return seen
+
+
+def test_surah_keyset_walks_every_ayat_once(client):
+    pages = _walk(client, "/api/surah/3?limit=64", "ayat")
+    assert [len(page) for page in pages] == [64, 64, 64, 8]
+    assert sum(pages, []) == list(range(1, 201))
+
+
+def test_tafsir_keyset_walks_every_ayat_once(client):
+    pages = _walk(client, "/api/tafsir/36?limit=40", "tafsir")
+    assert sum(pages, []) == list(range(1, 84))
+
+
+def test_page_and_cursor_agree(client):
+    by_page = client.get("/api/surah/3?limit=10&page=3").get_json()["data"]["ayat"]
+    cursor = client.get("/api/surah/3?limit=10&page=2").get_json()["data"]["meta"]["next_cursor"]
+    by_cursor = client.get(f"/api/surah/3?limit=10&after={cursor}").get_json()["data"]["ayat"]
+    assert [a["nomor"] for a in by_page] == [a["nomor"] for a in by_cursor] == list(range(21, 31))
+
+
+def test_malformed_cursor_is_400(client):
+    assert client.get("/api/surah/3?after=bukan-cursor").status_code == 400
+    assert client.get("/api/tafsir/3?after=bukan-cursor").status_code == 400
@@ -0,0 +1,47 @@
+def _data(resp):
+    assert resp.status_code == 200, resp.get_data(as_text=True)
+    return resp.get_json()["data"]
+
+
+def test_note_changes_resume_from_cursor(client, user_id, auth_headers):
+    headers = auth_headers(user_id)
+    items = [{"surah": 1, "ayat": n, "content": f"catatan {n}"} for n in range(1, 6)]
+    _data(client.post("/api/note", json={"items": items}, headers=headers))
+
+    seen, cursor = [], None
+    while True:
+        url = "/api/note/changes?limit=2" + (f"&since={cursor}" if cursor else "")
+        data = _data(client.get(url, headers=headers))
+        seen.extend(item["ayat"] for item in data["items"])
+        cursor = data["meta"]["next_cursor"]
+        if not data["meta"]["has_more"]:
+            break
+    assert seen == [1, 2, 3, 4, 5]
+
+    # sync berikutnya dari cursor terakhir: hanya perubahan baru, termasuk tombstone
+    _data(client.post("/api/note", json={"surah": 1, "ayat": 2, "content": "diubah"}, headers=headers))
+    _data(client.delete("/api/note", json={"surah": 1, "ayat": 4}, headers=headers))
+    data = _data(client.get(f"/api/note/changes?since={cursor}", headers=headers))
+    assert [(item["ayat"], item["deleted"]) for item in data["items"]] == [(2, False), (4, True)]
+    assert data["items"][0]["content"] == "diubah"
+
+    data = _data(client.get(f"/api/note/changes?since={data['meta']['next_cursor']}", headers=headers))
+    assert data["items"] == []
+
+
+def test_first_sync_skips_tombstones(client, user_id, auth_headers):
+    headers = auth_headers(user_id)
+    _data(client.post("/api/note", json={"items": [
+        {"surah": 2, "ayat": 1, "content": "tetap"},
+        {"surah": 2, "ayat": 2, "content": "dihapus"}
+    ]}, headers=headers))
+    _data(client.delete("/api/note", json={"surah": 2, "ayat": 2}, headers=headers))
+
+    data = _data(client.get("/api/note/changes", headers=headers))
+    assert [item["ayat"] for item in data["items"]] == [1]
+    assert client.get("/api/note?surah=2&ayat=2", headers=headers).status_code == 404
+    assert _data(client.get("/api/note?surah=2&ayat=1", headers=headers))["content"] == "tetap"
+
+
+def test_malformed_since_is_400(client, user_id, auth_headers):
+    assert client.get("/api/note/changes?since=rusak", headers=auth_headers(user_id)).status_code == 400
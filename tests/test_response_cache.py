@@ -0,0 +1,24 @@
+def test_matching_etag_gets_304(client, warm_etag):
+    etag = warm_etag("/api/surah/4?limit=5")
+    resp = client.get("/api/surah/4?limit=5", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.get_data() == b""
+    assert resp.headers["ETag"] == etag
+
+    resp = client.get("/api/surah/4?limit=5", headers={"If-None-Match": '"lain"'})
+    assert resp.status_code == 200
+    assert resp.headers["Cache-Control"].startswith("public, max-age=")
+
+
+def test_query_string_is_part_of_the_key(client, warm_etag):
+    etag = warm_etag("/api/surah/4?limit=5")
+    resp = client.get("/api/surah/4?limit=6", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert len(resp.get_json()["data"]["ayat"]) == 6
+
+
+def test_error_responses_are_not_cached(client):
+    assert client.get("/api/surah/115").status_code == 404
+    resp = client.get("/api/surah/115")
+    assert resp.status_code == 404
+    assert "ETag" not in resp.headers
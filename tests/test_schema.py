@@ -0,0 +1,53 @@
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+
+from conftest import ROOT
+
+SHIPPED_DB = os.path.join(ROOT, "config", "database", "data.db")
+
+# proses terpisah: Config membaca DATABASE_URI saat import, app sesi test sudah terikat ke DB lain
+BOOT = """
+from app import create_app
+from app.models.schema import SchemaUpgradeError
+try:
+    create_app()
+except SchemaUpgradeError:
+    raise SystemExit(3)
+"""
+
+
+def _boot(tmp_path, db_path):
+    env = {**os.environ, "DATABASE_URI": "sqlite:///" + str(db_path), "QALMI_VAR_DIR": str(tmp_path / "var")}
+    return subprocess.run([sys.executable, "-c", BOOT], cwd=ROOT, env=env, capture_output=True, text=True, timeout=120)
+
+
+def _query(db_path, sql):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(sql).fetchall()
+
+
+def test_boots_on_a_copy_of_the_shipped_db(tmp_path):
+    db_path = tmp_path / "data.db"
+    shutil.copy(SHIPPED_DB, db_path)
+
+    result = _boot(tmp_path, db_path)
+    assert result.returncode == 0, result.stderr
+    assert _query(db_path, "SELECT version_num FROM alembic_version") == [("e91b3a4c7f28",)]
+    tables = {name for (name,) in _query(db_path, "SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {"reciter", "note_clock"} <= tables
+    assert _query(db_path, "SELECT COUNT(*) FROM surah") == _query(SHIPPED_DB, "SELECT COUNT(*) FROM surah")
+
+
+def test_failed_upgrade_raises_instead_of_exiting(tmp_path):
+    db_path = tmp_path / "data.db"
+    shutil.copy(SHIPPED_DB, db_path)
+    with sqlite3.connect(db_path) as conn:
+        # baseline tercatat, tapi tabel yang diubah revisi berikutnya hilang
+        conn.execute("UPDATE alembic_version SET version_num = '3f1a2c7d9b10'")
+        conn.execute("DROP TABLE bookmark")
+
+    result = _boot(tmp_path, db_path)
+    assert result.returncode == 3, result.stderr
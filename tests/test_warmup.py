@@ -0,0 +1,40 @@
+import os
+
+from app.extension import db
+from app.models import Ayat, Surah, Tafsir
+from app.services.WarmupServices import WarmupService
+
+
+def _count(model, nomor):
+    return db.session.query(model).join(Surah, Surah.id == model.surah_id).filter(Surah.nomor == nomor).count()
+
+
+def test_warmup_fills_missing_tafsir_then_skips(app_context, tmp_path):
+    checkpoint = str(tmp_path / "checkpoint.json")
+    nomors = [108, 109, 110]
+
+    report = WarmupService.run(workers=2, surah_numbers=nomors, include_tafsir=False, checkpoint_path=checkpoint)
+    assert (report["completed"], report["failed"]) == (3, 0)
+    assert report["tafsir_rows"] == 0
+    assert [_count(Ayat, n) for n in nomors] == [3, 6, 3]
+
+    # run dengan tafsir tidak boleh dilewati hanya karena ayat sudah lengkap
+    report = WarmupService.run(workers=2, surah_numbers=nomors, include_tafsir=True, checkpoint_path=checkpoint)
+    assert report["completed"] == 3
+    assert report["ayat_rows"] == 0
+    assert [_count(Tafsir, n) for n in nomors] == [3, 6, 3]
+
+    report = WarmupService.run(workers=2, surah_numbers=nomors, include_tafsir=True, checkpoint_path=checkpoint)
+    assert (report["skipped"], report["completed"]) == (3, 0)
+    assert not os.path.exists(checkpoint)  # run bersih menghapus checkpoint
+
+
+def test_warmup_resume_trusts_db_over_checkpoint(app_context, tmp_path):
+    checkpoint = str(tmp_path / "checkpoint.json")
+    # checkpoint dari run sebelumnya (mis. DB di-reset sesudahnya): 111 tercatat selesai tapi belum ada di DB
+    WarmupService._save_checkpoint(checkpoint, {111}, False)
+
+    report = WarmupService.run(workers=1, surah_numbers=[111], include_tafsir=False, checkpoint_path=checkpoint)
+    assert report["surah"][0]["status"] == "ok"
+    assert _count(Ayat, 111) == 5
+    assert not os.path.exists(checkpoint)